@@ -0,0 +1,65 @@
+"""
+Micro-benchmark de la base de datos: inserciones por segundo y latencia de
+consulta, comparando abrir una conexión por llamada (comportamiento anterior)
+contra conexiones persistentes por hilo con WAL.
+
+Uso (desde la raíz del proyecto):
+    python -m benchmarks.bench_database --inserts 2000 --queries 200 --threads 4
+"""
+import argparse
+import os
+import statistics
+import tempfile
+import threading
+import time
+from database.database import Database
+from models.camera import Camera
+from models.event import Event
+
+def bench(pooled: bool, inserts: int, queries: int, threads: int) -> dict:
+    folder = tempfile.mkdtemp(prefix="bench_db_")
+    db = Database(db_path=os.path.join(folder, "bench.db"), pooled=pooled)
+    camera_id = db.add_camera(Camera(name="bench", ip="10.0.0.1", username="u", password="p"))
+
+    # --- Inserciones concurrentes (como los hilos detectores) ---
+    def writer(n):
+        for i in range(n):
+            db.add_event(Event(camera_id, f"2024-01-01 00:{i // 60 % 60:02d}:{i % 60:02d}", "bench"))
+
+    per_thread = inserts // threads
+    workers = [threading.Thread(target=writer, args=(per_thread,)) for _ in range(threads)]
+    start = time.perf_counter()
+    for w in workers:
+        w.start()
+    for w in workers:
+        w.join()
+    insert_rate = per_thread * threads / (time.perf_counter() - start)
+
+    # --- Latencia de consulta (como el refresco de la UI) ---
+    latencies = []
+    for _ in range(queries):
+        t = time.perf_counter()
+        db.get_events_by_camera(camera_id)
+        latencies.append((time.perf_counter() - t) * 1000)
+
+    db.close()
+    return {
+        "inserts_s": insert_rate,
+        "query_ms_p50": statistics.median(latencies),
+        "query_ms_p95": sorted(latencies)[int(len(latencies) * 0.95) - 1],
+    }
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark de conexiones SQLite")
+    parser.add_argument("--inserts", type=int, default=2000)
+    parser.add_argument("--queries", type=int, default=200)
+    parser.add_argument("--threads", type=int, default=4)
+    args = parser.parse_args()
+
+    for label, pooled in (("por llamada", False), ("persistente", True)):
+        r = bench(pooled, args.inserts, args.queries, args.threads)
+        print(f"{label:<12} inserciones={r['inserts_s']:8.0f}/s "
+              f"consulta p50={r['query_ms_p50']:.2f}ms p95={r['query_ms_p95']:.2f}ms")
+
+if __name__ == "__main__":
+    main()
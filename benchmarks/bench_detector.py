@@ -0,0 +1,66 @@
+"""
+Compara el detector en modo dual (dos modelos) contra el modo fusionado
+(un solo modelo con ambas clases) en frames por segundo sobre CPU.
+
+Uso (desde la raíz del proyecto):
+    python -m benchmarks.bench_detector --video muestra.mp4 --fused models/fused.pt
+Sin --video se usan frames sintéticos de 640x360.
+"""
+import argparse
+import time
+import numpy as np
+import cv2
+from models.detector import DualDetector, FusedDetector
+
+def load_frames(video: str, count: int) -> list:
+    if not video:
+        rng = np.random.default_rng(0)
+        return [rng.integers(0, 255, (360, 640, 3), dtype=np.uint8) for _ in range(count)]
+
+    frames = []
+    cap = cv2.VideoCapture(video)
+    while len(frames) < count:
+        ret, frame = cap.read()
+        if not ret:
+            break
+        h, w = frame.shape[:2]
+        frames.append(cv2.resize(frame, (640, int(h * 640 / w))))
+    cap.release()
+    return frames
+
+def run(detector, frames: list, batch: int, warmup: int = 3) -> float:
+    for _ in range(warmup):
+        detector.detect_batch(frames[:batch])
+    start = time.perf_counter()
+    for i in range(0, len(frames), batch):
+        detector.detect_batch(frames[i:i + batch])
+    return len(frames) / (time.perf_counter() - start)
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark detector dual vs fusionado (CPU)")
+    parser.add_argument("--video", default=None, help="Clip de muestra")
+    parser.add_argument("--frames", type=int, default=60)
+    parser.add_argument("--batch", type=int, default=1)
+    parser.add_argument("--person", default="yolov8n.pt")
+    parser.add_argument("--forklift", default="models/best.pt")
+    parser.add_argument("--fused", default="models/fused.pt")
+    args = parser.parse_args()
+
+    frames = load_frames(args.video, args.frames)
+    if not frames:
+        raise SystemExit("No se pudieron leer frames del video.")
+
+    results = {"dual": run(DualDetector(args.person, args.forklift), frames, args.batch)}
+    try:
+        results["fused"] = run(FusedDetector(args.fused), frames, args.batch)
+    except Exception as e:
+        print(f"[BENCH] Modo fusionado no disponible: {e}")
+
+    print(f"frames={len(frames)} lote={args.batch}")
+    for mode, fps in results.items():
+        print(f"  {mode:<6} {fps:8.2f} fps")
+    if "fused" in results:
+        print(f"  aceleración fusionado/dual: {results['fused'] / results['dual']:.2f}x")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,66 @@
+"""
+Siembra una tabla de eventos grande (1M+ filas por defecto) y mide la
+latencia de get_events_by_camera por cámara con el índice compuesto
+(camera_id, timestamp DESC).
+
+Uso (desde la raíz del proyecto):
+    python -m benchmarks.bench_events_query --events 1000000 --cameras 20
+La base sembrada se reutiliza entre corridas (--db para elegir la ruta).
+"""
+import argparse
+import os
+import statistics
+import tempfile
+import time
+from datetime import datetime, timedelta
+from database.database import Database
+from models.camera import Camera
+
+def seed(db: Database, events: int, cameras: int):
+    conn = db._get_connection()
+    try:
+        if conn.execute("SELECT COUNT(*) FROM events").fetchone()[0] >= events:
+            return
+        ids = [db.add_camera(Camera(name=f"bench_{i}", ip=f"10.0.0.{i}", username="u", password="p"))
+               for i in range(cameras)]
+        base = datetime(2024, 1, 1)
+
+        def rows():
+            for i in range(events):
+                ts = (base + timedelta(seconds=i * 7)).strftime("%Y-%m-%d %H:%M:%S")
+                yield (ids[i % cameras], ts, "⚠️ Persona cerca de maquina", None)
+
+        start = time.perf_counter()
+        conn.executemany(
+            "INSERT INTO events (camera_id, timestamp, description, image_path) VALUES (?, ?, ?, ?)", rows()
+        )
+        conn.commit()
+        print(f"Sembrados {events} eventos en {time.perf_counter() - start:.1f}s")
+    finally:
+        db._release(conn)
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark de consulta de eventos por cámara")
+    parser.add_argument("--events", type=int, default=1_000_000)
+    parser.add_argument("--cameras", type=int, default=20)
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--db", default=os.path.join(tempfile.gettempdir(), "bench_events.db"))
+    args = parser.parse_args()
+
+    db = Database(db_path=args.db)
+    seed(db, args.events, args.cameras)
+
+    latencies, rows = [], 0
+    for camera in db.get_all_cameras():
+        for _ in range(args.repeat):
+            t = time.perf_counter()
+            rows = len(db.get_events_by_camera(camera.id))
+            latencies.append((time.perf_counter() - t) * 1000)
+
+    latencies.sort()
+    print(f"get_events_by_camera: {rows} filas/cámara "
+          f"p50={statistics.median(latencies):.1f}ms p95={latencies[int(len(latencies) * 0.95) - 1]:.1f}ms")
+    db.close()
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,77 @@
+"""
+Mide el tiempo de importación en frío de los módulos de arranque con
+`python -X importtime` y lo compara contra una línea base guardada en JSON.
+Sale con código 1 si algún módulo supera la base más la tolerancia, para
+detectar que una importación pesada (torch, ultralytics, reportlab...) volvió
+a colarse en el arranque. La línea base depende de la máquina, por eso no se
+versiona: la primera ejecución la crea y las siguientes comparan contra ella.
+
+Uso (desde la raíz del proyecto):
+    python -m benchmarks.bench_import --tolerance 0.25
+    python -m benchmarks.bench_import --update        # vuelve a medir la línea base
+"""
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+
+MODULES = ["ui.winMain", "ui.winCameras"]
+DEFAULT_BASELINE = os.path.join(os.path.dirname(__file__), "import_baseline.json")
+
+def import_time(module: str, repeat: int) -> dict:
+    """Mediana del tiempo acumulado (ms) del módulo y sus 5 dependencias más pesadas."""
+    totals, heavy = [], {}
+    for _ in range(repeat):
+        proc = subprocess.run(
+            [sys.executable, "-X", "importtime", "-c", f"import {module}"],
+            capture_output=True, text=True
+        )
+        if proc.returncode != 0:
+            raise RuntimeError(f"No se pudo importar {module}:\n{proc.stderr.strip().splitlines()[-1]}")
+        # Formato: "import time: self [us] | cumulative | imported package"
+        for line in proc.stderr.splitlines():
+            if not line.startswith("import time:") or "cumulative" in line:
+                continue
+            _, cumulative, name = line[len("import time:"):].split("|")
+            name, cumulative = name.strip(), int(cumulative) / 1000
+            heavy[name] = max(heavy.get(name, 0), cumulative)
+            if name == module:
+                totals.append(cumulative)
+    top = sorted(((n, t) for n, t in heavy.items() if n != module), key=lambda x: -x[1])[:5]
+    return {"total_ms": statistics.median(totals), "top": top}
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark de tiempo de importación en frío")
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--tolerance", type=float, default=0.25, help="Regresión permitida (fracción)")
+    parser.add_argument("--baseline", default=DEFAULT_BASELINE)
+    parser.add_argument("--update", action="store_true", help="Guardar los tiempos actuales como línea base")
+    args = parser.parse_args()
+
+    results = {m: import_time(m, args.repeat) for m in MODULES}
+    for module, r in results.items():
+        print(f"{module:<16} {r['total_ms']:8.1f}ms  más pesados: "
+              + ", ".join(f"{n} {t:.0f}ms" for n, t in r["top"]))
+
+    if args.update or not os.path.exists(args.baseline):
+        with open(args.baseline, "w", encoding="utf-8") as f:
+            json.dump({m: r["total_ms"] for m, r in results.items()}, f, indent=4)
+        print(f"Línea base guardada en {args.baseline}")
+        return
+
+    with open(args.baseline, encoding="utf-8") as f:
+        baseline = json.load(f)
+    failed = False
+    for module, r in results.items():
+        if module not in baseline:
+            continue
+        limit = baseline[module] * (1 + args.tolerance)
+        if r["total_ms"] > limit:
+            failed = True
+            print(f"REGRESIÓN {module}: {r['total_ms']:.1f}ms > {limit:.1f}ms (base {baseline[module]:.1f}ms)")
+    sys.exit(1 if failed else 0)
+
+if __name__ == "__main__":
+    main()
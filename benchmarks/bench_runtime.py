@@ -0,0 +1,73 @@
+"""
+Compara los motores de ejecución (PyTorch, ONNX Runtime, OpenVINO) sobre los
+mismos frames: tiempo de la primera inferencia sin calentar, latencia por
+frame (p50/p95, lote de 1) y rendimiento en frames por segundo por lotes.
+
+Uso (desde la raíz del proyecto):
+    python -m benchmarks.bench_runtime --video muestra.mp4 --runtimes torch onnx openvino
+Sin --video se usan frames sintéticos de 640x360. Los modelos exportados se
+guardan junto a los .pt y se reutilizan en las siguientes corridas.
+"""
+import argparse
+import statistics
+import time
+from benchmarks.bench_detector import load_frames
+from models.detector import RUNTIMES, create_detector
+
+def run(detector, frames: list, batch: int) -> dict:
+    start = time.perf_counter()
+    detector.detect(frames[0])
+    cold_ms = (time.perf_counter() - start) * 1000
+    detector.warmup(2)
+
+    latencies = []
+    for frame in frames:
+        t = time.perf_counter()
+        detector.detect(frame)
+        latencies.append((time.perf_counter() - t) * 1000)
+
+    start = time.perf_counter()
+    for i in range(0, len(frames), batch):
+        detector.detect_batch(frames[i:i + batch])
+    latencies.sort()
+    return {
+        "cold_ms": cold_ms,
+        "p50_ms": statistics.median(latencies),
+        "p95_ms": latencies[max(0, int(len(latencies) * 0.95) - 1)],
+        "fps": len(frames) / (time.perf_counter() - start),
+    }
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark de motores de inferencia (CPU)")
+    parser.add_argument("--video", default=None, help="Clip de muestra")
+    parser.add_argument("--frames", type=int, default=60)
+    parser.add_argument("--batch", type=int, default=4)
+    parser.add_argument("--mode", default="dual", choices=["dual", "fused"])
+    parser.add_argument("--person", default="yolov8n.pt")
+    parser.add_argument("--forklift", default="models/best.pt")
+    parser.add_argument("--fused", default="models/fused.pt")
+    parser.add_argument("--runtimes", nargs="+", default=list(RUNTIMES), choices=list(RUNTIMES))
+    args = parser.parse_args()
+
+    frames = load_frames(args.video, args.frames)
+    if not frames:
+        raise SystemExit("No se pudieron leer frames del video.")
+
+    print(f"frames={len(frames)} lote={args.batch} modo={args.mode}")
+    baseline = None
+    for runtime in args.runtimes:
+        try:
+            start = time.perf_counter()
+            detector = create_detector(args.mode, args.person, args.forklift, args.fused, runtime=runtime)
+            load_s = time.perf_counter() - start
+            r = run(detector, frames, args.batch)
+        except Exception as e:
+            print(f"  {runtime:<9} no disponible: {e}")
+            continue
+        baseline = baseline or r["fps"]
+        print(f"  {runtime:<9} carga={load_s:5.1f}s primera={r['cold_ms']:7.1f}ms "
+              f"p50={r['p50_ms']:6.1f}ms p95={r['p95_ms']:6.1f}ms "
+              f"{r['fps']:7.2f} fps ({r['fps'] / baseline:.2f}x)")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,161 @@
+"""
+Prueba de carga del tablero en vivo (models/websocket): abre cientos de
+visores simulados (cliente RFC 6455 mínimo con asyncio), los deja inactivos
+y publica eventos midiendo la latencia hasta cada visor, los descartes y la
+memoria del proceso.
+
+Uso (desde la raíz del proyecto):
+    python -m benchmarks.bench_websocket --clients 500 --events 200 --rate 50
+Con --url ws://host:puerto/ws se conecta a un servidor ya corriendo (solo
+conexiones e inactividad: los eventos los genera la detección real).
+"""
+import argparse
+import asyncio
+import base64
+import json
+import os
+import statistics
+import threading
+import time
+from urllib.parse import urlparse
+try:
+    import resource     # Solo Unix: límite de descriptores y memoria máxima
+except ImportError:
+    resource = None
+from models.event import Event
+from models.websocket import (WebSocket, accept_key, encode_frame, read_http_head, read_message,
+                              OP_TEXT, OP_PING, OP_PONG, OP_CLOSE)
+
+def raise_fd_limit(needed: int):
+    """Cada visor en proceso usa dos descriptores (cliente y servidor)."""
+    if resource is None:
+        return
+    soft, hard = resource.getrlimit(resource.RLIMIT_NOFILE)
+    if soft < needed:
+        target = needed if hard == resource.RLIM_INFINITY else min(needed, hard)
+        resource.setrlimit(resource.RLIMIT_NOFILE, (target, hard))
+        print(f"Límite de archivos abiertos: {soft} -> {target}")
+
+def percentile(values: list, p: float) -> float:
+    values = sorted(values)
+    return values[min(len(values) - 1, int(len(values) * p))] if values else 0.0
+
+class SimulatedViewer:
+    """Visor inactivo: solo lee mensajes, contesta pings y registra latencias."""
+    def __init__(self, host: str, port: int, path: str):
+        self.host, self.port, self.path = host, port, path
+        self.writer = None
+        self.hello = asyncio.Event()
+        self.latencies = []
+        self.connect_ms = None
+
+    async def run(self, connect_sem: asyncio.Semaphore):
+        async with connect_sem:
+            start = time.perf_counter()
+            reader, self.writer = await asyncio.open_connection(self.host, self.port)
+            key = base64.b64encode(os.urandom(16)).decode("ascii")
+            self.writer.write(
+                f"GET {self.path} HTTP/1.1\r\nHost: {self.host}:{self.port}\r\nUpgrade: websocket\r\n"
+                f"Connection: Upgrade\r\nSec-WebSocket-Key: {key}\r\nSec-WebSocket-Version: 13\r\n\r\n".encode("ascii")
+            )
+            status, headers = await read_http_head(reader)
+            if " 101 " not in status or headers.get("sec-websocket-accept") != accept_key(key):
+                raise ConnectionError(f"handshake rechazado: {status}")
+            self.connect_ms = (time.perf_counter() - start) * 1000
+
+        try:
+            while True:
+                opcode, payload = await read_message(reader, masked=False, max_payload=16 * 1024 * 1024)
+                if opcode == OP_PING:
+                    self.writer.write(encode_frame(OP_PONG, payload, mask=True))
+                elif opcode == OP_CLOSE:
+                    break
+                elif opcode == OP_TEXT:
+                    message = json.loads(payload)
+                    if message["type"] == "hello":
+                        self.hello.set()
+                    elif message["type"] == "event":
+                        sent = float(message["event"]["description"].rsplit(" ", 1)[1])
+                        self.latencies.append((time.time() - sent) * 1000)
+        except (asyncio.IncompleteReadError, ConnectionError):
+            pass
+
+    def close(self):
+        if self.writer is not None:
+            self.writer.write(encode_frame(OP_CLOSE, b"\x03\xe8", mask=True))
+            self.writer.close()
+
+def publish(server: WebSocket, events: int, rate: float, image: str):
+    interval = 1 / rate
+    for i in range(events):
+        server.publish_event(Event(camera_id=1, timestamp=time.strftime("%Y-%m-%d %H:%M:%S"),
+                                   description=f"bench {i} {time.time():.6f}", image_path=image, id=i + 1))
+        time.sleep(interval)
+
+async def run(args):
+    server = None
+    if args.url:
+        url = urlparse(args.url)
+        host, port, path = url.hostname, url.port or 80, url.path + (f"?{url.query}" if url.query else "")
+    else:
+        server = WebSocket("Benchmark", port=0, max_queue=args.queue, ping_interval=args.ping).start()
+        host, port, path = "127.0.0.1", server.port, "/ws"
+
+    viewers = [SimulatedViewer(host, port, path) for _ in range(args.clients)]
+    connect_sem = asyncio.Semaphore(args.concurrency)
+    start = time.perf_counter()
+    tasks = [asyncio.create_task(v.run(connect_sem)) for v in viewers]
+    await asyncio.wait_for(asyncio.gather(*(v.hello.wait() for v in viewers)), timeout=60)
+    connect_s = time.perf_counter() - start
+    connects = [v.connect_ms for v in viewers]
+    print(f"{args.clients} visores conectados en {connect_s:.2f}s  "
+          f"handshake p50={statistics.median(connects):.1f}ms p95={percentile(connects, 0.95):.1f}ms")
+
+    # Visores inactivos: el servidor no debería gastar CPU en ellos
+    cpu = time.process_time()
+    await asyncio.sleep(args.idle)
+    print(f"Inactivos {args.idle:.0f}s: CPU del proceso {(time.process_time() - cpu) / args.idle * 100:.1f}%")
+
+    if server is not None and args.events:
+        publisher = threading.Thread(target=publish, args=(server, args.events, args.rate, args.image))
+        publisher.start()
+        await asyncio.get_running_loop().run_in_executor(None, publisher.join)
+        expected = args.clients * args.events
+        deadline = time.monotonic() + 10
+        while sum(len(v.latencies) for v in viewers) < expected and time.monotonic() < deadline:
+            await asyncio.sleep(0.1)
+        latencies = [ms for v in viewers for ms in v.latencies]
+        print(f"Eventos: {args.events} a {args.rate:.0f}/s -> entregados {len(latencies)}/{expected}  "
+              f"latencia p50={percentile(latencies, 0.5):.1f}ms p95={percentile(latencies, 0.95):.1f}ms "
+              f"máx={max(latencies, default=0):.1f}ms")
+
+    if server is not None:
+        server.print_stats()
+    if resource is not None:
+        rss_mb = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+        print(f"Memoria máxima del proceso (servidor + visores): {rss_mb:.0f} MB")
+
+    for v in viewers:
+        v.close()
+    await asyncio.gather(*tasks, return_exceptions=True)
+    if server is not None:
+        server.stop()
+
+def main():
+    parser = argparse.ArgumentParser(description="Prueba de carga del tablero WebSocket")
+    parser.add_argument("--clients", type=int, default=500)
+    parser.add_argument("--events", type=int, default=200)
+    parser.add_argument("--rate", type=float, default=50, help="Eventos por segundo")
+    parser.add_argument("--idle", type=float, default=5, help="Segundos con los visores inactivos")
+    parser.add_argument("--queue", type=int, default=64, help="Cola por visor en el servidor")
+    parser.add_argument("--ping", type=float, default=30, help="Intervalo de ping del servidor (s)")
+    parser.add_argument("--concurrency", type=int, default=100, help="Handshakes simultáneos")
+    parser.add_argument("--image", default=None, help="JPEG para probar miniaturas (requiere cv2)")
+    parser.add_argument("--url", default=None, help="ws://host:puerto/ws de un servidor ya corriendo")
+    args = parser.parse_args()
+
+    raise_fd_limit(args.clients * 2 + 64)
+    asyncio.run(run(args))
+
+if __name__ == "__main__":
+    main()
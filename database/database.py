@@ -1,14 +1,47 @@
 import sqlite3
+import threading
 from models.camera import Camera
 from models.event import Event
 import os
 
+# Migraciones del esquema. Cada una se aplica una sola vez y en orden;
+# la versión aplicada se guarda en PRAGMA user_version. Solo agregar al final.
+MIGRATIONS = [
+    # 1. Índice para consultas de eventos por cámara ordenadas por fecha
+    ["CREATE INDEX IF NOT EXISTS idx_events_camera_ts ON events (camera_id, timestamp DESC)"],
+    # 2. Índices con id como desempate para la paginación por llave (timestamp, id)
+    [
+        "CREATE INDEX IF NOT EXISTS idx_events_camera_ts_id ON events (camera_id, timestamp DESC, id DESC)",
+        "CREATE INDEX IF NOT EXISTS idx_events_ts_id ON events (timestamp DESC, id DESC)",
+        "DROP INDEX IF EXISTS idx_events_camera_ts",
+    ],
+    # 3. Zonas de interés por cámara (JSON con polígonos normalizados)
+    ["ALTER TABLE cameras ADD COLUMN roi TEXT"],
+    # 4. Substream de análisis por cámara (perfil de baja resolución para el detector)
+    ["ALTER TABLE cameras ADD COLUMN analysis_path TEXT"],
+]
+
+# Un evento por cámara y fecha/hora (el de menor id), igual que get_events_by_camera.
+# Como filtro por fila (y no GROUP BY) sirve para la paginación por llave; cada
+# comprobación es una búsqueda en idx_events_camera_ts_id.
+FIRST_OF_TIMESTAMP = (
+    "NOT EXISTS (SELECT 1 FROM events d WHERE d.camera_id = events.camera_id "
+    "AND d.timestamp = events.timestamp AND d.id < events.id)"
+)
+
 class Database:
-    def __init__(self, db_name="database.db", db_path=None):
+    def __init__(self, db_name="database.db", db_path=None, pooled=True, cache_kb=20000):
         """
         Inicializa la base de datos. Construye la ruta a la base de datos
         relativa a la ubicación de este archivo.
+        pooled: reutiliza una conexión por hilo (WAL, synchronous=NORMAL).
+        cache_kb: tamaño de la caché de páginas por conexión.
         """
+        self.pooled = pooled
+        self.cache_kb = cache_kb
+        self._local = threading.local()
+        self._connections = {}          # conexión -> hilo dueño
+        self._connections_lock = threading.Lock()
         if db_path:
             self.db_path = db_path
         else:
@@ -22,15 +55,81 @@ class Database:
                 pass
 
         self._create_table()
+        self._migrate()
 
     def _get_connection(self):
-        """Crea y devuelve una conexión a la base de datos."""
-        return sqlite3.connect(self.db_path, check_same_thread=False)
+        """
+        Devuelve la conexión persistente del hilo actual (una por hilo, se crea
+        la primera vez). Con pooled=False se abre una conexión nueva por llamada.
+        """
+        if not self.pooled:
+            return sqlite3.connect(self.db_path, check_same_thread=False)
+
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(self.db_path, check_same_thread=False, timeout=10)
+            # WAL: los lectores (UI, reportes) no bloquean a los escritores (detectores)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            conn.execute(f"PRAGMA cache_size=-{self.cache_kb}")
+            conn.execute("PRAGMA temp_store=MEMORY")
+            conn.execute("PRAGMA busy_timeout=5000")
+            self._local.conn = conn
+            with self._connections_lock:
+                # Los hilos de vida corta (API, reportes, vista en vivo) no
+                # avisan al terminar: sus conexiones se cierran aquí
+                self._close_dead()
+                self._connections[conn] = threading.current_thread()
+        return conn
+
+    def _close_dead(self):
+        """Cierra las conexiones de hilos que ya terminaron (con _connections_lock tomado)."""
+        dead = [conn for conn, thread in self._connections.items() if not thread.is_alive()]
+        for conn in dead:
+            del self._connections[conn]
+            try:
+                conn.close()
+            except sqlite3.Error:
+                pass
+
+    def release_thread(self):
+        """Cierra la conexión persistente del hilo actual (al terminar un hilo de vida corta)."""
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            return
+        self._local.conn = None
+        with self._connections_lock:
+            self._connections.pop(conn, None)
+        try:
+            conn.close()
+        except sqlite3.Error:
+            pass
+
+    def _release(self, conn):
+        """Cierra la conexión si no es persistente; si lo es, deshace lo que quedó sin commit."""
+        if conn is None:
+            return
+        if not self.pooled:
+            conn.close()
+        elif conn.in_transaction:
+            conn.rollback()
+
+    def close(self):
+        """Cierra todas las conexiones persistentes (al salir de la aplicación)."""
+        with self._connections_lock:
+            connections = list(self._connections)
+            self._connections.clear()
+        for conn in connections:
+            try:
+                conn.close()
+            except sqlite3.Error:
+                pass
+        self._local = threading.local()
 
     def add_event(self, event: Event) -> int:
         """Agrega un nuevo evento a la base de datos."""
+        conn = self._get_connection()
         try:
-            conn = self._get_connection()
             cursor = conn.cursor()
             cursor.execute(
                 "INSERT INTO events (camera_id, timestamp, description, image_path) VALUES (?, ?, ?, ?)",
@@ -39,13 +138,12 @@ class Database:
             conn.commit()
             return cursor.lastrowid
         finally:
-            if conn:
-                conn.close()
+            self._release(conn)
 
     def _create_table(self):
         """Crea la tabla 'cameras' si no existe."""
+        conn = self._get_connection()
         try:
-            conn = self._get_connection()
             cursor = conn.cursor()
             cursor.execute('''
                 CREATE TABLE IF NOT EXISTS cameras (
@@ -70,70 +168,83 @@ class Database:
             ''')
             conn.commit()
         finally:
-            if conn:
-                conn.close()
+            self._release(conn)
+
+    def _migrate(self):
+        """Aplica las migraciones pendientes según PRAGMA user_version."""
+        conn = self._get_connection()
+        try:
+            version = conn.execute("PRAGMA user_version").fetchone()[0]
+            for number, statements in enumerate(MIGRATIONS[version:], start=version + 1):
+                for statement in statements:
+                    conn.execute(statement)
+                # PRAGMA no acepta parámetros; number es un entero controlado aquí
+                conn.execute(f"PRAGMA user_version = {int(number)}")
+                conn.commit()
+                print(f"[DB] Migración {number} aplicada")
+        finally:
+            self._release(conn)
 
     def get_all_cameras(self) -> list[Camera]:
         """Obtiene todas las cámaras de la base de datos y las devuelve como una lista de objetos Camera."""
+        conn = self._get_connection()
         try:
-            conn = self._get_connection()
             cursor = conn.cursor()
-            cursor.execute("SELECT id, name, ip, username, password, port, stream_path FROM cameras ORDER BY name")
+            cursor.execute("SELECT id, name, ip, username, password, port, stream_path, roi, analysis_path FROM cameras ORDER BY name")
             rows = cursor.fetchall()
-            return [Camera(id=row[0], name=row[1], ip=row[2], username=row[3], password=row[4], port=row[5], stream_path=row[6]) for row in rows]
+            return [Camera(id=row[0], name=row[1], ip=row[2], username=row[3], password=row[4], port=row[5], stream_path=row[6],
+                           roi=Camera.parse_roi(row[7]), analysis_path=row[8]) for row in rows]
         finally:
-            if conn:
-                conn.close()
+            self._release(conn)
 
     def add_camera(self, camera: Camera) -> int:
         """Agrega una nueva cámara a la base de datos."""
+        conn = self._get_connection()
         try:
-            conn = self._get_connection()
             cursor = conn.cursor()
             cursor.execute(
                 # 1. Añadir la nueva columna
-                "INSERT INTO cameras (name, ip, username, password, port, stream_path) VALUES (?, ?, ?, ?, ?, ?)",
+                "INSERT INTO cameras (name, ip, username, password, port, stream_path, roi, analysis_path) VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
                 # 2. Añadir el nuevo valor del objeto camera
-                (camera.name, camera.ip, camera.username, camera.password, camera.port, camera.stream_path)
+                (camera.name, camera.ip, camera.username, camera.password, camera.port, camera.stream_path, camera.roi_json(),
+                 camera.analysis_path)
             )
             conn.commit()
             return cursor.lastrowid
         finally:
-            if conn:
-                conn.close()
+            self._release(conn)
 
     def update_camera(self, camera: Camera):
         """Actualiza una cámara existente en la base de datos."""
+        conn = self._get_connection()
         try:
-            conn = self._get_connection()
             cursor = conn.cursor()
             cursor.execute(
                 # 1. Añadir la nueva columna al SET
-                "UPDATE cameras SET name = ?, ip = ?, username = ?, password = ?, port = ?, stream_path = ? WHERE id = ?",
+                "UPDATE cameras SET name = ?, ip = ?, username = ?, password = ?, port = ?, stream_path = ?, roi = ?, analysis_path = ? WHERE id = ?",
                 # 2. Añadir el nuevo valor del objeto camera
-                (camera.name, camera.ip, camera.username, camera.password, camera.port, camera.stream_path, camera.id)
+                (camera.name, camera.ip, camera.username, camera.password, camera.port, camera.stream_path, camera.roi_json(),
+                 camera.analysis_path, camera.id)
             )
             conn.commit()
         finally:
-            if conn:
-                conn.close()
+            self._release(conn)
 
     def delete_camera(self, camera_id: int) -> bool:
         """Elimina una cámara de la base de datos por su ID."""
+        conn = self._get_connection()
         try:
-            conn = self._get_connection()
             cursor = conn.cursor()
             cursor.execute("DELETE FROM cameras WHERE id=?", (camera_id,))
             conn.commit()
             return cursor.rowcount > 0
         finally:
-            if conn:
-                conn.close()
+            self._release(conn)
 
     def get_events(self) -> list[Event]:
         """Obtiene todos los eventos de la base de datos y los devuelve como una lista de objetos Event."""
+        conn = self._get_connection()
         try:
-            conn = self._get_connection()
             cursor = conn.cursor()
             cursor.execute("""
                 SELECT id, camera_id, timestamp, description
@@ -151,13 +262,12 @@ class Database:
                 for row in rows
             ]
         finally:
-            if conn:
-                conn.close()
+            self._release(conn)
 
     def add_event(self, event: Event) -> int:
         """Agrega un nuevo evento a la base de datos."""
+        conn = self._get_connection()
         try:
-            conn = self._get_connection()
             cursor = conn.cursor()
             cursor.execute(
                 "INSERT INTO events (camera_id, timestamp, description, image_path) VALUES (?, ?, ?, ?)",
@@ -166,13 +276,29 @@ class Database:
             conn.commit()
             return cursor.lastrowid
         finally:
-            if conn:
-                conn.close()
+            self._release(conn)
+
+    def add_events(self, events: list[Event]) -> list[int]:
+        """Agrega varios eventos en una sola transacción y devuelve sus IDs."""
+        conn = self._get_connection()
+        try:
+            cursor = conn.cursor()
+            ids = []
+            for event in events:
+                cursor.execute(
+                    "INSERT INTO events (camera_id, timestamp, description, image_path) VALUES (?, ?, ?, ?)",
+                    (event.camera_id, event.timestamp, event.description, event.image_path)
+                )
+                ids.append(cursor.lastrowid)
+            conn.commit()
+            return ids
+        finally:
+            self._release(conn)
 
     def update_event(self, event: Event) -> bool:
         """Actualiza un evento existente en la base de datos."""
+        conn = self._get_connection()
         try:
-            conn = self._get_connection()
             cursor = conn.cursor()
             cursor.execute(
                 "UPDATE events SET camera_id=?, timestamp=?, description=?, image_path=? WHERE id=?",
@@ -181,39 +307,36 @@ class Database:
             conn.commit()
             return cursor.rowcount > 0
         finally:
-            if conn:
-                conn.close()
+            self._release(conn)
 
     def delete_event(self, event_id: int) -> bool:
         """Elimina un evento de la base de datos por su ID."""
+        conn = self._get_connection()
         try:
-            conn = self._get_connection()
             cursor = conn.cursor()
             cursor.execute("DELETE FROM events WHERE id=?", (event_id,))
             conn.commit()
             return cursor.rowcount > 0
         finally:
-            if conn:
-                conn.close()
+            self._release(conn)
 
-    def get_events_by_camera(self, camera_id: int) -> list[Event]:
-        """Retorna todos los eventos asociados a una cámara"""
+    def get_events_by_camera(self, camera_id: int, limit: int = None) -> list[Event]:
+        """Retorna los eventos asociados a una cámara (los `limit` más recientes si se indica)"""
+        conn = self._get_connection()
         try:
-            conn = self._get_connection()
             cursor = conn.cursor()
+            # Un evento por fecha/hora (el de menor id). SQLite toma las demás
+            # columnas de la fila con MIN(id); el recorrido usa idx_events_camera_ts_id.
             cursor.execute(
                 """
-            SELECT id, camera_id, timestamp, description, image_path
-            FROM events e1
+            SELECT MIN(id), camera_id, timestamp, description, image_path
+            FROM events
             WHERE camera_id = ?
-            AND timestamp = (
-                SELECT MIN(timestamp) 
-                FROM events e2 
-                WHERE e2.timestamp = e1.timestamp AND e2.camera_id = e1.camera_id
-            )
+            GROUP BY timestamp
             ORDER BY timestamp DESC
+            LIMIT ?
             """,
-                (camera_id,)   
+                (camera_id, -1 if limit is None else limit)
             )
             
             rows = cursor.fetchall()
@@ -229,13 +352,136 @@ class Database:
             ]
             return events
         finally:
-            if conn:
-                conn.close()
+            self._release(conn)
+
+    def get_events_since(self, camera_id: int, last_id: int = 0, limit: int = 500) -> list[Event]:
+        """Eventos de una cámara con id mayor a `last_id`, del más viejo al más nuevo."""
+        # "+camera_id" evita el índice por cámara: así SQLite recorre solo el rango
+        # de ids nuevos en lugar de todo el historial de la cámara.
+        conn = self._get_connection()
+        try:
+            cursor = conn.cursor()
+            cursor.execute(
+                """
+            SELECT id, camera_id, timestamp, description, image_path
+            FROM events
+            WHERE id > ? AND +camera_id = ?
+            ORDER BY id
+            LIMIT ?
+            """,
+                (last_id, camera_id, limit)
+            )
+            return [
+                Event(
+                    id=row[0],
+                    camera_id=row[1],
+                    timestamp=row[2],
+                    description=row[3],
+                    image_path=row[4]
+                )
+                for row in cursor.fetchall()
+            ]
+        finally:
+            self._release(conn)
+
+    def get_events_page(self, camera_id: int = None, before: tuple = None, after: tuple = None, limit: int = 200) -> list[Event]:
+        """
+        Página de eventos ordenada de más nuevo a más viejo (timestamp, id).
+        Paginación por llave: `before=(timestamp, id)` devuelve los eventos que
+        siguen a esa fila (más viejos); `after=(timestamp, id)` los que la
+        preceden (más nuevos). Sin cursor devuelve la primera página.
+        camera_id=None incluye todas las cámaras. Un evento por cámara y
+        fecha/hora, como get_events_by_camera.
+        """
+        conditions, params = [FIRST_OF_TIMESTAMP], []
+        if camera_id is not None:
+            conditions.append("camera_id = ?")
+            params.append(camera_id)
+        if before is not None:
+            conditions.append("(timestamp, id) < (?, ?)")
+            params.extend(before)
+        elif after is not None:
+            conditions.append("(timestamp, id) > (?, ?)")
+            params.extend(after)
+
+        # Hacia eventos más nuevos se recorre al revés y luego se invierte
+        order = "ASC" if after is not None and before is None else "DESC"
+        where = f"WHERE {' AND '.join(conditions)}"
+        conn = self._get_connection()
+        try:
+            cursor = conn.cursor()
+            cursor.execute(
+                f"""
+            SELECT id, camera_id, timestamp, description, image_path
+            FROM events
+            {where}
+            ORDER BY timestamp {order}, id {order}
+            LIMIT ?
+            """,
+                (*params, limit)
+            )
+            rows = cursor.fetchall()
+            if order == "ASC":
+                rows.reverse()
+            return [
+                Event(
+                    id=row[0],
+                    camera_id=row[1],
+                    timestamp=row[2],
+                    description=row[3],
+                    image_path=row[4]
+                )
+                for row in rows
+            ]
+        finally:
+            self._release(conn)
+
+    def iter_events(self, camera_id: int = None, batch: int = 1000):
+        """
+        Recorre los eventos (más nuevo a más viejo) como tuplas
+        (id, camera_id, timestamp, description) leyendo del cursor por bloques.
+        Pensado para reportes: nunca carga la tabla completa en memoria.
+        Un evento por cámara y fecha/hora, como get_events_by_camera.
+        """
+        conn = self._get_connection()
+        try:
+            cursor = conn.cursor()
+            if camera_id is None:
+                cursor.execute(
+                    f"SELECT id, camera_id, timestamp, description FROM events WHERE {FIRST_OF_TIMESTAMP} "
+                    "ORDER BY timestamp DESC, id DESC"
+                )
+            else:
+                cursor.execute(
+                    f"SELECT id, camera_id, timestamp, description FROM events WHERE camera_id = ? AND {FIRST_OF_TIMESTAMP} "
+                    "ORDER BY timestamp DESC, id DESC",
+                    (camera_id,)
+                )
+            while True:
+                rows = cursor.fetchmany(batch)
+                if not rows:
+                    break
+                yield from rows
+        finally:
+            self._release(conn)
+
+    def count_events(self, camera_id: int = None) -> int:
+        """Cantidad de eventos (de una cámara o de todas)."""
+        conn = self._get_connection()
+        try:
+            cursor = conn.cursor()
+            if camera_id is None:
+                cursor.execute(f"SELECT COUNT(*) FROM events WHERE {FIRST_OF_TIMESTAMP}")
+            else:
+                cursor.execute(f"SELECT COUNT(*) FROM events WHERE camera_id = ? AND {FIRST_OF_TIMESTAMP}", (camera_id,))
+            return cursor.fetchone()[0]
+        finally:
+            self._release(conn)
 
     def get_event_by_id(self, event_id: int) -> Event | None:
         """Obtiene un evento por su ID"""
+        conn = self._get_connection()
         try:
-            conn = self._get_connection()
             cursor = conn.cursor()
             cursor.execute(
                 "SELECT id, camera_id, timestamp, description, image_path FROM events WHERE id=?",
@@ -252,5 +498,4 @@ class Database:
                 )
             return None
         finally:
-            if conn:
-                conn.close()
+            self._release(conn)
@@ -0,0 +1,104 @@
+import json
+import os
+from urllib.error import HTTPError
+from urllib.parse import urlencode
+from urllib.request import Request, urlopen
+from models.camera import Camera
+from models.event import Event
+
+class RemoteDatabase:
+    """
+    Cliente de la API del servicio de detección con los mismos métodos que
+    Database usa la ventana de cámaras. Las imágenes de los eventos se
+    descargan a `cache_dir` y image_path apunta a la copia local.
+    """
+    def __init__(self, url: str, cache_dir: str, token: str = "", timeout: float = 5.0):
+        self.url = url.rstrip("/")
+        self.cache_dir = cache_dir
+        self.token = token
+        self.timeout = timeout
+        os.makedirs(cache_dir, exist_ok=True)
+
+    def _request(self, method: str, path: str, data=None, query: dict = None):
+        url = f"{self.url}{path}"
+        if query:
+            url += "?" + urlencode(query)
+        body = json.dumps(data).encode("utf-8") if data is not None else None
+        request = Request(url, data=body, method=method)
+        if body is not None:
+            request.add_header("Content-Type", "application/json")
+        if self.token:
+            request.add_header("X-Token", self.token)
+        return urlopen(request, timeout=self.timeout)
+
+    def _json(self, method: str, path: str, data=None, query: dict = None):
+        try:
+            with self._request(method, path, data, query) as response:
+                return json.loads(response.read())
+        except HTTPError as e:
+            try:
+                message = json.loads(e.read()).get("error", e.reason)
+            except ValueError:
+                message = e.reason
+            raise RuntimeError(f"Servicio: {message} ({e.code})") from None
+
+    def close(self):
+        pass
+
+    # --- Cámaras ---
+
+    def get_all_cameras(self) -> list[Camera]:
+        return [Camera.from_dict(data) for data in self._json("GET", "/api/cameras")]
+
+    def add_camera(self, camera: Camera) -> int:
+        return self._json("POST", "/api/cameras", camera.return_dict())["id"]
+
+    def update_camera(self, camera: Camera):
+        self._json("PUT", f"/api/cameras/{camera.id}", camera.return_dict())
+
+    def delete_camera(self, camera_id: int) -> bool:
+        self._json("DELETE", f"/api/cameras/{camera_id}")
+        return True
+
+    def get_preview(self, camera_id: int, width: int = 960, raw: bool = False) -> tuple:
+        """(JPEG, estado, reconexiones) del último frame; JPEG None si aún no hay frame."""
+        query = {"width": width, "raw": int(raw)}
+        try:
+            with self._request("GET", f"/api/cameras/{camera_id}/preview.jpg", query=query) as response:
+                return (response.read(), response.headers.get("X-Camera-State") or None,
+                        int(response.headers.get("X-Reconnects") or 0))
+        except HTTPError as e:
+            if e.code == 404:
+                return None, None, 0
+            raise
+
+    # --- Eventos ---
+
+    def get_events_by_camera(self, camera_id: int, limit: int = None) -> list[Event]:
+        query = {"limit": -1 if limit is None else limit}
+        return [Event(**data) for data in self._json("GET", f"/api/cameras/{camera_id}/events", query=query)]
+
+    def get_events_since(self, camera_id: int, last_id: int = 0, limit: int = 500) -> list[Event]:
+        query = {"after": last_id, "limit": limit}
+        return [Event(**data) for data in self._json("GET", f"/api/cameras/{camera_id}/events", query=query)]
+
+    def get_event_by_id(self, event_id: int) -> Event | None:
+        try:
+            event = Event(**self._json("GET", f"/api/events/{event_id}"))
+        except RuntimeError:
+            return None
+        path = os.path.join(self.cache_dir, f"evento_{event_id}.jpg")
+        if not os.path.exists(path):
+            try:
+                with self._request("GET", f"/api/events/{event_id}/image") as response:
+                    data = response.read()
+                with open(path, "wb") as f:
+                    f.write(data)
+            except (HTTPError, OSError) as e:
+                print(f"[REMOTO] No se pudo descargar la imagen del evento {event_id}: {e}")
+                path = None
+        event.image_path = path
+        return event
+
+    def get_stats(self) -> dict:
+        return self._json("GET", "/api/stats")
@@ -0,0 +1,106 @@
+import json
+import os
+import threading
+from functions.functions import get_storage_path
+
+# Valores por defecto. Se pueden sobreescribir con un archivo config.json
+# dentro de la carpeta de datos (Documentos/SistemaVigilancia).
+DEFAULTS = {
+    # --- Inferencia por lotes ---
+    "batch_size": 8,            # Máximo de frames por lote
+    "batch_deadline_ms": 40,    # Tiempo máximo de espera para completar un lote
+    "stats_interval_s": 30,     # Cada cuánto se imprimen métricas de inferencia
+    "inference_backend": "thread",  # "thread" (un planificador) o "process" (procesos workers)
+    "process_workers": 2,       # Procesos de inferencia en modo "process"
+    "detection_workers": 8,     # Hilos fijos para el monitoreo de todas las cámaras
+    # --- Detector ---
+    "detector_mode": "dual",    # "dual" (dos modelos) o "fused" (un modelo con ambas clases)
+    "person_model": "yolov8n.pt",
+    "forklift_model": "models/best.pt",
+    "fused_model": "models/fused.pt",
+    "inference_runtime": "torch",   # "torch", "onnx" u "openvino" (se exporta una vez junto al .pt)
+    "warmup_runs": 2,           # Pasadas en vacío al cargar los modelos
+    # --- Frecuencia de análisis adaptativa ---
+    "analysis_floor_hz": 0.2,   # Mínimo por cámara con la escena quieta
+    "analysis_ceiling_hz": 2.0, # Máximo por cámara con actividad
+    "inference_budget_hz": 10.0,# Presupuesto global (inferencias/s entre todas las cámaras)
+    "activity_hold_s": 10,      # Segundos a ritmo alto tras la última detección
+    "live_floor_hz": 1.0,       # Vista en vivo: mínimo para que las cajas no queden viejas
+    "live_ceiling_hz": 3.0,
+    # --- Filtro de movimiento ---
+    "motion_threshold": 0.003,  # Proporción mínima de píxeles cambiados para inferir
+    "motion_thresholds": {},    # Umbral por cámara: {"Nombre cámara": 0.01}
+    "motion_force_interval_s": 15,  # Analizar de todas formas cada N segundos
+    # --- Zonas de interés (ROI) ---
+    "roi_tile_aspect": 2.0,     # Ancho/alto máximo por mosaico; zonas más anchas se dividen (0 = sin mosaicos)
+    "roi_tile_overlap": 0.15,   # Solape entre mosaicos vecinos
+    # --- Proximidad (fracción del ancho del frame) ---
+    "proximity_live": 0.094,        # Antes 120 px sobre 1280 px
+    "proximity_background": 0.07,   # Antes 45 px sobre 640 px
+    # --- Seguimiento (tracks) ---
+    "track_forklift_conf": 0.55,    # Confianza para crear tracks de montacargas (menor = solo continúa)
+    "track_max_age_s": 3.0,     # Segundos sin verse antes de olvidar un track
+    "track_min_hits": 1,        # Detecciones necesarias para confirmar un track
+    "incident_gap_s": 5.0,      # Un par debe separarse este tiempo para contar como incidente nuevo
+    "event_min_interval_s": 1.0,    # Separación mínima entre eventos de una misma cámara
+    # --- Escritura de eventos ---
+    "event_queue_size": 100,    # Eventos pendientes máximos antes de aplicar la política
+    "event_queue_policy": "drop_oldest",  # "drop_oldest", "drop_newest" o "block"
+    "event_batch_size": 20,     # Eventos por transacción
+    # --- Lista de eventos ---
+    "events_initial_limit": 500,    # Eventos recientes al seleccionar una cámara
+    "events_poll_s": 0,             # Sondeo incremental; 0 = solo los que empuja el EventSink
+    # --- Vista en vivo ---
+    "display_fps": 15,          # Frecuencia a la que Tk pinta el último frame disponible
+    # --- Captura ---
+    "capture_mode": "latest",   # "latest" (buffer de 1 frame) o "ring"
+    "capture_buffer": 4,        # Tamaño del buffer circular en modo "ring"
+    "decode_threads": 2,        # Hilos de FFmpeg por stream
+    "hw_decode": "auto",        # "auto", "vaapi" o "none" (si falla se usa software)
+    "rtsp_transport": "tcp",
+    "open_timeout_ms": 3000,    # Tiempo máximo para abrir un stream RTSP
+    "read_timeout_ms": 3000,    # Tiempo máximo esperando un frame antes de reconectar
+    # --- Salud de las cámaras ---
+    "reconnect_base_s": 1.0,    # Primera espera tras un fallo; se duplica en cada fallo seguido
+    "reconnect_max_s": 60.0,    # Espera máxima entre intentos
+    "offline_after_failures": 3,    # Fallos seguidos para marcar la cámara sin conexión
+    "degraded_after_s": 5.0,    # Conectada pero sin frames por más de N s = degradada
+    "probe_timeout_s": 1.0,     # Sondeo TCP al puerto RTSP antes de abrir con FFmpeg
+    "keyframes_when_idle_s": 2.0,   # Con análisis cada >= N s el detector acepta solo keyframes (0 = nunca)
+    # --- Servicio sin interfaz (python -m service) ---
+    "service_url": "",          # Si se indica (p. ej. "http://127.0.0.1:8765") la UI solo es cliente del servicio
+    "service_host": "127.0.0.1",
+    "service_port": 8765,
+    "service_token": "",        # Si se indica, la API exige el encabezado X-Token
+    "remote_preview_fps": 5,    # Vista en vivo en modo cliente (JPEG por HTTP)
+    # --- Tablero web de eventos en vivo (WebSocket) ---
+    "ws_port": 0,               # Puerto del tablero (0 = desactivado); usa service_token si se indica
+    "ws_host": "127.0.0.1",
+    "ws_history": 50,           # Eventos recientes que recibe cada visor al conectar
+}
+
+_config = None
+_lock = threading.Lock()
+
+def get_config_path() -> str:
+    return os.path.join(get_storage_path(), "config.json")
+
+def load_config(path: str = None) -> dict:
+    """Lee config.json (si existe) y lo combina con los valores por defecto."""
+    config = dict(DEFAULTS)
+    path = path or get_config_path()
+    if os.path.exists(path):
+        try:
+            with open(path, "r", encoding="utf-8") as f:
+                config.update(json.load(f))
+        except (OSError, ValueError) as e:
+            print(f"[CONFIG] No se pudo leer {path}: {e}")
+    return config
+
+def get_config() -> dict:
+    """Devuelve la configuración cargada una sola vez por proceso."""
+    global _config
+    with _lock:
+        if _config is None:
+            _config = load_config()
+        return _config
@@ -1,16 +1,29 @@
 import os, subprocess
-from tkinter import Tk
 
 def cls():
     os.system("cls") if os.name == "nt" else os.system("clear")
 
-def center_screen(tk:Tk, width:int, height:int):
+def center_screen(tk:"Tk", width:int, height:int):
     screen_width = tk.winfo_screenwidth()
     screen_height = tk.winfo_screenheight()
     w_pos = int(screen_width/2 - width/2)
     h_pos = int(screen_height/2 - height/2)
     return f"{width}x{height}+{w_pos}+{h_pos}"
 
+def get_storage_path():
+    '''
+    Retorna la ruta: C:/Users/Usuario/Documents/SistemaVigilancia
+    Crea la carpeta si no existe.
+    '''
+    # Obtiene la ruta a "Mis Documentos" de forma universal
+    user_docs = os.path.join(os.path.expanduser("~"), "Documents")
+    # Define el nombre de tu carpeta principal
+    app_folder = os.path.join(user_docs, "SistemaVigilancia")
+    # Crea la carpeta si no existe
+    if not os.path.exists(app_folder):
+        os.makedirs(app_folder)
+    return app_folder
+
 def download_dependences():    
     result = subprocess.run(
         ["pip", "install", "-r", "requirements.txt"],
@@ -0,0 +1,64 @@
+import numpy as np
+
+# Reglas de proximidad
+PERSON_FORKLIFT = "persona_montacargas"
+FORKLIFT_FORKLIFT = "montacargas_montacargas"
+
+class Violation:
+    """Par de cajas que rompe una regla. i, j son índices dentro de sus arreglos."""
+    __slots__ = ("rule", "i", "j", "distance")
+
+    def __init__(self, rule: str, i: int, j: int, distance: float):
+        self.rule = rule
+        self.i = i
+        self.j = j
+        self.distance = distance
+
+    def __repr__(self):
+        return f"Violation({self.rule}, {self.i}, {self.j}, {self.distance:.3f})"
+
+def _as_boxes(boxes) -> np.ndarray:
+    return np.asarray(boxes, dtype=np.float32).reshape(-1, 4)
+
+def center_distances(a, b) -> np.ndarray:
+    """Distancias entre todos los centros de `a` (N,4) y `b` (M,4) -> (N, M)."""
+    a, b = _as_boxes(a), _as_boxes(b)
+    ca = (a[:, :2] + a[:, 2:]) / 2
+    cb = (b[:, :2] + b[:, 2:]) / 2
+    return np.linalg.norm(ca[:, None, :] - cb[None, :, :], axis=-1)
+
+def edge_gaps(a, b) -> np.ndarray:
+    """Separación entre bordes de cajas (0 si se tocan o se enciman) -> (N, M)."""
+    a, b = _as_boxes(a), _as_boxes(b)
+    dx = np.maximum(0, np.maximum(a[:, None, 0], b[None, :, 0]) - np.minimum(a[:, None, 2], b[None, :, 2]))
+    dy = np.maximum(0, np.maximum(a[:, None, 1], b[None, :, 1]) - np.minimum(a[:, None, 3], b[None, :, 3]))
+    return np.hypot(dx, dy)
+
+def check_proximity(persons, forklifts, frame_width: float, person_forklift: float,
+                    forklift_forklift: float = None, metric: str = "center") -> list[Violation]:
+    """
+    Revisa todas las reglas de una sola vez sobre los arreglos de cajas.
+    Los umbrales están en coordenadas normalizadas (fracción del ancho del
+    frame), así no dependen de la resolución: 0.07 equivale a 45 px en 640 px.
+    """
+    if forklift_forklift is None:
+        forklift_forklift = person_forklift
+    distance_fn = edge_gaps if metric == "gap" else center_distances
+    scale = 1.0 / float(frame_width)
+
+    persons, forklifts = _as_boxes(persons), _as_boxes(forklifts)
+    violations = []
+
+    if len(persons) and len(forklifts):
+        dist = distance_fn(persons, forklifts) * scale
+        for i, j in np.argwhere(dist < person_forklift):
+            violations.append(Violation(PERSON_FORKLIFT, int(i), int(j), float(dist[i, j])))
+
+    if len(forklifts) > 1:
+        dist = distance_fn(forklifts, forklifts) * scale
+        # Solo la mitad superior de la matriz: cada par una vez y sin la diagonal
+        upper = np.triu(np.ones(dist.shape, dtype=bool), k=1)
+        for i, j in np.argwhere((dist < forklift_forklift) & upper):
+            violations.append(Violation(FORKLIFT_FORKLIFT, int(i), int(j), float(dist[i, j])))
+
+    return violations
@@ -0,0 +1,204 @@
+import html
+import os
+import tempfile
+import webbrowser
+from itertools import chain, islice
+
+# Exportadores en streaming: reciben un iterable de filas (tuplas) que viene
+# directo de un cursor de la base de datos y escriben el archivo por partes,
+# sin tener nunca la lista completa de eventos en memoria.
+
+SAMPLE_ROWS = 200  # Filas usadas para calcular anchos de columna
+
+def _sample(rows, size: int = SAMPLE_ROWS):
+    """Toma un prefijo de filas para medir anchos y devuelve (muestra, iterable completo)."""
+    rows = iter(rows)
+    head = list(islice(rows, size))
+    return head, chain(head, rows)
+
+def _column_lengths(headers: list, sample: list) -> list[int]:
+    lengths = [len(str(h)) for h in headers]
+    for row in sample:
+        for i, value in enumerate(row):
+            lengths[i] = max(lengths[i], len(str(value)) if value is not None else 0)
+    return lengths
+
+def _tick(progress, done: int):
+    if progress:
+        progress(done)
+
+def export_html(path: str, title: str, headers: list, rows, progress=None, chunk: int = 500) -> int:
+    """Escribe una tabla HTML por bloques de `chunk` filas. Devuelve las filas escritas."""
+    done = 0
+    with open(path, "w", encoding="utf-8") as f:
+        f.write(f"""
+        <html>
+        <head>
+            <meta charset="UTF-8">
+            <title>{html.escape(title)}</title>
+            <style>
+                table {{border-collapse: collapse; width: 90%; margin: 20px auto;}}
+                th, td {{border: 1px solid #000; padding: 8px; text-align: center;}}
+                th {{background-color: #f2f2f2;}}
+            </style>
+        </head>
+        <body>
+        <h2 style="text-align:center;">{html.escape(title)}</h2>
+        <table>
+            <tr>{"".join(f"<th>{html.escape(str(h))}</th>" for h in headers)}</tr>
+        """)
+        buffer = []
+        for row in rows:
+            buffer.append("<tr>" + "".join(f"<td>{html.escape(str(v))}</td>" for v in row) + "</tr>")
+            if len(buffer) >= chunk:
+                f.write("\n".join(buffer))
+                done += len(buffer)
+                buffer.clear()
+                _tick(progress, done)
+        f.write("\n".join(buffer))
+        done += len(buffer)
+        f.write("</table></body></html>")
+    _tick(progress, done)
+    return done
+
+def export_excel(path: str, title: str, headers: list, rows, progress=None, chunk: int = 500) -> int:
+    """Excel en modo write-only: las filas se escriben y se liberan al momento."""
+    import openpyxl
+    from openpyxl.utils import get_column_letter
+
+    wb = openpyxl.Workbook(write_only=True)
+    ws = wb.create_sheet(title=title[:31])  # Excel limita el nombre de hoja a 31 caracteres
+
+    # En write-only los anchos deben fijarse antes de la primera fila
+    sample, rows = _sample(rows)
+    for i, length in enumerate(_column_lengths(headers, sample), start=1):
+        ws.column_dimensions[get_column_letter(i)].width = min(length, 80) + 2
+
+    ws.append(headers)
+    done = 0
+    for row in rows:
+        ws.append(list(row))
+        done += 1
+        if done % chunk == 0:
+            _tick(progress, done)
+    wb.save(path)
+    _tick(progress, done)
+    return done
+
+def export_word(path: str, title: str, headers: list, rows, progress=None, chunk: int = 500) -> int:
+    """
+    Documento Word. python-docx no escribe en streaming, así que el documento
+    crece en memoria, pero las filas se consumen del cursor una por una.
+    """
+    from docx import Document
+
+    doc = Document()
+    doc.add_heading(title, level=1)
+    table = doc.add_table(rows=1, cols=len(headers))
+    table.style = 'Table Grid'
+
+    hdr_cells = table.rows[0].cells
+    for i, h in enumerate(headers):
+        hdr_cells[i].text = str(h)
+
+    done = 0
+    for row in rows:
+        row_cells = table.add_row().cells
+        for i, value in enumerate(row):
+            row_cells[i].text = str(value)
+        done += 1
+        if done % chunk == 0:
+            _tick(progress, done)
+    doc.save(path)
+    _tick(progress, done)
+    return done
+
+def _pdf_font() -> str:
+    """Fuente Unicode si existe (Windows), si no Helvetica."""
+    from reportlab.pdfbase import pdfmetrics
+    from reportlab.pdfbase.ttfonts import TTFont
+    for name, file in (("DejaVu", "C:\\Windows\\Fonts\\DejaVuSans.ttf"), ("Arial", "C:\\Windows\\Fonts\\arial.ttf")):
+        try:
+            pdfmetrics.registerFont(TTFont(name, file))
+            return name
+        except Exception:
+            continue
+    return "Helvetica"
+
+def export_pdf(path: str, title: str, headers: list, rows, progress=None, max_chars: int = 60) -> int:
+    """PDF armado página por página: una tabla (flowable) por página, dibujada y liberada."""
+    from reportlab.lib import colors
+    from reportlab.lib.pagesizes import letter
+    from reportlab.pdfgen import canvas
+    from reportlab.platypus import Table, TableStyle
+
+    font = _pdf_font()
+    c = canvas.Canvas(path, pagesize=letter)
+    width, height = letter
+    margin, row_height = 40, 15
+    available = width - 2 * margin
+
+    # Anchos proporcionales al contenido de las primeras filas
+    sample, rows = _sample(rows)
+    lengths = [min(l, max_chars) for l in _column_lengths(headers, sample)]
+    col_widths = [available * l / sum(lengths) for l in lengths]
+
+    style = TableStyle([
+        ("FONTNAME", (0, 0), (-1, -1), font),
+        ("FONTSIZE", (0, 0), (-1, -1), 9),
+        ("GRID", (0, 0), (-1, -1), 0.5, colors.grey),
+        ("BACKGROUND", (0, 0), (-1, 0), colors.lightgrey),
+    ])
+
+    def draw_page(page_rows, first: bool):
+        top = height - margin
+        if first:
+            c.setFont(font, 14)
+            c.drawCentredString(width / 2, top - 10, title)
+            top -= 35
+        table = Table([headers] + page_rows, colWidths=col_widths, rowHeights=row_height)
+        table.setStyle(style)
+        _, h = table.wrapOn(c, available, top - margin)
+        table.drawOn(c, margin, top - h)
+        c.showPage()
+
+    rows_first = int((height - 2 * margin - 35) / row_height) - 1
+    rows_other = int((height - 2 * margin) / row_height) - 1
+
+    done, page, first = 0, [], True
+    for row in rows:
+        page.append([str(v)[:max_chars] for v in row])
+        if len(page) >= (rows_first if first else rows_other):
+            draw_page(page, first)
+            done += len(page)
+            page, first = [], False
+            _tick(progress, done)
+    if page or first:
+        draw_page(page, first)
+        done += len(page)
+    c.save()
+    _tick(progress, done)
+    return done
+
+EXPORTERS = {
+    "html": (export_html, ".html"),
+    "pdf": (export_pdf, ".pdf"),
+    "excel": (export_excel, ".xlsx"),
+    "word": (export_word, ".docx"),
+}
+
+def export_report(fmt: str, title: str, headers: list, rows, progress=None) -> str:
+    """Exporta a un archivo temporal en el formato pedido y devuelve su ruta."""
+    exporter, suffix = EXPORTERS[fmt]
+    temp_file = tempfile.NamedTemporaryFile(delete=False, suffix=suffix)
+    temp_file.close()  # cerramos para que el exportador pueda escribirlo
+    exporter(temp_file.name, title, headers, rows, progress=progress)
+    return temp_file.name
+
+def open_report(path: str):
+    """Abre el archivo con el visor predeterminado del sistema."""
+    try:
+        os.startfile(path)
+    except Exception:
+        # En caso de que os.startfile falle (Linux/mac), usar webbrowser
+        webbrowser.open(f"file://{path}")
@@ -1,9 +1,13 @@
+from multiprocessing import freeze_support
 from functions.functions import cls
 from ui.winMain import WinMain
 
 class Main:
-    WinMain()
-
-cls()
-Main()
+    def __init__(self):
+        WinMain()
 
+# Protección necesaria para los procesos de inferencia (spawn en Windows / PyInstaller)
+if __name__ == "__main__":
+    freeze_support()
+    cls()
+    Main()
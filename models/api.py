@@ -0,0 +1,207 @@
+import json
+import os
+import re
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import urlparse, parse_qs
+from models.camera import Camera
+
+# API HTTP (JSON) del servicio de detección. Rutas:
+#   GET    /api/cameras                      cámaras con estado y frecuencias
+#   POST   /api/cameras                      alta (cuerpo: Camera.return_dict)
+#   PUT    /api/cameras/<id>                 cambio (incluye zonas)
+#   DELETE /api/cameras/<id>
+#   GET    /api/cameras/<id>/events?limit=N  recientes (nuevo -> viejo)
+#   GET    /api/cameras/<id>/events?after=ID nuevos desde ID (viejo -> nuevo)
+#   GET    /api/cameras/<id>/preview.jpg     último frame con zonas y tracks (?raw=1 sin ellos)
+#   GET    /api/events/<id>                  un evento
+#   GET    /api/events/<id>/image            JPEG del evento
+#   GET    /api/stats                        métricas del pipeline
+
+_ROUTES = [
+    ("GET", re.compile(r"^/api/cameras$"), "list_cameras"),
+    ("POST", re.compile(r"^/api/cameras$"), "add_camera"),
+    ("PUT", re.compile(r"^/api/cameras/(\d+)$"), "update_camera"),
+    ("DELETE", re.compile(r"^/api/cameras/(\d+)$"), "delete_camera"),
+    ("GET", re.compile(r"^/api/cameras/(\d+)/events$"), "camera_events"),
+    ("GET", re.compile(r"^/api/cameras/(\d+)/preview\.jpg$"), "preview"),
+    ("GET", re.compile(r"^/api/events/(\d+)$"), "get_event"),
+    ("GET", re.compile(r"^/api/events/(\d+)/image$"), "event_image"),
+    ("GET", re.compile(r"^/api/stats$"), "stats"),
+]
+
+class ApiError(Exception):
+    def __init__(self, status: int, message: str):
+        super().__init__(message)
+        self.status = status
+
+class ServiceApi:
+    """
+    Servidor HTTP con un hilo por petición sobre el pipeline y la base de
+    datos del servicio. Los cambios de cámaras se aplican a los monitores al
+    momento (pipeline.sync). Con `token` cada petición debe traer X-Token.
+    """
+    def __init__(self, pipeline, db, host: str = "127.0.0.1", port: int = 8765, token: str = ""):
+        self.pipeline = pipeline
+        self.db = db
+        self.token = token
+        self._cameras_lock = threading.Lock()
+        api = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"
+
+            def do_GET(self): api._handle(self, "GET")
+            def do_POST(self): api._handle(self, "POST")
+            def do_PUT(self): api._handle(self, "PUT")
+            def do_DELETE(self): api._handle(self, "DELETE")
+
+            def log_message(self, format, *args):
+                pass  # Las vistas previas se piden varias veces por segundo
+
+            def finish(self):
+                # Cada conexión HTTP corre en un hilo propio: al terminarla se
+                # cierra la conexión SQLite de ese hilo (se reutiliza entre las
+                # peticiones keep-alive de la misma conexión)
+                try:
+                    super().finish()
+                finally:
+                    api.db.release_thread()
+
+        self.server = ThreadingHTTPServer((host, port), Handler)
+        self.server.daemon_threads = True
+        self._thread = None
+
+    @property
+    def address(self) -> str:
+        host, port = self.server.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def start(self):
+        self._thread = threading.Thread(target=self.server.serve_forever, name="ServiceApi", daemon=True)
+        self._thread.start()
+        print(f"[API] Escuchando en {self.address}")
+
+    def stop(self):
+        self.server.shutdown()
+        self.server.server_close()
+
+    # --- Despacho ---
+
+    def _handle(self, request, method: str):
+        url = urlparse(request.path)
+        query = {k: v[-1] for k, v in parse_qs(url.query).items()}
+        try:
+            if self.token and request.headers.get("X-Token") != self.token:
+                raise ApiError(401, "token inválido")
+            for route_method, pattern, name in _ROUTES:
+                match = pattern.match(url.path)
+                if match and route_method == method:
+                    args = [int(g) for g in match.groups()]
+                    result = getattr(self, name)(request, query, *args)
+                    break
+            else:
+                raise ApiError(404, "ruta no encontrada")
+        except ApiError as e:
+            return self._send_json(request, {"error": str(e)}, e.status)
+        except (KeyError, ValueError) as e:
+            return self._send_json(request, {"error": f"petición inválida: {e}"}, 400)
+        except Exception as e:
+            print(f"[API] Error en {method} {url.path}: {e}")
+            return self._send_json(request, {"error": str(e)}, 500)
+
+        if isinstance(result, tuple):
+            body, content_type, headers = result
+            self._send(request, 200, body, content_type, headers)
+        else:
+            self._send_json(request, result)
+
+    @staticmethod
+    def _send(request, status: int, body: bytes, content_type: str, headers: dict = None):
+        request.send_response(status)
+        request.send_header("Content-Type", content_type)
+        request.send_header("Content-Length", str(len(body)))
+        request.send_header("Cache-Control", "no-store")
+        for key, value in (headers or {}).items():
+            request.send_header(key, value)
+        request.end_headers()
+        request.wfile.write(body)
+
+    def _send_json(self, request, data, status: int = 200):
+        body = json.dumps(data, ensure_ascii=False).encode("utf-8")
+        self._send(request, status, body, "application/json; charset=utf-8")
+
+    @staticmethod
+    def _read_json(request) -> dict:
+        length = int(request.headers.get("Content-Length") or 0)
+        return json.loads(request.rfile.read(length) or b"{}")
+
+    # --- Cámaras ---
+
+    def _sync(self):
+        self.pipeline.sync(self.db.get_all_cameras())
+
+    def list_cameras(self, request, query):
+        cameras = []
+        for cam in self.db.get_all_cameras():
+            data = cam.return_dict()
+            data["status"] = self.pipeline.camera_status(cam.id)
+            cameras.append(data)
+        return cameras
+
+    def add_camera(self, request, query):
+        camera = Camera.from_dict(self._read_json(request))
+        camera.id = None
+        with self._cameras_lock:
+            camera_id = self.db.add_camera(camera)
+            self._sync()
+        return {"id": camera_id}
+
+    def update_camera(self, request, query, camera_id):
+        camera = Camera.from_dict(self._read_json(request))
+        camera.id = camera_id
+        with self._cameras_lock:
+            self.db.update_camera(camera)
+            self._sync()
+        return {"id": camera_id}
+
+    def delete_camera(self, request, query, camera_id):
+        with self._cameras_lock:
+            if not self.db.delete_camera(camera_id):
+                raise ApiError(404, "cámara no encontrada")
+            self._sync()
+        return {"id": camera_id}
+
+    def preview(self, request, query, camera_id):
+        jpeg = self.pipeline.preview(camera_id, width=int(query.get("width", 960)), overlays=query.get("raw") != "1")
+        if jpeg is None:
+            raise ApiError(404, "sin frame todavía")
+        status = self.pipeline.camera_status(camera_id)
+        headers = {"X-Camera-State": status["state"] or "", "X-Reconnects": str(status["reconnects"])}
+        return jpeg, "image/jpeg", headers
+
+    # --- Eventos ---
+
+    def camera_events(self, request, query, camera_id):
+        limit = int(query.get("limit", 500))
+        if "after" in query:
+            events = self.db.get_events_since(camera_id, int(query["after"]), limit=limit)
+        else:
+            events = self.db.get_events_by_camera(camera_id, limit=limit)
+        return [ev.return_dict() for ev in events]
+
+    def get_event(self, request, query, event_id):
+        event = self.db.get_event_by_id(event_id)
+        if event is None:
+            raise ApiError(404, "evento no encontrado")
+        return event.return_dict()
+
+    def event_image(self, request, query, event_id):
+        event = self.db.get_event_by_id(event_id)
+        if event is None or not event.image_path or not os.path.exists(event.image_path):
+            raise ApiError(404, "imagen no encontrada")
+        with open(event.image_path, "rb") as f:
+            return f.read(), "image/jpeg", {}
+
+    def stats(self, request, query):
+        return self.pipeline.get_stats()
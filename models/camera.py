@@ -1,5 +1,8 @@
+import json
+
 class Camera:
-    def __init__(self, name:str, ip:str, username:str, password:str, port:int = 554, id:int = None, stream_path:str = ""):
+    def __init__(self, name:str, ip:str, username:str, password:str, port:int = 554, id:int = None, stream_path:str = "", roi:list = None,
+                 analysis_path:str = ""):
         self.id = id
         self.name = name
         self.ip = ip
@@ -7,17 +10,68 @@ class Camera:
         self.username = username
         self.password = password
         self.stream_path = stream_path
+        # Substream de baja resolución para el detector ("" = usa el stream principal)
+        self.analysis_path = analysis_path or ""
+        # Zonas de interés: lista de polígonos [[x, y], ...] normalizados (0-1)
+        # respecto al ancho/alto del frame. Vacía = se analiza todo el frame.
+        self.roi = roi or []
+
+    @staticmethod
+    def parse_roi(text) -> list:
+        """Convierte el JSON de la columna 'roi' en polígonos (ignora los inválidos)."""
+        if not text:
+            return []
+        try:
+            data = json.loads(text)
+            return [[[float(x), float(y)] for x, y in polygon] for polygon in data if len(polygon) >= 3]
+        except (TypeError, ValueError) as e:
+            print(f"[CAMARA] ROI inválido: {e}")
+            return []
+
+    def roi_json(self) -> str | None:
+        return json.dumps(self.roi) if self.roi else None
+
+    def return_dict(self) -> dict:
+        return {
+            "id": self.id,
+            "name": self.name,
+            "ip": self.ip,
+            "port": self.port,
+            "username": self.username,
+            "password": self.password,
+            "stream_path": self.stream_path,
+            "analysis_path": self.analysis_path,
+            "roi": self.roi
+        }
+
+    @classmethod
+    def from_dict(cls, data: dict) -> "Camera":
+        """Inverso de return_dict (API del servicio); ignora claves desconocidas."""
+        return cls(
+            id=data.get("id"),
+            name=data["name"],
+            ip=data["ip"],
+            username=data["username"],
+            password=data.get("password", ""),
+            port=int(data.get("port", 554)),
+            stream_path=data.get("stream_path") or "",
+            analysis_path=data.get("analysis_path") or "",
+            roi=Camera.parse_roi(json.dumps(data.get("roi") or []))
+        )
 
-    def get_rtsp_url(self) -> str:
+    def get_rtsp_url(self, profile: str = "main") -> str:
         """
         Construye la URL RTSP para la cámara.
+        profile: "main" (vista en vivo y capturas) o "analysis" (substream del detector).
         Nota: La ruta final puede variar según el fabricante (ej. /stream1, /cam/realmonitor, etc.).
         """
         # Si el nombre o IP es "demo", usar la webcam local
         if self.ip.lower() == "demo" or self.name.lower() == "cam demo":
             return 0
 
-        if self.stream_path == "":
+        if profile == "analysis" and self.analysis_path:
+            path = self.analysis_path
+        elif self.stream_path == "":
             path = "axis-media/media.amp?resolution=1280x720&videocodec=h264&fps=20"
         else:
             path = self.stream_path
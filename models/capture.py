@@ -0,0 +1,422 @@
+import os
+import threading
+import time
+from collections import deque
+import cv2
+from models.health import HealthManager
+
+# Perfiles de stream: "main" (vista en vivo y capturas) y "analysis" (detector,
+# substream de baja resolución si la cámara lo tiene configurado)
+MAIN = "main"
+ANALYSIS = "analysis"
+
+# OpenCV lee las opciones de FFmpeg de esta variable al abrir cada captura.
+# Es global al proceso: se fija y se abre bajo _ffmpeg_env.
+_FFMPEG_ENV = "OPENCV_FFMPEG_CAPTURE_OPTIONS"
+
+class _EnvGate:
+    """
+    Turnos para abrir capturas con la variable de opciones de FFmpeg. OpenCV
+    la lee dentro de VideoCapture(), así que debe mantenerse durante toda la
+    apertura. Las aperturas con las MISMAS opciones (el caso normal: todas
+    las cámaras comparten threads y rtsp_transport) corren en paralelo; solo
+    esperan las que piden otras (p. ej. skip_frame=nokey). Cada apertura está
+    acotada por CAP_PROP_OPEN_TIMEOUT_MSEC, así que la espera también.
+    """
+    def __init__(self):
+        self._cond = threading.Condition()
+        self._value = None
+        self._active = 0
+        self._waiting = 0
+        self._turn = 0              # Sube cada vez que empieza un grupo de opciones
+        self._previous = None
+
+    def acquire(self, value: str):
+        with self._cond:
+            # Con alguien esperando otras opciones, no se cuelan más del grupo actual
+            if self._active and (self._value != value or self._waiting):
+                turn = self._turn
+                self._waiting += 1
+                self._cond.wait_for(
+                    lambda: self._active == 0 or (self._value == value and self._turn != turn)
+                )
+                self._waiting -= 1
+            if self._active == 0:
+                self._turn += 1
+                self._value = value
+                self._previous = os.environ.get(_FFMPEG_ENV)
+                os.environ[_FFMPEG_ENV] = value
+                self._cond.notify_all()
+            self._active += 1
+
+    def release(self):
+        with self._cond:
+            self._active -= 1
+            if self._active == 0:
+                if self._previous is None:
+                    os.environ.pop(_FFMPEG_ENV, None)
+                else:
+                    os.environ[_FFMPEG_ENV] = self._previous
+                self._cond.notify_all()
+
+_ffmpeg_env = _EnvGate()
+
+_HW_NAMES = {0: "software", 1: "auto", 2: "d3d11", 3: "vaapi", 4: "mfx"}
+
+def get_source(camera, profile: str = MAIN):
+    """Fuente de video de la cámara: webcam local (0) o URL RTSP del perfil."""
+    if camera.ip.strip() == "0":
+        return 0
+    return camera.get_rtsp_url(profile)
+
+def open_capture(source, options: dict = None, hw: str = "none", open_timeout_ms: int = 0, read_timeout_ms: int = 0):
+    """
+    Abre una captura con el backend FFmpeg, sus opciones (p. ej. threads,
+    skip_frame) y aceleración por hardware si se pide ("auto" o "vaapi").
+    Si la aceleración no abre, se reintenta por software.
+    Devuelve (captura, nombre del decodificador usado).
+    """
+    if isinstance(source, int):
+        return cv2.VideoCapture(source), "software"
+
+    params = []
+    if open_timeout_ms and hasattr(cv2, "CAP_PROP_OPEN_TIMEOUT_MSEC"):
+        params += [cv2.CAP_PROP_OPEN_TIMEOUT_MSEC, int(open_timeout_ms)]
+    if read_timeout_ms and hasattr(cv2, "CAP_PROP_READ_TIMEOUT_MSEC"):
+        params += [cv2.CAP_PROP_READ_TIMEOUT_MSEC, int(read_timeout_ms)]
+    attempts = []
+    if hw != "none" and hasattr(cv2, "CAP_PROP_HW_ACCELERATION"):
+        accel = cv2.VIDEO_ACCELERATION_VAAPI if hw == "vaapi" else cv2.VIDEO_ACCELERATION_ANY
+        attempts.append(params + [cv2.CAP_PROP_HW_ACCELERATION, accel])
+    attempts.append(params)
+
+    option_str = "|".join(f"{k};{v}" for k, v in (options or {}).items())
+    _ffmpeg_env.acquire(option_str)
+    try:
+        for i, attempt in enumerate(attempts):
+            cap = cv2.VideoCapture(source, cv2.CAP_FFMPEG, attempt)
+            if cap.isOpened():
+                break
+            cap.release()
+            if i < len(attempts) - 1:
+                print(f"[CAPTURA] Aceleración '{hw}' no disponible, usando decodificación por software")
+    finally:
+        _ffmpeg_env.release()
+
+    decoder = "software"
+    if cap.isOpened() and hasattr(cv2, "CAP_PROP_HW_ACCELERATION"):
+        decoder = _HW_NAMES.get(int(cap.get(cv2.CAP_PROP_HW_ACCELERATION)), "hw")
+    return cap, decoder
+
+class FramePacket:
+    """Frame decodificado con su número de secuencia y hora de captura."""
+    __slots__ = ("seq", "timestamp", "frame")
+
+    def __init__(self, seq: int, timestamp: float, frame):
+        self.seq = seq
+        self.timestamp = timestamp
+        self.frame = frame
+
+class Subscription:
+    """
+    Lector de un CaptureStream. Cada suscriptor lleva su propia posición, así
+    varios consumidores (vista en vivo, detector, capturas) comparten el stream.
+    Los frames son compartidos: NO modificarlos en sitio (usar frame.copy()).
+    """
+    def __init__(self, stream: "CaptureStream", name: str):
+        self.stream = stream
+        self.name = name
+        self.last_seq = 0
+        self.closed = False
+        # El suscriptor acepta solo keyframes (p. ej. detector con la escena quieta)
+        self.keyframes_ok = False
+
+        # --- Métricas ---
+        self.reads = 0
+        self.dropped = 0        # Frames decodificados que este suscriptor nunca leyó
+        self.processed = 0      # Frames que llegaron a inferencia
+        self.age_sum = 0.0      # Suma de la edad del frame al momento de inferir
+        self.age_max = 0.0
+
+    def read(self, timeout: float = 5.0) -> FramePacket | None:
+        """Devuelve el siguiente frame que este suscriptor no ha leído (espera si no hay)."""
+        packet = self.stream.wait_next(self.last_seq, timeout)
+        if packet is not None:
+            if self.last_seq:
+                self.dropped += packet.seq - self.last_seq - 1
+            self.last_seq = packet.seq
+            self.reads += 1
+        return packet
+
+    def mark_processed(self, packet: FramePacket) -> float:
+        """Registra la edad del frame justo al entrar a inferencia. Devuelve la edad en segundos."""
+        age = max(0.0, time.time() - packet.timestamp)
+        self.processed += 1
+        self.age_sum += age
+        self.age_max = max(self.age_max, age)
+        return age
+
+    def get_stats(self) -> dict:
+        return {
+            "reads": self.reads,
+            "dropped": self.dropped,
+            "processed": self.processed,
+            "avg_age_ms": self.age_sum / self.processed * 1000 if self.processed else 0.0,
+            "max_age_ms": self.age_max * 1000,
+        }
+
+    def latest(self) -> FramePacket | None:
+        """Último frame disponible sin esperar (puede repetirse)."""
+        return self.stream.latest()
+
+    def close(self):
+        if not self.closed:
+            self.closed = True
+            self.stream.hub._detach(self)
+
+class CaptureStream:
+    """
+    Un hilo decodificador por cámara que vacía el stream continuamente y publica
+    en un buffer circular. Con buffer_size=1 (modo "latest") solo se guarda el
+    frame más nuevo: el detector siempre toma el frame fresco cuando está libre
+    y los intermedios se descartan sin acumularse en el buffer RTSP.
+
+    Si todos los suscriptores aceptan solo keyframes durante `keyframe_hold`
+    segundos, el stream se reabre con skip_frame=nokey (FFmpeg no decodifica
+    los frames intermedios); vuelve a decodificar todo en cuanto alguien lo pide.
+    """
+    def __init__(self, hub: "CaptureHub", key, name: str, source, buffer_size: int = 4, keyframe_hold: float = 30):
+        self.hub = hub
+        self.key = key
+        self.name = name
+        self.source = source
+        self.subscribers = set()
+        self.connected = False
+        self.decoder = "-"
+        self.keyframes_only = False
+        self.keyframe_hold = keyframe_hold
+        self._keyframes_since = None
+        self._cpu = 0.0             # Segundos de CPU del hilo decodificador
+
+        self._ring = deque(maxlen=max(1, buffer_size))
+        self._cond = threading.Condition()
+        self._seq = 0
+        self.decoded = 0
+        self._started_at = time.time()
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, name=f"Capture-{name}", daemon=True)
+
+    def start(self):
+        self._thread.start()
+
+    def stop(self, timeout: float = 2):
+        self._stop.set()
+        with self._cond:
+            self._cond.notify_all()
+        if self._thread.is_alive() and threading.current_thread() is not self._thread:
+            self._thread.join(timeout=timeout)
+
+    def latest(self) -> FramePacket | None:
+        with self._cond:
+            return self._ring[-1] if self._ring else None
+
+    def wait_next(self, after_seq: int, timeout: float) -> FramePacket | None:
+        """
+        Frame más viejo del buffer posterior a `after_seq` (espera si no hay).
+        En modo "ring" un suscriptor lento recorre el buffer en orden y solo
+        pierde lo que el buffer ya descartó; en modo "latest" es el más nuevo.
+        """
+        deadline = time.monotonic() + timeout
+        with self._cond:
+            while not self._stop.is_set():
+                if self._ring and self._ring[-1].seq > after_seq:
+                    for packet in self._ring:
+                        if packet.seq > after_seq:
+                            return packet
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    return None
+                self._cond.wait(remaining)
+        return None
+
+    def _publish(self, frame):
+        with self._cond:
+            self._seq += 1
+            self.decoded += 1
+            self._ring.append(FramePacket(self._seq, time.time(), frame))
+            self._cond.notify_all()
+
+    def get_stats(self) -> dict:
+        elapsed = max(1e-6, time.time() - self._started_at)
+        with self.hub._lock:
+            subscribers = list(self.subscribers)
+        return {
+            "connected": self.connected,
+            "decoded": self.decoded,
+            "decode_fps": self.decoded / elapsed,
+            # CPU del hilo lector en % de un núcleo. Con decode_threads > 1 los
+            # hilos internos de FFmpeg no se cuentan aquí.
+            "decode_cpu_pct": self._cpu / elapsed * 100,
+            "decoder": self.decoder,
+            "keyframes_only": self.keyframes_only,
+            "subscribers": {s.name: s.get_stats() for s in subscribers},
+        }
+
+    def _wants_keyframes(self) -> bool:
+        """Modo keyframes con histéresis: todos los suscriptores deben aceptarlo `keyframe_hold` s."""
+        with self.hub._lock:
+            subscribers = list(self.subscribers)
+        if not self.hub.skip_idle or not subscribers or not all(s.keyframes_ok for s in subscribers):
+            self._keyframes_since = None
+            return False
+        if self._keyframes_since is None:
+            self._keyframes_since = time.monotonic()
+        return self.keyframes_only or time.monotonic() - self._keyframes_since >= self.keyframe_hold
+
+    def _open(self):
+        options = dict(self.hub.ffmpeg_options)
+        if self.keyframes_only:
+            options["skip_frame"] = "nokey"
+        cap, self.decoder = open_capture(self.source, options, self.hub.hw_decode,
+                                         self.hub.open_timeout_ms, self.hub.read_timeout_ms)
+        return cap
+
+    def _run(self):
+        cap = None
+        health = self.hub.health
+        print(f"[CAPTURA] Decodificador iniciado: {self.name}")
+        while not self._stop.is_set():
+            try:
+                wants = self._wants_keyframes()
+                if cap is not None and wants != self.keyframes_only and not isinstance(self.source, int):
+                    print(f"[CAPTURA] {self.name}: {'solo keyframes' if wants else 'todos los frames'}")
+                    self.keyframes_only = wants
+                    cap.release()
+                    cap = None
+
+                if cap is None or not cap.isOpened():
+                    # Espera exponencial con jitter y sondeo TCP antes de abrir con FFmpeg
+                    if not health.wait_turn(self.key, self.name, self.source, self._stop):
+                        break
+                    cap = self._open()
+                    if not cap.isOpened():
+                        self.connected = False
+                        health.failure(self.key, "no se pudo abrir el stream")
+                        continue
+                    self.connected = True
+                    health.connected(self.key)
+
+                cpu_start = time.thread_time()
+                ret, frame = cap.read()
+                self._cpu += time.thread_time() - cpu_start
+                if not ret:
+                    self.connected = False
+                    health.failure(self.key, "señal perdida")
+                    cap.release()
+                    cap = None
+                    continue
+                health.frame(self.key)
+                self._publish(frame)
+            except Exception as e:
+                print(f"[CAPTURA] Error en {self.name}: {e}")
+                health.failure(self.key, str(e))
+        if cap:
+            cap.release()
+        self.connected = False
+        print(f"[CAPTURA] Decodificador detenido: {self.name}")
+
+class CaptureHub:
+    """
+    Servicio de captura compartido: una sola sesión RTSP y un solo decodificador
+    por cámara, sin importar cuántos consumidores la lean. Cuando se va el último
+    suscriptor el stream se mantiene `linger` segundos por si alguien vuelve.
+    """
+    def __init__(self, buffer_size: int = 4, linger: float = 5.0, mode: str = "ring", decode_threads: int = 2,
+                 hw_decode: str = "auto", rtsp_transport: str = "tcp", skip_idle: bool = True,
+                 open_timeout_ms: int = 5000, read_timeout_ms: int = 5000, health: HealthManager = None):
+        # En modo "latest" el buffer es de un solo frame
+        self.buffer_size = 1 if mode == "latest" else buffer_size
+        self.linger = linger
+        self.hw_decode = hw_decode
+        self.skip_idle = skip_idle
+        self.open_timeout_ms = open_timeout_ms
+        self.read_timeout_ms = read_timeout_ms
+        self.health = health or HealthManager()
+        self.ffmpeg_options = {"threads": int(decode_threads)}
+        if rtsp_transport:
+            self.ffmpeg_options["rtsp_transport"] = rtsp_transport
+        self._streams = {}
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def stream_key(camera, profile: str = MAIN):
+        """Clave del decodificador; sin substream configurado el análisis comparte el principal."""
+        camera_key = camera.id if camera.id is not None else camera.name
+        if profile == ANALYSIS and not getattr(camera, "analysis_path", ""):
+            profile = MAIN
+        return camera_key if profile == MAIN else (camera_key, profile)
+
+    def subscribe(self, camera, name: str = "", profile: str = MAIN) -> Subscription:
+        key = self.stream_key(camera, profile)
+        with self._lock:
+            stream = self._streams.get(key)
+            if stream is None:
+                label = camera.name if isinstance(key, (int, str)) else f"{camera.name} ({profile})"
+                stream = CaptureStream(self, key, label, get_source(camera, profile), self.buffer_size)
+                self._streams[key] = stream
+                stream.start()
+            subscription = Subscription(stream, name)
+            stream.subscribers.add(subscription)
+        return subscription
+
+    def _detach(self, subscription: Subscription):
+        stream = subscription.stream
+        with self._lock:
+            stream.subscribers.discard(subscription)
+            if stream.subscribers:
+                return
+        # Esperar un poco antes de cerrar la sesión RTSP
+        timer = threading.Timer(self.linger, self._close_if_idle, args=(stream,))
+        timer.daemon = True
+        timer.start()
+
+    def _close_if_idle(self, stream: CaptureStream):
+        with self._lock:
+            if stream.subscribers or self._streams.get(stream.key) is not stream:
+                return
+            del self._streams[stream.key]
+        stream.stop()
+
+    def latest(self, camera_id, profile: str = MAIN) -> FramePacket | None:
+        """Último frame de una cámara en el perfil pedido, solo si ese stream ya está abierto."""
+        key = camera_id if profile == MAIN else (camera_id, profile)
+        with self._lock:
+            stream = self._streams.get(key)
+        return stream.latest() if stream else None
+
+    def get_stats(self) -> dict:
+        """Métricas por cámara: frames decodificados, descartados y edad al inferir."""
+        with self._lock:
+            streams = list(self._streams.values())
+        return {stream.name: stream.get_stats() for stream in streams}
+
+    def print_stats(self):
+        for name, st in self.get_stats().items():
+            print(
+                f"[CAPTURA] {name}: decodificador={st['decoder']} cpu={st['decode_cpu_pct']:.0f}% "
+                f"{'solo keyframes' if st['keyframes_only'] else 'todos los frames'}"
+            )
+            for sub_name, sub in st["subscribers"].items():
+                print(
+                    f"[CAPTURA] {name}/{sub_name}: decodificados={st['decoded']} "
+                    f"({st['decode_fps']:.1f} fps) descartados={sub['dropped']} "
+                    f"inferidos={sub['processed']} edad_prom={sub['avg_age_ms']:.0f}ms "
+                    f"edad_max={sub['max_age_ms']:.0f}ms"
+                )
+
+    def stop_all(self):
+        with self._lock:
+            streams = list(self._streams.values())
+            self._streams.clear()
+        for stream in streams:
+            stream.stop()
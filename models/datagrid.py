@@ -8,6 +8,10 @@ class DataGrid:
         self.frame.pack()
 
         rows = int((height-20)/row_height)
+        self.visible_rows = rows
+
+        # Modo virtual (ver set_virtual_source)
+        self._virtual = None
 
         self.tvw = ttk.Treeview(self.frame, selectmode="browse", height=rows, show="headings")
         self.vsb = ttk.Scrollbar(self.frame, orient="vertical", command=self.tvw.yview)
@@ -37,6 +41,112 @@ class DataGrid:
     def clear(self):
         for row in self.tvw.get_children():
             self.tvw.delete(row)
+        if self._virtual:
+            self._virtual = None
+            self.tvw.configure(yscrollcommand=self.vsb.set)
+
+    # ---------------------------- MODO VIRTUAL ----------------------------
+
+    def set_virtual_source(self, fetch_page, to_values, page_size: int = None, max_pages: int = 3):
+        """
+        Desplazamiento virtual: solo se materializan `max_pages` páginas (lo
+        visible más un margen). Al acercarse al final se pide la siguiente
+        página y se descarta la primera; al volver arriba ocurre lo contrario.
+
+        fetch_page(record, direction, limit) -> list: registros que siguen a
+            `record` ("next") o que lo preceden ("prev"); record=None = primera página.
+        to_values(record) -> list: valores de la fila.
+        """
+        self.clear()
+        self._virtual = {
+            "fetch": fetch_page,
+            "to_values": to_values,
+            "page_size": page_size or max(50, self.visible_rows * 2),
+            "max_pages": max(2, max_pages),
+            "pages": [],         # [(registros, iids)]
+            "has_prev": False,
+            "has_next": True,
+            "busy": False,
+            "scheduled": False,
+        }
+        self.tvw.configure(yscrollcommand=self._on_virtual_scroll)
+        self._load_page("next")
+
+    def _on_virtual_scroll(self, first, last):
+        self.vsb.set(first, last)
+        v = self._virtual
+        if not v or v["busy"] or v["scheduled"]:
+            return
+        # Se revisa cuando Tk esté libre para no cargar varias veces por el mismo desplazamiento
+        v["scheduled"] = True
+        self.tvw.after_idle(self._check_virtual_scroll)
+
+    def _check_virtual_scroll(self):
+        v = self._virtual
+        if not v:
+            return
+        v["scheduled"] = False
+        first, last = self.tvw.yview()
+        if last >= 0.9 and v["has_next"]:
+            self._load_page("next")
+        elif first <= 0.1 and v["has_prev"]:
+            self._load_page("prev")
+
+    def _load_page(self, direction: str):
+        v = self._virtual
+        if not v or v["busy"]:
+            return
+        v["busy"] = True
+        try:
+            pages = v["pages"]
+            if direction == "next":
+                anchor = pages[-1][0][-1] if pages else None
+            else:
+                if not pages:
+                    return
+                anchor = pages[0][0][0]
+
+            records = v["fetch"](anchor, direction, v["page_size"])
+            if len(records) < v["page_size"]:
+                v["has_next" if direction == "next" else "has_prev"] = False
+            if not records:
+                return
+
+            total_before = len(self.tvw.get_children())
+            top_index = int(self.tvw.yview()[0] * total_before) if total_before else 0
+
+            if direction == "next":
+                iids = [self.tvw.insert("", "end", values=v["to_values"](r)) for r in records]
+                pages.append((records, iids))
+                if len(pages) > v["max_pages"]:
+                    _, dropped = pages.pop(0)
+                    self.tvw.delete(*dropped)
+                    v["has_prev"] = True
+                    top_index -= len(dropped)
+            else:
+                iids = [self.tvw.insert("", i, values=v["to_values"](r)) for i, r in enumerate(records)]
+                pages.insert(0, (records, iids))
+                top_index += len(iids)
+                if len(pages) > v["max_pages"]:
+                    _, dropped = pages.pop()
+                    self.tvw.delete(*dropped)
+                    v["has_next"] = True
+
+            # Mantener a la vista las mismas filas que antes de cargar/descartar
+            total_after = len(self.tvw.get_children())
+            if total_after and total_before:
+                self.tvw.yview_moveto(max(0, top_index) / total_after)
+        finally:
+            v["busy"] = False
+
+    def get_record(self, iid):
+        """Registro original de una fila en modo virtual (None si no está cargada)."""
+        if not self._virtual:
+            return None
+        for records, iids in self._virtual["pages"]:
+            if iid in iids:
+                return records[iids.index(iid)]
+        return None
 
     def select_row(self, index: int = -1, iid: str = None):
         rows = self.tvw.get_children()
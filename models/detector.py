@@ -0,0 +1,237 @@
+import os
+import numpy as np
+
+# Clases internas que usa el resto del sistema
+PERSON = 0
+FORKLIFT = 1
+
+# Nombres con los que puede venir cada clase en los modelos entrenados
+PERSON_NAMES = {"person", "persona", "people"}
+FORKLIFT_NAMES = {"forklift", "montacargas", "forklifts"}
+
+# Motores de ejecución: formato de exportación de ultralytics y sufijo del
+# artefacto, que se guarda junto al .pt (best.pt -> best.onnx / best_openvino_model)
+RUNTIMES = {
+    "torch": None,
+    "onnx": ("onnx", ".onnx"),
+    "openvino": ("openvino", "_openvino_model"),
+}
+
+class Detections:
+    """
+    Lista combinada de detecciones de un frame (personas y montacargas).
+    boxes: arreglo (N, 4) con x1, y1, x2, y2 | classes: (N,) PERSON/FORKLIFT | scores: (N,)
+    """
+    def __init__(self, boxes=None, classes=None, scores=None):
+        self.boxes = np.zeros((0, 4), dtype=np.float32) if boxes is None else np.asarray(boxes, dtype=np.float32).reshape(-1, 4)
+        self.classes = np.zeros((0,), dtype=np.int32) if classes is None else np.asarray(classes, dtype=np.int32)
+        self.scores = np.zeros((0,), dtype=np.float32) if scores is None else np.asarray(scores, dtype=np.float32)
+
+    def __len__(self):
+        return len(self.boxes)
+
+    @property
+    def persons(self) -> np.ndarray:
+        return self.boxes[self.classes == PERSON]
+
+    @property
+    def forklifts(self) -> np.ndarray:
+        return self.boxes[self.classes == FORKLIFT]
+
+    def filter(self, person_conf: float = 0.0, forklift_conf: float = 0.0) -> "Detections":
+        """Aplica un umbral de confianza distinto por clase."""
+        min_scores = np.where(self.classes == PERSON, person_conf, forklift_conf)
+        keep = self.scores >= min_scores
+        return Detections(self.boxes[keep], self.classes[keep], self.scores[keep])
+
+    def scaled(self, scale_x: float, scale_y: float) -> "Detections":
+        """Devuelve las cajas escaladas (p. ej. de frame_small a resolución real)."""
+        factor = np.array([scale_x, scale_y, scale_x, scale_y], dtype=np.float32)
+        return Detections(self.boxes * factor, self.classes, self.scores)
+
+    def translated(self, dx: float, dy: float) -> "Detections":
+        """Desplaza las cajas (p. ej. de coordenadas de un recorte al frame completo)."""
+        offset = np.array([dx, dy, dx, dy], dtype=np.float32)
+        return Detections(self.boxes + offset, self.classes, self.scores)
+
+    def nms(self, iou: float = 0.5) -> "Detections":
+        """Quita duplicados de la misma clase (p. ej. en la franja donde se solapan dos mosaicos)."""
+        if len(self) < 2:
+            return self
+        boxes = self.boxes
+        areas = (boxes[:, 2] - boxes[:, 0]) * (boxes[:, 3] - boxes[:, 1])
+        order = np.argsort(-self.scores)
+        keep = []
+        while order.size:
+            i, rest = order[0], order[1:]
+            keep.append(i)
+            xx1 = np.maximum(boxes[i, 0], boxes[rest, 0])
+            yy1 = np.maximum(boxes[i, 1], boxes[rest, 1])
+            xx2 = np.minimum(boxes[i, 2], boxes[rest, 2])
+            yy2 = np.minimum(boxes[i, 3], boxes[rest, 3])
+            inter = np.clip(xx2 - xx1, 0, None) * np.clip(yy2 - yy1, 0, None)
+            overlap = inter / (areas[i] + areas[rest] - inter + 1e-6)
+            order = rest[(overlap <= iou) | (self.classes[rest] != self.classes[i])]
+        keep = np.array(keep)
+        return Detections(boxes[keep], self.classes[keep], self.scores[keep])
+
+    @staticmethod
+    def concat(parts: list) -> "Detections":
+        parts = [p for p in parts if len(p)]
+        if not parts:
+            return Detections()
+        return Detections(
+            np.concatenate([p.boxes for p in parts]),
+            np.concatenate([p.classes for p in parts]),
+            np.concatenate([p.scores for p in parts])
+        )
+
+def _from_result(result, class_map: dict) -> Detections:
+    """Convierte un Results de ultralytics en Detections con una sola copia a CPU."""
+    boxes = result.boxes
+    if boxes is None or len(boxes) == 0:
+        return Detections()
+    xyxy = boxes.xyxy.cpu().numpy()
+    cls = boxes.cls.cpu().numpy().astype(np.int32)
+    conf = boxes.conf.cpu().numpy()
+
+    mapped = np.array([class_map.get(int(c), -1) for c in cls], dtype=np.int32)
+    keep = mapped >= 0
+    return Detections(xyxy[keep], mapped[keep], conf[keep])
+
+def _class_map(model, default: dict) -> dict:
+    """Relaciona los índices de clase del modelo con PERSON/FORKLIFT a partir de sus nombres."""
+    names = getattr(model, "names", None) or {}
+    mapping = {}
+    for idx, name in names.items():
+        name = str(name).lower()
+        if name in PERSON_NAMES:
+            mapping[int(idx)] = PERSON
+        elif name in FORKLIFT_NAMES:
+            mapping[int(idx)] = FORKLIFT
+    return mapping or dict(default)
+
+def exported_path(model_path: str, runtime: str) -> str:
+    """Ruta del modelo exportado para el motor indicado (o el .pt para 'torch')."""
+    if RUNTIMES.get(runtime) is None:
+        return model_path
+    _, suffix = RUNTIMES[runtime]
+    return os.path.splitext(model_path)[0] + suffix
+
+def ensure_exported(model_path: str, runtime: str, imgsz: int = 640) -> str:
+    """
+    Exporta el modelo una sola vez y reutiliza el artefacto en los siguientes
+    arranques. Se vuelve a exportar si el .pt es más nuevo que la exportación.
+    """
+    target = exported_path(model_path, runtime)
+    if target == model_path:
+        return model_path
+    if os.path.exists(target) and (
+        not os.path.exists(model_path) or os.path.getmtime(target) >= os.path.getmtime(model_path)
+    ):
+        return target
+
+    from ultralytics import YOLO
+    fmt, _ = RUNTIMES[runtime]
+    print(f"[DETECTOR] Exportando {model_path} a {runtime} (solo la primera vez)...")
+    # dynamic=True: el lote varía según cuántas cámaras junte el planificador
+    return str(YOLO(model_path).export(format=fmt, imgsz=imgsz, dynamic=True, half=False))
+
+def load_model(model_path: str, runtime: str = "torch"):
+    """Carga un YOLO con el motor pedido; si la exportación falla se usa PyTorch."""
+    from ultralytics import YOLO
+    if runtime not in RUNTIMES:
+        print(f"[DETECTOR] Motor desconocido '{runtime}'. Usando torch.")
+        runtime = "torch"
+    if runtime != "torch":
+        try:
+            return YOLO(ensure_exported(model_path, runtime), task="detect")
+        except Exception as e:
+            print(f"[DETECTOR] No se pudo usar {runtime} para {model_path}: {e}. Usando torch.")
+    return YOLO(model_path)
+
+def prepare_models(mode: str, person_model_path: str, forklift_model_path: str, fused_model_path: str = None,
+                   runtime: str = "torch", **_):
+    """
+    Exporta de antemano los modelos que usará create_detector con los mismos
+    argumentos, para que varios procesos no exporten el mismo archivo a la vez.
+    """
+    if RUNTIMES.get(runtime) is None:
+        return
+    if mode == "fused" and fused_model_path and os.path.exists(fused_model_path):
+        paths = [fused_model_path]
+    else:
+        paths = [person_model_path, forklift_model_path]
+    for path in paths:
+        try:
+            ensure_exported(path, runtime)
+        except Exception as e:
+            print(f"[DETECTOR] No se pudo exportar {path} a {runtime}: {e}")
+
+class DetectionBackend:
+    """Interfaz común: recibe frames ya reducidos y devuelve un Detections por frame."""
+    mode = "base"
+
+    def detect_batch(self, frames: list) -> list[Detections]:
+        raise NotImplementedError
+
+    def detect(self, frame) -> Detections:
+        return self.detect_batch([frame])[0]
+
+    def warmup(self, runs: int = 2, shape: tuple = (360, 640, 3)):
+        """Pasadas en vacío para que la primera detección real no pague la inicialización."""
+        frame = np.zeros(shape, dtype=np.uint8)
+        for _ in range(runs):
+            self.detect_batch([frame])
+
+class DualDetector(DetectionBackend):
+    """Modo clásico: yolov8n para personas + modelo propio para montacargas sobre el mismo frame."""
+    mode = "dual"
+
+    def __init__(self, person_model_path: str, forklift_model_path: str, min_conf: float = 0.25, runtime: str = "torch"):
+        self.person_model = load_model(person_model_path, runtime)
+        self.forklift_model = load_model(forklift_model_path, runtime)
+        self.min_conf = min_conf
+        # yolov8n (COCO): clase 0 = persona. El modelo propio solo detecta montacargas.
+        self.person_map = {0: PERSON}
+        self.forklift_map = {idx: FORKLIFT for idx in (getattr(self.forklift_model, "names", None) or {0: ""})}
+
+    def detect_batch(self, frames: list) -> list[Detections]:
+        res_p = self.person_model(frames, verbose=False, conf=self.min_conf, classes=[0])
+        res_f = self.forklift_model(frames, verbose=False, conf=self.min_conf)
+        return [
+            Detections.concat([_from_result(p, self.person_map), _from_result(f, self.forklift_map)])
+            for p, f in zip(res_p, res_f)
+        ]
+
+class FusedDetector(DetectionBackend):
+    """Modo fusionado: un solo modelo entrenado con ambas clases, una sola pasada por frame."""
+    mode = "fused"
+
+    def __init__(self, model_path: str, min_conf: float = 0.25, runtime: str = "torch"):
+        self.model = load_model(model_path, runtime)
+        self.min_conf = min_conf
+        self.class_map = _class_map(self.model, {0: PERSON, 1: FORKLIFT})
+
+    def detect_batch(self, frames: list) -> list[Detections]:
+        results = self.model(frames, verbose=False, conf=self.min_conf)
+        return [_from_result(r, self.class_map) for r in results]
+
+def create_detector(mode: str, person_model_path: str, forklift_model_path: str, fused_model_path: str = None,
+                    runtime: str = "torch", warmup_runs: int = 0) -> DetectionBackend:
+    """
+    Crea el backend según la configuración. Si se pide 'fused' pero no existe
+    el modelo combinado, se usa el modo dual. runtime elige el motor de
+    ejecución ("torch", "onnx" u "openvino").
+    """
+    detector = None
+    if mode == "fused":
+        if fused_model_path and os.path.exists(fused_model_path):
+            detector = FusedDetector(fused_model_path, runtime=runtime)
+        else:
+            print(f"[DETECTOR] Modelo fusionado no encontrado ({fused_model_path}). Usando modo dual.")
+    if detector is None:
+        detector = DualDetector(person_model_path, forklift_model_path, runtime=runtime)
+    if warmup_runs > 0:
+        detector.warmup(warmup_runs)
+    return detector
@@ -0,0 +1,165 @@
+import queue
+import threading
+import time
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+import cv2
+from models.event import Event
+
+class EventSink:
+    """
+    Escritor asíncrono de eventos. Los hilos de detección solo encolan el frame
+    y la descripción; un hilo escritor codifica las imágenes JPEG (en un pool
+    pequeño), inserta los eventos en lote en una sola transacción y después
+    avisa a los oyentes (la UI).
+
+    Política cuando la cola se llena:
+        "drop_oldest": se descarta el evento más viejo pendiente (por defecto)
+        "drop_newest": se descarta el evento nuevo
+        "block":       el detector espera hasta `block_timeout` segundos
+    """
+    def __init__(self, db, max_queue: int = 100, policy: str = "drop_oldest", batch_size: int = 20,
+                 encode_workers: int = 2, block_timeout: float = 2.0, jpeg_quality: int = 90):
+        self.db = db
+        self.policy = policy
+        self.batch_size = max(1, batch_size)
+        self.block_timeout = block_timeout
+        self.jpeg_params = [int(cv2.IMWRITE_JPEG_QUALITY), jpeg_quality]
+
+        self._queue = queue.Queue(maxsize=max(1, max_queue))
+        self._encoder = ThreadPoolExecutor(max_workers=max(1, encode_workers), thread_name_prefix="EventEncoder")
+        self._listeners = []
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, name="EventSink", daemon=True)
+
+        # --- Métricas ---
+        self._stats_lock = threading.Lock()
+        self._latencies = deque(maxlen=100)  # Duración de cada lote escrito (s)
+        self.written = 0
+        self.dropped = 0
+        self.failed = 0
+        self.max_depth = 0
+
+    def start(self):
+        if not self._thread.is_alive():
+            self._thread.start()
+
+    def stop(self, timeout: float = 5):
+        """Termina de escribir lo pendiente y detiene el escritor."""
+        self._stop.set()
+        if self._thread.is_alive():
+            self._thread.join(timeout=timeout)
+        self._encoder.shutdown(wait=True)
+
+    def add_listener(self, callback):
+        """callback(event: Event) se llama desde el hilo escritor por cada evento guardado."""
+        self._listeners.append(callback)
+
+    def remove_listener(self, callback):
+        if callback in self._listeners:
+            self._listeners.remove(callback)
+
+    def submit(self, event: Event, frame) -> bool:
+        """Encola un evento con su frame. Devuelve False si se descartó."""
+        item = (event, frame)
+        if self.policy == "block":
+            try:
+                self._queue.put(item, timeout=self.block_timeout)
+            except queue.Full:
+                return self._drop(event)
+        else:
+            try:
+                self._queue.put_nowait(item)
+            except queue.Full:
+                if self.policy == "drop_newest":
+                    return self._drop(event)
+                try:
+                    old_event, _ = self._queue.get_nowait()
+                    self._drop(old_event)
+                except queue.Empty:
+                    pass
+                try:
+                    self._queue.put_nowait(item)
+                except queue.Full:
+                    return self._drop(event)
+
+        self.max_depth = max(self.max_depth, self._queue.qsize())
+        return True
+
+    def _drop(self, event: Event) -> bool:
+        with self._stats_lock:
+            self.dropped += 1
+        print(f"[EVENTO] Cola llena, evento descartado: cámara {event.camera_id} {event.timestamp}")
+        return False
+
+    def _encode(self, item) -> Event | None:
+        event, frame = item
+        try:
+            if not cv2.imwrite(event.image_path, frame, self.jpeg_params):
+                raise IOError("cv2.imwrite devolvió False")
+            return event
+        except Exception as e:
+            print(f"[EVENTO] No se pudo guardar imagen {event.image_path}: {e}")
+            with self._stats_lock:
+                self.failed += 1
+            return None
+
+    def _run(self):
+        while not (self._stop.is_set() and self._queue.empty()):
+            try:
+                batch = [self._queue.get(timeout=0.5)]
+            except queue.Empty:
+                continue
+            while len(batch) < self.batch_size:
+                try:
+                    batch.append(self._queue.get_nowait())
+                except queue.Empty:
+                    break
+
+            start = time.perf_counter()
+            events = [ev for ev in self._encoder.map(self._encode, batch) if ev is not None]
+            to_db = [ev for ev in events if ev.camera_id is not None]
+            try:
+                if to_db:
+                    # Un solo commit para todo el lote
+                    ids = self.db.add_events(to_db)
+                    for ev, event_id in zip(to_db, ids):
+                        ev.id = event_id
+            except Exception as e:
+                print(f"[ERROR DB] No se pudieron guardar {len(to_db)} eventos: {e}")
+                with self._stats_lock:
+                    self.failed += len(to_db)
+                continue
+
+            with self._stats_lock:
+                self._latencies.append(time.perf_counter() - start)
+                self.written += len(events)
+
+            for ev in to_db:
+                for callback in list(self._listeners):
+                    try:
+                        callback(ev)
+                    except Exception as e:
+                        print(f"[EVENTO] Error notificando evento: {e}")
+
+    def get_stats(self) -> dict:
+        with self._stats_lock:
+            latencies = list(self._latencies)
+            stats = {
+                "depth": self._queue.qsize(),
+                "max_depth": self.max_depth,
+                "written": self.written,
+                "dropped": self.dropped,
+                "failed": self.failed,
+            }
+        stats["avg_write_ms"] = sum(latencies) / len(latencies) * 1000 if latencies else 0.0
+        stats["max_write_ms"] = max(latencies) * 1000 if latencies else 0.0
+        return stats
+
+    def print_stats(self):
+        s = self.get_stats()
+        print(
+            f"[EVENTO] cola={s['depth']} (máx {s['max_depth']}) escritos={s['written']} "
+            f"descartados={s['dropped']} fallidos={s['failed']} "
+            f"escritura={s['avg_write_ms']:.0f}ms (máx {s['max_write_ms']:.0f}ms)"
+        )
@@ -0,0 +1,148 @@
+import random
+import socket
+import threading
+import time
+from urllib.parse import urlsplit
+
+# Estados de conexión de una cámara
+CONNECTED = "conectada"
+DEGRADED = "degradada"      # Reintentando, o conectada pero sin frames recientes
+OFFLINE = "sin conexión"    # Varios intentos fallidos seguidos: solo se sondea por TCP
+
+def probe(source, timeout: float = 1.0) -> bool:
+    """Sondeo barato: solo abre un socket TCP al host:puerto del RTSP, sin FFmpeg ni decodificar."""
+    if isinstance(source, int):
+        return True
+    try:
+        parts = urlsplit(source)
+        host, port = parts.hostname, parts.port or 554
+    except ValueError:
+        return True
+    if not host:
+        return True
+    try:
+        with socket.create_connection((host, port), timeout=timeout):
+            return True
+    except OSError:
+        return False
+
+class CameraHealth:
+    """Estado de conexión de un stream, con hora del último frame y reconexiones."""
+    def __init__(self, name: str):
+        self.name = name
+        self.connected = False
+        self.failures = 0           # Fallos seguidos (se reinicia al recibir frames)
+        self.reconnects = 0         # Reconexiones totales desde el arranque
+        self.last_frame = None      # time.time() del último frame
+        self.last_error = ""
+        self.next_attempt = 0.0     # time.monotonic() del siguiente intento
+
+class HealthManager:
+    """
+    Reconexión con espera exponencial y jitter para todos los streams del
+    CaptureHub. Antes de abrir con FFmpeg (que puede bloquear hasta el
+    timeout) se sondea el puerto por TCP, así una docena de cámaras muertas
+    no tienen hilos haciendo conexiones bloqueantes ni decodificando.
+    """
+    def __init__(self, base_delay: float = 1.0, max_delay: float = 60.0, jitter: float = 0.3,
+                 offline_after: int = 3, degraded_after: float = 5.0, probe_timeout: float = 1.0):
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+        self.jitter = jitter
+        self.offline_after = offline_after
+        self.degraded_after = degraded_after
+        self.probe_timeout = probe_timeout
+        self._lock = threading.Lock()
+        self._cameras = {}
+
+    def _get(self, key, name: str = "") -> CameraHealth:
+        with self._lock:
+            health = self._cameras.get(key)
+            if health is None:
+                health = self._cameras[key] = CameraHealth(name or str(key))
+            return health
+
+    def _delay(self, failures: int) -> float:
+        delay = min(self.max_delay, self.base_delay * 2 ** max(0, failures - 1))
+        return delay * random.uniform(1 - self.jitter, 1 + self.jitter)
+
+    def state(self, key) -> str | None:
+        with self._lock:
+            health = self._cameras.get(key)
+        if health is None:
+            return None
+        if health.failures >= self.offline_after:
+            return OFFLINE
+        if not health.connected or health.last_frame is None or time.time() - health.last_frame > self.degraded_after:
+            return DEGRADED
+        return CONNECTED
+
+    def is_offline(self, key) -> bool:
+        return self.state(key) == OFFLINE
+
+    def wait_turn(self, key, name: str, source, stop: threading.Event) -> bool:
+        """
+        Espera el turno de reconexión (backoff) y sondea por TCP hasta que el
+        puerto responda. Devuelve False si se pidió detener el stream.
+        """
+        health = self._get(key, name)
+        while not stop.is_set():
+            remaining = health.next_attempt - time.monotonic()
+            if remaining > 0:
+                stop.wait(min(remaining, 1.0))
+                continue
+            if probe(source, self.probe_timeout):
+                return True
+            self.failure(key, "puerto sin respuesta")
+        return False
+
+    def connected(self, key):
+        health = self._get(key)
+        with self._lock:
+            if health.last_frame is not None:
+                health.reconnects += 1
+            health.connected = True
+
+    def frame(self, key):
+        health = self._get(key)
+        health.last_frame = time.time()
+        if health.failures:
+            with self._lock:
+                health.failures = 0
+
+    def failure(self, key, error: str):
+        health = self._get(key)
+        with self._lock:
+            was_offline = health.failures >= self.offline_after
+            health.connected = False
+            health.failures += 1
+            health.last_error = error
+            delay = self._delay(health.failures)
+            health.next_attempt = time.monotonic() + delay
+            offline = health.failures >= self.offline_after
+        if offline and not was_offline:
+            print(f"[SALUD] {health.name} sin conexión ({error}). Sondeo cada {delay:.0f}s como máximo {self.max_delay:.0f}s")
+        elif not offline:
+            print(f"[SALUD] {health.name}: {error}. Reintento en {delay:.1f}s")
+
+    def get_stats(self) -> dict:
+        with self._lock:
+            items = list(self._cameras.items())
+        now = time.time()
+        return {
+            key: {
+                "name": h.name,
+                "state": self.state(key),
+                "reconnects": h.reconnects,
+                "failures": h.failures,
+                "last_frame_s": now - h.last_frame if h.last_frame else None,
+                "last_error": h.last_error,
+            }
+            for key, h in items
+        }
+
+    def print_stats(self):
+        for st in self.get_stats().values():
+            age = f"{st['last_frame_s']:.0f}s" if st["last_frame_s"] is not None else "nunca"
+            print(f"[SALUD] {st['name']}: {st['state']} último_frame={age} reconexiones={st['reconnects']} "
+                  f"fallos={st['failures']}{' (' + st['last_error'] + ')' if st['failures'] else ''}")
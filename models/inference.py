@@ -0,0 +1,179 @@
+import os
+import queue
+import threading
+import time
+from collections import deque
+
+class InferenceRequest:
+    """Frame pendiente de inferencia. El hilo de la cámara espera con wait()."""
+    def __init__(self, camera_id, frame):
+        self.camera_id = camera_id
+        self.frame = frame
+        self.submitted_at = time.perf_counter()
+        self.result = None
+        self.error = None
+        self._done = threading.Event()
+
+    def set_result(self, result):
+        self.result = result
+        self._done.set()
+
+    def set_error(self, error: Exception):
+        self.error = error
+        self._done.set()
+
+    def wait(self, timeout: float = None):
+        """Bloquea hasta tener resultado. Lanza la excepción de la inferencia si falló."""
+        if not self._done.wait(timeout):
+            raise TimeoutError(f"Inferencia sin respuesta para cámara {self.camera_id}")
+        if self.error is not None:
+            raise self.error
+        return self.result
+
+class InferenceScheduler:
+    """
+    Planificador central de inferencia. Los hilos de cámara solo envían frames;
+    un único hilo junta hasta `max_batch` frames (o los que lleguen antes de
+    `deadline` segundos) y ejecuta los modelos una sola vez por lote.
+
+    infer_fn(frames: list) -> list con un resultado por frame (mismo orden).
+    """
+    def __init__(self, infer_fn, max_batch: int = 8, deadline: float = 0.04, stats_interval: float = 30):
+        self.infer_fn = infer_fn
+        self.max_batch = max(1, int(max_batch))
+        self.deadline = deadline
+        self.stats_interval = stats_interval
+
+        self._queue = queue.Queue()
+        self._stop = threading.Event()
+        self._thread = None
+
+        # --- Métricas ---
+        self._stats_lock = threading.Lock()
+        self._history = deque(maxlen=200)  # (fin, n_frames, latencia_s)
+        self.total_batches = 0
+        self.total_frames = 0
+        self._last_report = time.perf_counter()
+
+    def start(self):
+        if self._thread and self._thread.is_alive():
+            return
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run, name="InferenceScheduler", daemon=True)
+        self._thread.start()
+
+    def stop(self, timeout: float = 2):
+        self._stop.set()
+        if self._thread:
+            self._thread.join(timeout=timeout)
+        self._thread = None
+        # Liberar a los hilos que sigan esperando
+        while True:
+            try:
+                self._queue.get_nowait().set_error(RuntimeError("Planificador detenido"))
+            except queue.Empty:
+                break
+
+    def submit(self, camera_id, frame) -> InferenceRequest:
+        """Encola un frame y devuelve la petición (no bloquea)."""
+        request = InferenceRequest(camera_id, frame)
+        if self._stop.is_set():
+            request.set_error(RuntimeError("Planificador detenido"))
+        else:
+            self._queue.put(request)
+        return request
+
+    def detect(self, camera_id, frame, timeout: float = None):
+        """Envía un frame y espera su resultado."""
+        return self.submit(camera_id, frame).wait(timeout)
+
+    def _collect_batch(self) -> list[InferenceRequest]:
+        try:
+            first = self._queue.get(timeout=0.5)
+        except queue.Empty:
+            return []
+        batch = [first]
+        limit = time.perf_counter() + self.deadline
+        while len(batch) < self.max_batch:
+            remaining = limit - time.perf_counter()
+            if remaining <= 0:
+                break
+            try:
+                batch.append(self._queue.get(timeout=remaining))
+            except queue.Empty:
+                break
+        return batch
+
+    def _run(self):
+        while not self._stop.is_set():
+            batch = self._collect_batch()
+            if not batch:
+                continue
+
+            start = time.perf_counter()
+            try:
+                results = self.infer_fn([r.frame for r in batch])
+                for request, result in zip(batch, results):
+                    request.set_result(result)
+            except Exception as e:
+                print(f"[INFERENCIA] Error en lote de {len(batch)} frames: {e}")
+                for request in batch:
+                    request.set_error(e)
+            end = time.perf_counter()
+
+            with self._stats_lock:
+                self._history.append((end, len(batch), end - start))
+                self.total_batches += 1
+                self.total_frames += len(batch)
+
+            if self.stats_interval and end - self._last_report >= self.stats_interval:
+                self._last_report = end
+                self._print_stats()
+
+    def get_stats(self) -> dict:
+        """Latencia por lote y rendimiento (frames/s) sobre los últimos lotes."""
+        with self._stats_lock:
+            history = list(self._history)
+            total_batches, total_frames = self.total_batches, self.total_frames
+
+        stats = {
+            "batches": total_batches,
+            "frames": total_frames,
+            "pending": self._queue.qsize(),
+            "avg_batch": 0.0,
+            "avg_latency_ms": 0.0,
+            "last_latency_ms": 0.0,
+            "ms_per_frame": 0.0,
+            "throughput_fps": 0.0,
+        }
+        if not history:
+            return stats
+
+        frames = sum(n for _, n, _ in history)
+        busy = sum(lat for _, _, lat in history)
+        stats["avg_batch"] = frames / len(history)
+        stats["avg_latency_ms"] = busy / len(history) * 1000
+        stats["last_latency_ms"] = history[-1][2] * 1000
+        stats["ms_per_frame"] = busy / frames * 1000
+        # Rendimiento máximo sostenible: frames procesados por segundo de cómputo
+        stats["throughput_fps"] = frames / busy if busy > 0 else 0.0
+        return stats
+
+    def cameras_per_core(self, analysis_rate: float) -> float:
+        """
+        Estima cuántas cámaras soporta cada núcleo analizando `analysis_rate`
+        frames por segundo por cámara. Útil para dimensionar hardware.
+        """
+        throughput = self.get_stats()["throughput_fps"]
+        if analysis_rate <= 0 or throughput <= 0:
+            return 0.0
+        return throughput / analysis_rate / (os.cpu_count() or 1)
+
+    def _print_stats(self):
+        s = self.get_stats()
+        print(
+            f"[INFERENCIA] lotes={s['batches']} frames={s['frames']} "
+            f"lote_prom={s['avg_batch']:.1f} latencia_lote={s['avg_latency_ms']:.0f}ms "
+            f"ms/frame={s['ms_per_frame']:.1f} rendimiento={s['throughput_fps']:.1f} fps "
+            f"pendientes={s['pending']}"
+        )
@@ -0,0 +1,83 @@
+import time
+import cv2
+import numpy as np
+
+class MotionResult:
+    """
+    Resultado del filtro de movimiento.
+    ratio: proporción de píxeles que cambiaron | region: (x1, y1, x2, y2) en
+    coordenadas del frame original o None | gated: True si se salta la inferencia.
+    Recortar a `region` lo decide quien consume el resultado; el monitor no lo
+    hace porque la persona quieta junto a un montacargas en marcha quedaría fuera.
+    """
+    __slots__ = ("ratio", "region", "gated")
+
+    def __init__(self, ratio: float, region, gated: bool):
+        self.ratio = ratio
+        self.region = region
+        self.gated = gated
+
+class MotionGate:
+    """
+    Filtro barato antes de YOLO: diferencia contra un fondo promedio sobre un
+    frame gris muy reducido. Si cambia menos de `threshold` de los píxeles se
+    omite la inferencia. Cada `force_interval` segundos se analiza de todas
+    formas, para no perder a alguien que se quedó quieto junto a una máquina.
+    """
+    def __init__(self, threshold: float = 0.003, width: int = 160, pixel_delta: int = 25,
+                 alpha: float = 0.05, force_interval: float = 15.0):
+        self.threshold = threshold
+        self.width = width
+        self.pixel_delta = pixel_delta
+        self.alpha = alpha
+        self.force_interval = force_interval
+
+        self._background = None
+        self._last_analyzed = 0.0
+
+        # --- Métricas ---
+        self.gated = 0
+        self.analyzed = 0
+
+    def check(self, frame) -> MotionResult:
+        h, w = frame.shape[:2]
+        small_h = max(1, int(h * self.width / w))
+        small = cv2.resize(frame, (self.width, small_h), interpolation=cv2.INTER_AREA)
+        gray = cv2.cvtColor(small, cv2.COLOR_BGR2GRAY) if small.ndim == 3 else small
+        gray = cv2.GaussianBlur(gray, (5, 5), 0)
+
+        if self._background is None or self._background.shape != gray.shape:
+            self._background = gray.astype(np.float32)
+            return self._analyze(MotionResult(1.0, None, False))
+
+        diff = cv2.absdiff(gray, cv2.convertScaleAbs(self._background))
+        mask = (diff > self.pixel_delta).astype(np.uint8)
+        cv2.accumulateWeighted(gray, self._background, self.alpha)
+
+        changed = int(cv2.countNonZero(mask))
+        ratio = changed / mask.size
+
+        region = None
+        if changed:
+            x, y, bw, bh = cv2.boundingRect(mask)
+            sx, sy = w / self.width, h / small_h
+            region = (int(x * sx), int(y * sy), int((x + bw) * sx), int((y + bh) * sy))
+
+        forced = time.monotonic() - self._last_analyzed >= self.force_interval
+        if ratio < self.threshold and not forced:
+            self.gated += 1
+            return MotionResult(ratio, region, True)
+        return self._analyze(MotionResult(ratio, region, False))
+
+    def _analyze(self, result: MotionResult) -> MotionResult:
+        self.analyzed += 1
+        self._last_analyzed = time.monotonic()
+        return result
+
+    def get_stats(self) -> dict:
+        total = self.gated + self.analyzed
+        return {
+            "gated": self.gated,
+            "analyzed": self.analyzed,
+            "gated_pct": self.gated / total * 100 if total else 0.0,
+        }
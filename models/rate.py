@@ -0,0 +1,96 @@
+import threading
+import time
+
+class _RateState:
+    def __init__(self, floor: float, ceiling: float):
+        self.floor = floor
+        self.ceiling = ceiling
+        self.demand = floor        # Frecuencia que la cámara querría (inferencias/s)
+        self.rate = floor          # Frecuencia asignada tras repartir el presupuesto
+        self.last_activity = 0.0
+        self.next_due = 0.0
+
+class AdaptiveRateController:
+    """
+    Frecuencia de análisis adaptativa por cámara. Sube hasta `ceiling` cuando
+    hubo personas/montacargas o mucho movimiento, y baja poco a poco hacia
+    `floor` cuando la escena está quieta. Un presupuesto global de inferencias
+    por segundo se reparte de forma justa entre todas las cámaras.
+    """
+    def __init__(self, floor: float = 0.2, ceiling: float = 3.0, budget: float = 10.0,
+                 hold: float = 10.0, decay: float = 0.7, motion_high: float = 0.05):
+        self.floor = floor
+        self.ceiling = ceiling
+        self.budget = budget
+        self.hold = hold                  # Segundos a ritmo alto tras una detección
+        self.decay = decay                # Factor de bajada por cada análisis sin actividad
+        self.motion_high = motion_high    # Proporción de píxeles cambiados considerada "alta"
+        self._states = {}
+        self._lock = threading.Lock()
+
+    def register(self, key, floor: float = None, ceiling: float = None):
+        with self._lock:
+            if key not in self._states:
+                self._states[key] = _RateState(floor if floor is not None else self.floor,
+                                               ceiling if ceiling is not None else self.ceiling)
+                self._rebalance()
+
+    def unregister(self, key):
+        with self._lock:
+            if self._states.pop(key, None) is not None:
+                self._rebalance()
+
+    def report(self, key, detections: int = 0, motion: float = None):
+        """Actualiza la demanda de la cámara con el resultado del último análisis."""
+        now = time.monotonic()
+        with self._lock:
+            state = self._states.get(key)
+            if state is None:
+                return
+            active = detections > 0 or (motion is not None and motion >= self.motion_high)
+            if active:
+                state.last_activity = now
+                state.demand = state.ceiling
+            elif now - state.last_activity > self.hold:
+                state.demand = max(state.floor, state.demand * self.decay)
+            self._rebalance()
+
+    def _rebalance(self):
+        """Reparto justo (water-filling): nadie recibe más de lo que pide."""
+        states = list(self._states.values())
+        remaining = self.budget
+        pending = sorted(states, key=lambda s: s.demand)
+        while pending:
+            share = remaining / len(pending)
+            state = pending.pop(0)
+            state.rate = max(1e-3, min(state.demand, share))
+            remaining -= state.rate
+
+    def interval(self, key) -> float:
+        with self._lock:
+            state = self._states.get(key)
+            return 1.0 / state.rate if state else 1.0 / self.floor
+
+    def time_until_due(self, key) -> float:
+        with self._lock:
+            state = self._states.get(key)
+            if state is None:
+                return 0.0
+            return max(0.0, state.next_due - time.monotonic())
+
+    def try_acquire(self, key) -> bool:
+        """True si ya toca analizar esta cámara; reserva el siguiente turno."""
+        now = time.monotonic()
+        with self._lock:
+            state = self._states.get(key)
+            if state is None:
+                return True
+            if now < state.next_due:
+                return False
+            state.next_due = now + 1.0 / state.rate
+            return True
+
+    def get_rates(self) -> dict:
+        """Frecuencia actual asignada (inferencias/s) por cámara."""
+        with self._lock:
+            return {key: state.rate for key, state in self._states.items()}
@@ -0,0 +1,117 @@
+import threading
+import time
+from collections import deque
+import cv2
+from PIL import Image, ImageTk
+
+class FrameRenderer:
+    """
+    Etapa de dibujado de la vista en vivo. El hilo de video publica en un solo
+    espacio "último frame" (ya reducido y en RGB); Tk lo consulta a `fps`
+    fijos y pinta solo el más reciente, los intermedios se descartan. Así las
+    llamadas a after() no se acumulan si Tk va atrasado.
+
+    El PhotoImage se crea una vez por tamaño y se actualiza con paste().
+    `token` identifica el stream vigente: lo publicado con un token viejo
+    (de la cámara anterior) se ignora.
+    """
+    def __init__(self, label, fps: float = 15):
+        self.label = label
+        self.interval_ms = max(1, int(1000 / fps))
+        self.token = 0
+
+        self._lock = threading.Lock()
+        self._slot = None           # ("frame", imagen PIL) o ("text", mensaje)
+        self._photo = None
+        self._target = (0, 0)       # Tamaño del label, leído en el hilo de Tk
+        self._running = False
+
+        # --- Métricas ---
+        self._shown_at = deque(maxlen=60)
+        self.published = 0
+        self.displayed = 0
+        self.dropped = 0            # Frames reemplazados antes de mostrarse
+
+    def start(self):
+        if not self._running:
+            self._running = True
+            self._poll()
+
+    def stop(self):
+        self._running = False
+
+    def reset(self, text: str = "") -> int:
+        """Invalida lo publicado, muestra `text` y devuelve el token del nuevo stream (hilo de Tk)."""
+        with self._lock:
+            self.token += 1
+            self._slot = None
+            token = self.token
+        self._show_text(text)
+        return token
+
+    def publish(self, frame, token: int) -> bool:
+        """Reduce el frame BGR al tamaño del label y lo deja en el espacio (hilo de video)."""
+        width, height = self._target
+        if token != self.token or width <= 1 or height <= 1:
+            return False
+        scale = min(width / frame.shape[1], height / frame.shape[0])
+        nw, nh = int(frame.shape[1] * scale), int(frame.shape[0] * scale)
+        if nw <= 0 or nh <= 0:
+            return False
+        rgb = cv2.cvtColor(cv2.resize(frame, (nw, nh)), cv2.COLOR_BGR2RGB)
+        return self._put(("frame", Image.fromarray(rgb)), token)
+
+    def publish_text(self, text: str, token: int) -> bool:
+        """Mensaje de estado en lugar de imagen ("Conectando...", "Error Conexión")."""
+        return self._put(("text", text), token)
+
+    def _put(self, item, token: int) -> bool:
+        with self._lock:
+            if token != self.token:
+                return False
+            if self._slot is not None and self._slot[0] == "frame":
+                self.dropped += 1
+            self._slot = item
+            if item[0] == "frame":
+                self.published += 1
+        return True
+
+    def _show_text(self, text: str):
+        self._photo = None
+        self.label.config(image="", text=text)
+        self.label.image = None
+
+    def _poll(self):
+        if not self._running:
+            return
+        try:
+            if not self.label.winfo_exists():
+                self._running = False
+                return
+            self._target = (self.label.winfo_width(), self.label.winfo_height())
+            with self._lock:
+                item, self._slot = self._slot, None
+
+            if item is not None:
+                kind, value = item
+                if kind == "text":
+                    self._show_text(value)
+                else:
+                    if self._photo is None or (self._photo.width(), self._photo.height()) != value.size:
+                        self._photo = ImageTk.PhotoImage(value)
+                        self.label.config(image=self._photo, text="")
+                        self.label.image = self._photo  # Referencia para evitar Garbage Collection
+                    else:
+                        self._photo.paste(value)
+                    self.displayed += 1
+                    self._shown_at.append(time.perf_counter())
+        except Exception as e:
+            print(f"[RENDER] Error actualizando frame: {e}")
+        self.label.after(self.interval_ms, self._poll)
+
+    def get_stats(self) -> dict:
+        shown = list(self._shown_at)
+        fps = 0.0
+        if len(shown) > 1 and time.perf_counter() - shown[-1] < 1.0:
+            fps = (len(shown) - 1) / (shown[-1] - shown[0])
+        return {"fps": fps, "published": self.published, "displayed": self.displayed, "dropped": self.dropped}
@@ -0,0 +1,205 @@
+import multiprocessing as mp
+import os
+import queue
+import tempfile
+import time
+from concurrent.futures import ThreadPoolExecutor
+from tkinter import ttk
+
+# Los reportes se generan en procesos aparte (máximo MAX_JOBS a la vez), así
+# la consulta y el armado del documento no compiten por el GIL con la UI,
+# el video en vivo ni la detección.
+MAX_JOBS = 2
+CANCEL_GRACE = 2.0  # Segundos que se espera al proceso tras cancelar antes de terminarlo
+_ctx = mp.get_context("spawn")
+_pool = ThreadPoolExecutor(max_workers=MAX_JOBS, thread_name_prefix="ReportJob")
+
+class ReportCancelled(Exception):
+    pass
+
+def _rows_for(db, source: tuple):
+    """Origen de filas del reporte: ("events", camera_id) o ("cameras", None)."""
+    kind, camera_id = source
+    if kind == "cameras":
+        return ((cam.id, cam.name, cam.ip, cam.port) for cam in db.get_all_cameras())
+    return db.iter_events(camera_id)
+
+def _count_for(db, source: tuple) -> int:
+    """Total de filas del reporte (para la barra de avance)."""
+    kind, camera_id = source
+    if kind == "cameras":
+        return len(db.get_all_cameras())
+    return db.count_events(camera_id)
+
+def _export_process(db_path, source, fmt, title, headers, path, progress, total, cancel, result):
+    """
+    Cuerpo del proceso: abre su propia conexión y exporta reportando avance.
+    El total también se cuenta aquí (si no vino calculado): en tablas grandes
+    el COUNT tarda y no debe correr en el hilo de Tk.
+    """
+    def on_progress(done):
+        progress.value = done
+        if cancel.is_set():
+            raise ReportCancelled()
+
+    try:
+        # Dentro del try: un error al importar también llega como resultado
+        from database.database import Database
+        from functions.reports import EXPORTERS
+        db = Database(db_path=db_path)
+        if total.value < 0:
+            total.value = _count_for(db, source)
+        exporter, _ = EXPORTERS[fmt]
+        exporter(path, title, headers, _rows_for(db, source), progress=on_progress)
+        db.close()
+        result.put(("done", None))
+    except ReportCancelled:
+        result.put(("cancelled", None))
+    except Exception as e:
+        result.put(("error", repr(e)))
+
+class ReportJob:
+    """
+    Trabajo de reporte con avance (filas hechas / total) y cancelación.
+    Sin `total` lo cuenta el proceso del reporte; mientras tanto total es None.
+    """
+    def __init__(self, db_path: str, source: tuple, fmt: str, title: str, headers: list, total: int = None):
+        from functions.reports import EXPORTERS
+        _, suffix = EXPORTERS[fmt]
+        temp_file = tempfile.NamedTemporaryFile(delete=False, suffix=suffix)
+        temp_file.close()
+
+        self.path = temp_file.name
+        self.state = "pending"     # pending, running, done, cancelled, error
+        self.error = None
+        self._args = (db_path, source, fmt, title, headers, self.path)
+        self._progress = _ctx.Value("q", 0)
+        self._total = _ctx.Value("q", -1 if total is None else total)
+        self._cancel = _ctx.Event()
+        self._future = None
+
+    @property
+    def done(self) -> int:
+        return self._progress.value
+
+    @property
+    def total(self) -> int | None:
+        value = self._total.value
+        return None if value < 0 else value
+
+    @property
+    def finished(self) -> bool:
+        return self.state in ("done", "cancelled", "error")
+
+    def start(self) -> "ReportJob":
+        self._future = _pool.submit(self._run)
+        return self
+
+    def cancel(self):
+        self._cancel.set()
+
+    def _run(self):
+        if self._cancel.is_set():
+            self.state = "cancelled"
+        else:
+            self.state = "running"
+            result = _ctx.Queue()
+            process = _ctx.Process(
+                target=_export_process,
+                args=(*self._args, self._progress, self._total, self._cancel, result),
+                name="ReportExport",
+                daemon=True
+            )
+            process.start()
+            try:
+                # Esperar el resultado antes de join() para no bloquear la cola
+                self.state, self.error = self._wait(process, result)
+            except (EOFError, OSError) as e:
+                self.state, self.error = "error", repr(e)
+            process.join(timeout=5)
+            if process.is_alive():
+                process.terminate()
+                process.join(timeout=1)
+        if self.state != "done":
+            try:
+                os.remove(self.path)
+            except OSError:
+                pass
+
+    def _wait(self, process, result) -> tuple:
+        """
+        Espera el resultado sin bloquearse para siempre: si el proceso muere
+        (error al importar, caída, falta de memoria) el trabajo falla, y si se
+        canceló y no responde en CANCEL_GRACE segundos se termina.
+        """
+        cancelled_at = None
+        while True:
+            try:
+                return result.get(timeout=0.2)
+            except queue.Empty:
+                pass
+            if not process.is_alive():
+                # El resultado pudo quedar en la cola justo antes de salir
+                try:
+                    return result.get(timeout=0.5)
+                except queue.Empty:
+                    return "error", f"el proceso del reporte terminó sin resultado (código {process.exitcode})"
+            if self._cancel.is_set():
+                cancelled_at = cancelled_at or time.monotonic()
+                if time.monotonic() - cancelled_at > CANCEL_GRACE:
+                    process.terminate()
+                    process.join(timeout=1)
+                    return "cancelled", None
+
+class ReportProgress(ttk.Frame):
+    """Barra de avance con botón de cancelar para los trabajos de reporte."""
+    def __init__(self, master, on_done):
+        super().__init__(master, padding=(10, 0))
+        self.on_done = on_done
+        self.job = None
+
+        self.label = ttk.Label(self, text="")
+        self.label.pack(side="left", padx=(0, 10))
+        self.bar = ttk.Progressbar(self, mode="determinate", maximum=1)
+        self.bar.pack(side="left", fill="x", expand=True)
+        self.btn_cancel = ttk.Button(self, text="Cancelar", command=self.cancel)
+        self.btn_cancel.pack(side="left", padx=(10, 0))
+
+    @property
+    def busy(self) -> bool:
+        return self.job is not None and not self.job.finished
+
+    def run(self, job: ReportJob):
+        self.job = job.start()
+        self.bar.config(maximum=max(1, job.total or 0), value=0)
+        self.btn_cancel.config(state="normal")
+        self.pack(fill="x", pady=(0, 10))
+        self._poll()
+
+    def cancel(self):
+        if self.job:
+            self.job.cancel()
+            self.label.config(text="Cancelando...")
+
+    def _poll(self):
+        if not self.winfo_exists() or self.job is None:
+            return
+        job = self.job
+        total = job.total
+        if total is not None:
+            self.bar.config(maximum=max(1, total), value=job.done)
+        if not job.finished:
+            if not job._cancel.is_set():
+                self.label.config(text="Contando filas..." if total is None
+                                  else f"Generando: {job.done:,} / {total:,} filas")
+            self.after(200, self._poll)
+            return
+
+        self.btn_cancel.config(state="disabled")
+        if job.state == "done":
+            self.label.config(text=f"Listo: {job.done:,} filas")
+            self.on_done(job.path)
+        elif job.state == "cancelled":
+            self.label.config(text="Reporte cancelado")
+        else:
+            self.label.config(text=f"Error: {job.error}")
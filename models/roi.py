@@ -0,0 +1,91 @@
+import math
+import cv2
+import numpy as np
+from models.detector import Detections
+
+class RegionOfInterest:
+    """
+    Zonas de interés de una cámara para un tamaño de frame dado. La inferencia
+    corre solo sobre el rectángulo que encierra los polígonos (a resolución
+    nativa hasta `width` px), dividido en mosaicos si la zona es muy ancha.
+    Las cajas se devuelven en coordenadas del frame completo y se descartan
+    las que apoyan fuera de los polígonos.
+
+    polygons: [[x, y], ...] normalizados 0-1 (Camera.roi). Vacío = frame completo.
+    tile_aspect: ancho/alto máximo de un mosaico (0 = sin mosaicos).
+    overlap: fracción de solape entre mosaicos vecinos.
+    """
+    def __init__(self, polygons: list, width: int, height: int, tile_aspect: float = 2.0, overlap: float = 0.15):
+        self.polygons = polygons
+        self.width = width
+        self.height = height
+        self.mask = None
+        self.points = []
+        self.bbox = (0, 0, width, height)
+
+        if polygons:
+            scale = np.array([width, height], dtype=np.float32)
+            self.points = [np.round(np.asarray(p, dtype=np.float32) * scale).astype(np.int32) for p in polygons]
+            self.mask = np.zeros((height, width), dtype=np.uint8)
+            cv2.fillPoly(self.mask, self.points, 1)
+            x, y, w, h = cv2.boundingRect(np.concatenate(self.points))
+            x1, y1 = max(0, x), max(0, y)
+            x2, y2 = min(width, x + w), min(height, y + h)
+            if x2 - x1 >= 16 and y2 - y1 >= 16:
+                self.bbox = (x1, y1, x2, y2)
+
+        self.tiles = self._plan_tiles(tile_aspect, overlap)
+
+    def _plan_tiles(self, tile_aspect: float, overlap: float) -> list[tuple]:
+        x1, y1, x2, y2 = self.bbox
+        w, h = x2 - x1, y2 - y1
+        if tile_aspect <= 0 or w / h <= tile_aspect:
+            return [self.bbox]
+        # n mosaicos de ancho tw que se solapan `overlap` y cubren w exactamente
+        count = math.ceil((w / h - overlap * tile_aspect) / (tile_aspect * (1 - overlap)))
+        count = max(2, count)
+        tile_w = w / (count - (count - 1) * overlap)
+        step = tile_w * (1 - overlap)
+        tiles = [(x1 + int(i * step), y1, x1 + int(i * step + tile_w), y2) for i in range(count)]
+        tiles[-1] = (tiles[-1][0], y1, x2, y2)
+        return tiles
+
+    def matches(self, frame) -> bool:
+        return frame.shape[:2] == (self.height, self.width)
+
+    def contains(self, detections: Detections) -> Detections:
+        """Conserva las detecciones cuyo punto de apoyo (centro inferior) cae en una zona."""
+        if self.mask is None or not len(detections):
+            return detections
+        boxes = detections.boxes
+        cx = ((boxes[:, 0] + boxes[:, 2]) / 2).astype(np.int32).clip(0, self.width - 1)
+        cy = boxes[:, 3].astype(np.int32).clip(0, self.height - 1)
+        keep = self.mask[cy, cx] > 0
+        return Detections(boxes[keep], detections.classes[keep], detections.scores[keep])
+
+    def detect(self, inference, key, frame, width: int = 640, timeout: float = 30) -> Detections:
+        """
+        Envía todos los mosaicos al planificador a la vez (entran en el mismo
+        lote) y junta los resultados en coordenadas del frame completo.
+        """
+        pending = []
+        for i, (x1, y1, x2, y2) in enumerate(self.tiles):
+            crop = frame[y1:y2, x1:x2]
+            scale = min(1.0, width / crop.shape[1])
+            if scale < 1.0:
+                crop = cv2.resize(crop, (width, max(1, int(crop.shape[0] * scale))))
+            else:
+                crop = np.ascontiguousarray(crop)
+            pending.append((inference.submit((key, i), crop), scale, x1, y1))
+
+        parts = [request.wait(timeout).scaled(1 / scale, 1 / scale).translated(x1, y1)
+                 for request, scale, x1, y1 in pending]
+        detections = Detections.concat(parts)
+        if len(self.tiles) > 1:
+            detections = detections.nms()
+        return self.contains(detections)
+
+    def draw(self, frame, color=(0, 255, 255)):
+        """Dibuja el contorno de las zonas sobre el frame (vista en vivo)."""
+        if self.points:
+            cv2.polylines(frame, self.points, True, color, 1)
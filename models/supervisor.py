@@ -0,0 +1,160 @@
+import heapq
+import itertools
+import random
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+class DetectionSupervisor:
+    """
+    Ejecuta el monitoreo de todas las cámaras con un número fijo de hilos.
+    Cada cámara es una tarea con step(), que hace un ciclo de análisis y
+    devuelve en cuántos segundos quiere el siguiente, y close(). Un hilo
+    planificador mantiene una cola por hora de vencimiento y manda las tareas
+    vencidas al pool; una misma cámara nunca corre dos ciclos a la vez.
+
+    sync(cameras) arranca, detiene o reinicia tareas según la tabla de cámaras,
+    sin reiniciar la aplicación.
+    """
+    def __init__(self, task_factory, workers: int = 8, start_spread: float = 5.0, signature=None):
+        self.task_factory = task_factory
+        self.workers = max(1, int(workers))
+        self.start_spread = start_spread
+        # Qué cambios de una cámara obligan a reiniciar su tarea
+        self.signature = signature or (lambda cam: (cam.name, cam.ip, cam.port, cam.username, cam.password))
+
+        self._executor = ThreadPoolExecutor(max_workers=self.workers, thread_name_prefix="Detector")
+        self._cond = threading.Condition()
+        self._heap = []                 # (vence, orden, camera_id, tarea)
+        self._order = itertools.count()
+        self._tasks = {}                # camera_id -> (firma, tarea)
+        self._running = set()           # camera_id con un ciclo en el pool
+        self._retired = {}              # camera_id -> tarea a cerrar al terminar su ciclo
+        self._stop = threading.Event()
+        self._thread = None
+
+        # --- Métricas ---
+        self.steps = 0
+        self.errors = 0
+        self._lag_sum = 0.0             # Retraso entre el vencimiento y el inicio real
+
+    def start(self):
+        if self._thread is None:
+            self._thread = threading.Thread(target=self._loop, name="DetectionSupervisor", daemon=True)
+            self._thread.start()
+
+    def sync(self, cameras: list):
+        """Deja una tarea por cámara de la lista: agrega nuevas, quita borradas y reinicia modificadas."""
+        if self._stop.is_set():
+            return
+        wanted = {cam.id: cam for cam in cameras}
+        started, stopped = [], []
+        with self._cond:
+            for camera_id in list(self._tasks):
+                signature, _ = self._tasks[camera_id]
+                camera = wanted.get(camera_id)
+                if camera is None or self.signature(camera) != signature:
+                    self._retire(camera_id)
+                    stopped.append(camera_id)
+            for camera_id, camera in wanted.items():
+                if camera_id not in self._tasks:
+                    task = self.task_factory(camera)
+                    self._tasks[camera_id] = (self.signature(camera), task)
+                    due = time.monotonic() + random.uniform(0.5, self.start_spread)
+                    heapq.heappush(self._heap, (due, next(self._order), camera_id, task))
+                    started.append(camera.name)
+            self._cond.notify_all()
+        if started or stopped:
+            print(f"[SUPERVISOR] {len(self._tasks)} cámaras en {self.workers} hilos "
+                  f"(iniciadas: {len(started)}, detenidas: {len(stopped)})")
+
+    def _retire(self, camera_id):
+        """Quita la tarea; si está a mitad de un ciclo se cierra cuando termine (con _cond tomado)."""
+        _, task = self._tasks.pop(camera_id)
+        if camera_id in self._running:
+            self._retired[camera_id] = task
+        else:
+            self._close(task)
+
+    @staticmethod
+    def _close(task):
+        try:
+            task.close()
+        except Exception as e:
+            print(f"[SUPERVISOR] Error cerrando tarea: {e}")
+
+    def _loop(self):
+        while not self._stop.is_set():
+            with self._cond:
+                if not self._heap:
+                    self._cond.wait(1.0)
+                    continue
+                due, _, camera_id, task = self._heap[0]
+                now = time.monotonic()
+                if due > now:
+                    self._cond.wait(min(due - now, 1.0))
+                    continue
+                heapq.heappop(self._heap)
+                # Entrada de una tarea retirada (cámara borrada o reiniciada): se descarta
+                if self._tasks.get(camera_id, (None, None))[1] is not task:
+                    continue
+                if camera_id in self._running:
+                    # Tarea reiniciada mientras la anterior termina su ciclo
+                    heapq.heappush(self._heap, (now + 0.1, next(self._order), camera_id, task))
+                    continue
+                self._running.add(camera_id)
+                self._lag_sum += now - due
+            try:
+                self._executor.submit(self._step, camera_id, task)
+            except RuntimeError:
+                break   # El pool ya se cerró (stop)
+
+    def _step(self, camera_id, task):
+        delay = 1.0
+        try:
+            delay = task.step()
+        except Exception as e:
+            self.errors += 1
+            print(f"[SUPERVISOR] Error en cámara {camera_id}: {e}")
+        with self._cond:
+            self.steps += 1
+            self._running.discard(camera_id)
+            retired = self._retired.pop(camera_id, None)
+            if retired is not None:
+                self._close(retired)
+            elif self._tasks.get(camera_id, (None, None))[1] is task and not self._stop.is_set():
+                heapq.heappush(self._heap, (time.monotonic() + max(0.0, delay), next(self._order), camera_id, task))
+            self._cond.notify_all()
+
+    def stop(self, timeout: float = 10):
+        """Detiene el planificador, espera a que terminen los ciclos en curso y cierra todas las tareas."""
+        self._stop.set()
+        with self._cond:
+            self._cond.notify_all()
+        if self._thread is not None:
+            self._thread.join(timeout=timeout)
+        self._executor.shutdown(wait=True)
+        with self._cond:
+            tasks = [task for _, task in self._tasks.values()] + list(self._retired.values())
+            self._tasks.clear()
+            self._retired.clear()
+            self._heap.clear()
+        for task in tasks:
+            self._close(task)
+        print("[SUPERVISOR] Detección detenida")
+
+    def get_stats(self) -> dict:
+        with self._cond:
+            return {
+                "cameras": len(self._tasks),
+                "running": len(self._running),
+                "workers": self.workers,
+                "steps": self.steps,
+                "errors": self.errors,
+                "avg_lag_ms": self._lag_sum / self.steps * 1000 if self.steps else 0.0,
+            }
+
+    def print_stats(self):
+        s = self.get_stats()
+        print(f"[SUPERVISOR] cámaras={s['cameras']} en curso={s['running']}/{s['workers']} "
+              f"ciclos={s['steps']} errores={s['errors']} retraso_prom={s['avg_lag_ms']:.0f}ms")
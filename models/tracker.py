@@ -0,0 +1,198 @@
+import threading
+import time
+import numpy as np
+from models.detector import PERSON, FORKLIFT
+from functions.proximity import PERSON_FORKLIFT
+
+def iou_matrix(a: np.ndarray, b: np.ndarray) -> np.ndarray:
+    """IoU entre todas las cajas de `a` (N,4) y `b` (M,4) -> (N, M)."""
+    if not len(a) or not len(b):
+        return np.zeros((len(a), len(b)), dtype=np.float32)
+    xx1 = np.maximum(a[:, None, 0], b[None, :, 0])
+    yy1 = np.maximum(a[:, None, 1], b[None, :, 1])
+    xx2 = np.minimum(a[:, None, 2], b[None, :, 2])
+    yy2 = np.minimum(a[:, None, 3], b[None, :, 3])
+    inter = np.clip(xx2 - xx1, 0, None) * np.clip(yy2 - yy1, 0, None)
+    area_a = (a[:, 2] - a[:, 0]) * (a[:, 3] - a[:, 1])
+    area_b = (b[:, 2] - b[:, 0]) * (b[:, 3] - b[:, 1])
+    return inter / (area_a[:, None] + area_b[None, :] - inter + 1e-6)
+
+def _greedy_match(iou: np.ndarray, threshold: float) -> list[tuple]:
+    """Pares (fila, columna) de mayor IoU primero, cada fila y columna una sola vez."""
+    pairs = []
+    if iou.size == 0:
+        return pairs
+    iou = iou.copy()
+    while True:
+        r, c = np.unravel_index(np.argmax(iou), iou.shape)
+        if iou[r, c] <= threshold:
+            return pairs
+        pairs.append((int(r), int(c)))
+        iou[r, :] = -1
+        iou[:, c] = -1
+
+class Track:
+    """
+    Objeto seguido con filtro de Kalman de velocidad constante.
+    Estado: [cx, cy, w, h, vx, vy, vw, vh] en píxeles y píxeles/segundo.
+    """
+    STD_POS = 1 / 20    # Ruido de posición relativo a la altura de la caja
+    STD_VEL = 1 / 160   # Ruido de velocidad relativo a la altura de la caja
+
+    def __init__(self, track_id: int, cls: int, box, score: float, now: float):
+        self.id = track_id
+        self.cls = cls
+        self.score = score
+        self.hits = 1
+        self.last_update = now
+        self.last_predict = now
+
+        x1, y1, x2, y2 = box
+        self.x = np.array([(x1 + x2) / 2, (y1 + y2) / 2, x2 - x1, y2 - y1, 0, 0, 0, 0], dtype=np.float64)
+        h = max(self.x[3], 1.0)
+        std = np.array([2 * self.STD_POS * h] * 4 + [10 * self.STD_VEL * h] * 4)
+        self.P = np.diag(std ** 2)
+
+    @staticmethod
+    def _to_box(x) -> np.ndarray:
+        cx, cy, w, h = x[:4]
+        return np.array([cx - w / 2, cy - h / 2, cx + w / 2, cy + h / 2], dtype=np.float32)
+
+    @property
+    def box(self) -> np.ndarray:
+        return self._to_box(self.x)
+
+    def box_at(self, now: float) -> np.ndarray:
+        """Caja extrapolada a `now` sin modificar el estado (para dibujar entre inferencias)."""
+        dt = max(0.0, now - self.last_predict)
+        return self._to_box(self.x[:4] + self.x[4:] * dt)
+
+    def predict(self, now: float):
+        dt = max(0.0, now - self.last_predict)
+        self.last_predict = now
+        if dt == 0:
+            return
+        F = np.eye(8)
+        F[:4, 4:] = np.eye(4) * dt
+        h = max(self.x[3], 1.0)
+        q = np.array([self.STD_POS * h] * 4 + [self.STD_VEL * h] * 4) ** 2 * dt
+        self.x = F @ self.x
+        self.P = F @ self.P @ F.T + np.diag(q)
+
+    def update(self, box, score: float, now: float):
+        x1, y1, x2, y2 = box
+        z = np.array([(x1 + x2) / 2, (y1 + y2) / 2, x2 - x1, y2 - y1])
+        h = max(self.x[3], 1.0)
+        R = np.diag(np.array([self.STD_POS * h] * 4) ** 2)
+        S = self.P[:4, :4] + R
+        K = self.P[:, :4] @ np.linalg.inv(S)
+        self.x = self.x + K @ (z - self.x[:4])
+        self.P = self.P - K @ self.P[:4, :]
+        self.score = score
+        self.hits += 1
+        self.last_update = now
+
+class Tracker:
+    """
+    Seguimiento multi-objeto por cámara al estilo ByteTrack: primero se asocian
+    las detecciones de alta confianza a los tracks por IoU, después las de baja
+    confianza a los tracks que quedaron libres (así un montacargas no "parpadea"
+    cuando su confianza baja un momento). Solo las de alta confianza crean tracks.
+
+    Los incidentes de proximidad se registran por par de tracks: un evento por
+    incidente, que termina cuando el par deja de estar cerca `incident_gap_s`.
+    Lo comparten la vista en vivo y el monitor de la misma cámara.
+    """
+    def __init__(self, person_conf: float = 0.0, forklift_conf: float = 0.55, match_iou: float = 0.2,
+                 low_match_iou: float = 0.5, max_age: float = 3.0, min_hits: int = 1, incident_gap: float = 5.0):
+        self.high_conf = {PERSON: person_conf, FORKLIFT: forklift_conf}
+        self.match_iou = match_iou
+        self.low_match_iou = low_match_iou
+        self.max_age = max_age
+        self.min_hits = min_hits
+        self.incident_gap = incident_gap
+        # Alto del frame de referencia de las cajas (lo fija models.pipeline.track_scale)
+        self.reference_height = None
+
+        self._lock = threading.Lock()
+        self._tracks = []
+        self._next_id = 1
+        self._incidents = {}    # (regla, id_a, id_b) -> última vez que se vio el par cerca
+
+    def _associate(self, tracks: list, boxes, classes, threshold: float) -> list[tuple]:
+        if not tracks or not len(boxes):
+            return []
+        iou = iou_matrix(np.array([t.box for t in tracks]), boxes)
+        iou[np.array([t.cls for t in tracks])[:, None] != classes[None, :]] = 0
+        return _greedy_match(iou, threshold)
+
+    def update(self, detections, now: float = None) -> list[Track]:
+        """Asocia las detecciones de un frame y devuelve los tracks vistos en él."""
+        now = time.monotonic() if now is None else now
+        high_min = np.where(detections.classes == PERSON, self.high_conf[PERSON], self.high_conf[FORKLIFT])
+        high = detections.scores >= high_min
+
+        with self._lock:
+            for track in self._tracks:
+                track.predict(now)
+
+            # 1. Alta confianza contra todos los tracks
+            h_boxes, h_cls, h_scores = detections.boxes[high], detections.classes[high], detections.scores[high]
+            matched, used = [], set()
+            for ti, di in self._associate(self._tracks, h_boxes, h_cls, self.match_iou):
+                self._tracks[ti].update(h_boxes[di], float(h_scores[di]), now)
+                matched.append(self._tracks[ti])
+                used.add(di)
+
+            # 2. Baja confianza contra los tracks que no se asociaron
+            free = [t for t in self._tracks if t not in matched]
+            l_boxes, l_cls, l_scores = detections.boxes[~high], detections.classes[~high], detections.scores[~high]
+            for ti, di in self._associate(free, l_boxes, l_cls, self.low_match_iou):
+                free[ti].update(l_boxes[di], float(l_scores[di]), now)
+                matched.append(free[ti])
+
+            # 3. Detecciones de alta confianza sin track: objetos nuevos
+            for di in range(len(h_boxes)):
+                if di not in used:
+                    track = Track(self._next_id, int(h_cls[di]), h_boxes[di], float(h_scores[di]), now)
+                    self._next_id += 1
+                    self._tracks.append(track)
+                    matched.append(track)
+
+            # 4. Olvidar los tracks que llevan demasiado sin verse
+            self._tracks = [t for t in self._tracks if now - t.last_update <= self.max_age]
+            # Y los incidentes terminados, aunque en este frame no haya violaciones
+            self._prune_incidents(now)
+            return [t for t in matched if t.hits >= self.min_hits]
+
+    def predict(self, now: float = None, coast: float = 1.0) -> list[tuple]:
+        """(track, caja) extrapolada a `now` de los tracks vistos en el último `coast` s."""
+        now = time.monotonic() if now is None else now
+        with self._lock:
+            return [(t, t.box_at(now)) for t in self._tracks
+                    if t.hits >= self.min_hits and now - t.last_update <= coast]
+
+    def new_incidents(self, violations: list, persons: list, forklifts: list, now: float = None) -> list[tuple]:
+        """
+        Traduce las violaciones (índices sobre persons/forklifts) a pares de
+        tracks y devuelve solo los incidentes que empiezan en este frame.
+        """
+        now = time.monotonic() if now is None else now
+        fresh = []
+        with self._lock:
+            for v in violations:
+                if v.rule == PERSON_FORKLIFT:
+                    a, b = persons[v.i].id, forklifts[v.j].id
+                else:
+                    a, b = sorted((forklifts[v.i].id, forklifts[v.j].id))
+                key = (v.rule, a, b)
+                # Nuevo si el par nunca estuvo cerca o se separó más de incident_gap
+                if now - self._incidents.get(key, float("-inf")) > self.incident_gap:
+                    fresh.append(key)
+                self._incidents[key] = now
+            self._prune_incidents(now)
+        return fresh
+
+    def _prune_incidents(self, now: float):
+        """Quita los pares que llevan más de incident_gap sin estar cerca (con _lock tomado)."""
+        self._incidents = {k: t for k, t in self._incidents.items() if now - t <= self.incident_gap}
@@ -1,12 +1,535 @@
+import asyncio
+import base64
+import hashlib
+import html
+import json
+import os
+import struct
+import threading
+import time
+from collections import deque
+from urllib.parse import urlparse, parse_qs
+
+# WebSocket (RFC 6455) sobre asyncio, sin dependencias: un solo event loop en
+# un hilo atiende cientos de visores conectados. Cada cliente solo cuesta dos
+# corrutinas y una cola; los mensajes se serializan una vez y la misma trama
+# se encola a todos.
+
+GUID = "258EAFA5-E914-47DA-95CA-C5AB0DC85B11"
+OP_CONT, OP_TEXT, OP_BINARY, OP_CLOSE, OP_PING, OP_PONG = 0x0, 0x1, 0x2, 0x8, 0x9, 0xA
+MAX_CLIENT_PAYLOAD = 64 * 1024     # Los visores solo mandan pings/cierres
+MAX_HEADER_BYTES = 8 * 1024
+
+class ProtocolError(Exception):
+    def __init__(self, code: int, message: str):
+        super().__init__(message)
+        self.code = code
+
+def accept_key(key: str) -> str:
+    return base64.b64encode(hashlib.sha1((key + GUID).encode("ascii")).digest()).decode("ascii")
+
+def encode_frame(opcode: int, payload: bytes = b"", mask: bool = False) -> bytes:
+    """Trama completa (FIN). El servidor no enmascara; el cliente debe hacerlo."""
+    length = len(payload)
+    header = bytearray([0x80 | opcode])
+    mask_bit = 0x80 if mask else 0
+    if length < 126:
+        header.append(mask_bit | length)
+    elif length < 1 << 16:
+        header.append(mask_bit | 126)
+        header += struct.pack("!H", length)
+    else:
+        header.append(mask_bit | 127)
+        header += struct.pack("!Q", length)
+    if mask:
+        key = os.urandom(4)
+        header += key
+        payload = _apply_mask(payload, key)
+    return bytes(header) + payload
+
+def _apply_mask(payload: bytes, key: bytes) -> bytes:
+    # XOR de todo el bloque como un entero grande: mucho más rápido que byte a byte
+    n = len(payload)
+    if not n:
+        return payload
+    full = (key * (n // 4 + 1))[:n]
+    return (int.from_bytes(payload, "big") ^ int.from_bytes(full, "big")).to_bytes(n, "big")
+
+async def read_frame(reader: asyncio.StreamReader, masked: bool, max_payload: int = MAX_CLIENT_PAYLOAD) -> tuple:
+    """Lee una trama y devuelve (fin, opcode, payload). `masked`: exigir máscara (lado servidor)."""
+    b1, b2 = await reader.readexactly(2)
+    if b1 & 0x70:
+        raise ProtocolError(1002, "bits RSV sin extensión negociada")
+    fin, opcode = bool(b1 & 0x80), b1 & 0x0F
+    has_mask, length = bool(b2 & 0x80), b2 & 0x7F
+    if has_mask != masked:
+        raise ProtocolError(1002, "máscara inválida")
+    if length == 126:
+        length = struct.unpack("!H", await reader.readexactly(2))[0]
+    elif length == 127:
+        length = struct.unpack("!Q", await reader.readexactly(8))[0]
+    if opcode >= 0x8 and (length > 125 or not fin):
+        raise ProtocolError(1002, "trama de control inválida")
+    if length > max_payload:
+        raise ProtocolError(1009, "mensaje demasiado grande")
+    key = await reader.readexactly(4) if has_mask else None
+    payload = await reader.readexactly(length)
+    return fin, opcode, _apply_mask(payload, key) if key else payload
+
+async def read_message(reader: asyncio.StreamReader, masked: bool, max_payload: int = MAX_CLIENT_PAYLOAD) -> tuple:
+    """
+    Une los fragmentos de un mensaje. Las tramas de control intercaladas se
+    devuelven tal cual: (opcode, payload).
+    """
+    opcode, parts, size = None, [], 0
+    while True:
+        fin, op, payload = await read_frame(reader, masked, max_payload)
+        if op >= 0x8:
+            return op, payload
+        if op == OP_CONT:
+            if opcode is None:
+                raise ProtocolError(1002, "continuación sin mensaje")
+        elif opcode is not None:
+            raise ProtocolError(1002, "mensaje nuevo antes de terminar el anterior")
+        else:
+            opcode = op
+        size += len(payload)
+        if size > max_payload:
+            raise ProtocolError(1009, "mensaje demasiado grande")
+        parts.append(payload)
+        if fin:
+            return opcode, b"".join(parts)
+
+async def read_http_head(reader: asyncio.StreamReader) -> tuple:
+    """(línea inicial, encabezados en minúsculas) de una petición o respuesta HTTP."""
+    head = await reader.readuntil(b"\r\n\r\n")
+    if len(head) > MAX_HEADER_BYTES:
+        raise ProtocolError(1009, "encabezados demasiado grandes")
+    lines = head.decode("latin-1").split("\r\n")
+    headers = {}
+    for line in lines[1:]:
+        if ":" in line:
+            name, value = line.split(":", 1)
+            headers[name.strip().lower()] = value.strip()
+    return lines[0], headers
+
+class _Client:
+    __slots__ = ("writer", "queue", "peer", "connected", "last_seen", "dropped")
+
+    def __init__(self, writer: asyncio.StreamWriter, max_queue: int):
+        self.writer = writer
+        self.queue = asyncio.Queue(maxsize=max_queue)
+        self.peer = writer.get_extra_info("peername")
+        self.connected = time.monotonic()
+        self.last_seen = self.connected
+        self.dropped = 0
+
+    def push(self, frame: bytes) -> bool:
+        """Encola sin bloquear; con la cola llena se descarta el mensaje más viejo."""
+        try:
+            self.queue.put_nowait(frame)
+            return True
+        except asyncio.QueueFull:
+            try:
+                self.queue.get_nowait()
+            except asyncio.QueueEmpty:
+                pass
+            self.queue.put_nowait(frame)
+            self.dropped += 1
+            return False
+
 class WebSocket:
-    def __init__(self, title:str, data:list):
-        pass
+    """
+    Servidor HTTP + WebSocket de eventos en vivo. GET / sirve el tablero
+    (generate_html) y GET /ws lo mantiene al día: al conectar manda los
+    últimos `history` eventos y el estado de las cámaras; después empuja
+    cada evento nuevo (con miniatura) y el estado cuando cambia.
+
+    publish_event() y los proveedores de estado se llaman desde cualquier
+    hilo (p. ej. el escritor del EventSink); el trabajo de red y las
+    miniaturas corren en el event loop del servidor y su executor.
+    `data`: eventos recientes para los primeros visores, del más nuevo al más viejo.
+    """
+    def __init__(self, title: str, data: list = None, host: str = "127.0.0.1", port: int = 8766,
+                 status_provider=None, status_interval: float = 2.0, history: int = 50, max_queue: int = 64,
+                 thumb_width: int = 320, ping_interval: float = 30.0, token: str = ""):
+        self.title = title
+        self.host = host
+        self.port = port
+        self.status_provider = status_provider
+        self.status_interval = status_interval
+        self.max_queue = max(1, max_queue)
+        self.thumb_width = thumb_width
+        self.ping_interval = ping_interval
+        self.token = token
+
+        self._seed = list(data or [])
+        self._incoming = None       # asyncio.Queue de (evento, difundir): conserva el orden
+        self._history = deque(maxlen=max(1, history))
+        self._status = {}
+        self._clients = set()
+        self._loop = None
+        self._server = None
+        self._thread = None
+        self._ready = threading.Event()
+        self._start_error = None
+
+        # --- Métricas (solo se modifican en el event loop) ---
+        self.connections = 0
+        self.max_clients = 0
+        self.messages = 0
+        self.frames_sent = 0
+        self.bytes_sent = 0
+        self.rejected = 0
+
+    # --- Ciclo de vida ---
+
+    def start(self, timeout: float = 5.0) -> "WebSocket":
+        self._thread = threading.Thread(target=self._run, name="WebSocketServer", daemon=True)
+        self._thread.start()
+        self._ready.wait(timeout)
+        if self._start_error is not None:
+            raise self._start_error
+        print(f"[WS] Tablero en http://{self.host}:{self.port}/")
+        return self
+
+    def _run(self):
+        self._loop = asyncio.new_event_loop()
+        asyncio.set_event_loop(self._loop)
+        try:
+            self._server = self._loop.run_until_complete(
+                asyncio.start_server(self._handle, self.host, self.port, backlog=1024)
+            )
+        except OSError as e:
+            self._start_error = e
+            self._ready.set()
+            return
+        self.port = self._server.sockets[0].getsockname()[1]
+        self._incoming = asyncio.Queue()
+        for event in reversed(self._seed):
+            self._incoming.put_nowait((event, False))
+        self._seed = []
+        for coro in (self._event_loop(), self._status_loop(), self._ping_loop()):
+            self._loop.create_task(coro)
+        self._ready.set()
+        try:
+            self._loop.run_forever()
+        finally:
+            self._loop.run_until_complete(self._close_all())
+            self._loop.close()
+
+    def stop(self, timeout: float = 5.0):
+        if self._loop is None or not self._loop.is_running():
+            return
+        self._loop.call_soon_threadsafe(self._loop.stop)
+        self._thread.join(timeout)
+
+    async def _close_all(self):
+        self._server.close()
+        for client in list(self._clients):
+            self._send_now(client, encode_frame(OP_CLOSE, struct.pack("!H", 1001)))
+            client.writer.close()
+        tasks = [t for t in asyncio.all_tasks(self._loop) if t is not asyncio.current_task()]
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+        try:
+            await asyncio.wait_for(self._server.wait_closed(), timeout=2)
+        except asyncio.TimeoutError:
+            pass
+
+    # --- Publicación (desde cualquier hilo) ---
+
+    def publish_event(self, event):
+        """Envía un evento guardado (models.event.Event) a todos los visores."""
+        if self._loop is not None and self._loop.is_running():
+            self._loop.call_soon_threadsafe(self._incoming.put_nowait, (event, True))
+
+    async def _event_loop(self):
+        while True:
+            event, broadcast = await self._incoming.get()
+            try:
+                await self._publish(event, broadcast)
+            except Exception as e:
+                print(f"[WS] Error publicando evento: {e}")
+
+    async def _publish(self, event, broadcast: bool = True):
+        data = event.return_dict()
+        image_path = data.pop("image_path", None)
+        if image_path and self.thumb_width:
+            data["thumbnail"] = await self._loop.run_in_executor(None, self._thumbnail, image_path)
+        self._history.appendleft(data)
+        if broadcast:
+            self._broadcast({"type": "event", "event": data})
+
+    def _thumbnail(self, path: str) -> str | None:
+        """Miniatura JPEG en data URI (se calcula una vez por evento, no por visor)."""
+        try:
+            import cv2
+            image = cv2.imread(path)
+            if image is None:
+                return None
+            h, w = image.shape[:2]
+            if w > self.thumb_width:
+                image = cv2.resize(image, (self.thumb_width, int(h * self.thumb_width / w)), interpolation=cv2.INTER_AREA)
+            ok, jpeg = cv2.imencode(".jpg", image, [int(cv2.IMWRITE_JPEG_QUALITY), 70])
+            return "data:image/jpeg;base64," + base64.b64encode(jpeg.tobytes()).decode("ascii") if ok else None
+        except Exception as e:
+            print(f"[WS] Sin miniatura para {path}: {e}")
+            return None
+
+    async def _status_loop(self):
+        """Consulta el estado de las cámaras y lo difunde solo si cambió."""
+        if self.status_provider is None:
+            return
+        while True:
+            try:
+                status = await self._loop.run_in_executor(None, self.status_provider)
+                if status != self._status:
+                    self._status = status
+                    self._broadcast({"type": "status", "cameras": status})
+            except Exception as e:
+                print(f"[WS] Error leyendo estado: {e}")
+            await asyncio.sleep(self.status_interval)
+
+    async def _ping_loop(self):
+        """Un solo temporizador para todos los visores: ping y cierre de los que no responden."""
+        if not self.ping_interval:
+            return
+        ping = encode_frame(OP_PING)
+        while True:
+            await asyncio.sleep(self.ping_interval)
+            now = time.monotonic()
+            for client in list(self._clients):
+                if now - client.last_seen > 2 * self.ping_interval:
+                    client.writer.close()
+                else:
+                    self._send_now(client, ping)
+
+    def _broadcast(self, message: dict):
+        # Se serializa y enmarca una sola vez para todos los visores
+        frame = encode_frame(OP_TEXT, json.dumps(message, ensure_ascii=False).encode("utf-8"))
+        self.messages += 1
+        for client in self._clients:
+            client.push(frame)
+
+    def _send_now(self, client: _Client, frame: bytes):
+        # Tramas de control: directo al transporte, sin pasar por la cola
+        if not client.writer.is_closing():
+            client.writer.write(frame)
+
+    # --- Conexiones ---
+
+    async def _handle(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
+        try:
+            request_line, headers = await asyncio.wait_for(read_http_head(reader), timeout=10)
+            method, target, _ = request_line.split(" ", 2)
+        except (asyncio.TimeoutError, asyncio.IncompleteReadError, asyncio.LimitOverrunError, ProtocolError, ValueError, ConnectionError):
+            writer.close()
+            return
+
+        url = urlparse(target)
+        token = parse_qs(url.query).get("token", [""])[-1]
+        if method != "GET":
+            return await self._http_reply(writer, 405, "text/plain", b"Metodo no permitido")
+        if self.token and token != self.token:
+            self.rejected += 1
+            return await self._http_reply(writer, 401, "text/plain", b"Token invalido")
+        if url.path == "/":
+            return await self._http_reply(writer, 200, "text/html; charset=utf-8", self.generate_html().encode("utf-8"))
+        if url.path == "/status":
+            body = json.dumps({"cameras": self._status, "server": self.get_stats()}, ensure_ascii=False).encode("utf-8")
+            return await self._http_reply(writer, 200, "application/json; charset=utf-8", body)
+        if url.path != "/ws":
+            return await self._http_reply(writer, 404, "text/plain", b"No encontrado")
+
+        key = headers.get("sec-websocket-key")
+        if headers.get("upgrade", "").lower() != "websocket" or not key or headers.get("sec-websocket-version") != "13":
+            self.rejected += 1
+            return await self._http_reply(writer, 426, "text/plain", b"Se requiere WebSocket 13",
+                                          {"Sec-WebSocket-Version": "13"})
+        writer.write(
+            "HTTP/1.1 101 Switching Protocols\r\n"
+            "Upgrade: websocket\r\n"
+            "Connection: Upgrade\r\n"
+            f"Sec-WebSocket-Accept: {accept_key(key)}\r\n\r\n".encode("ascii")
+        )
+        await self._serve_client(reader, writer)
+
+    async def _http_reply(self, writer, status: int, content_type: str, body: bytes, headers: dict = None):
+        reasons = {200: "OK", 401: "Unauthorized", 404: "Not Found", 405: "Method Not Allowed", 426: "Upgrade Required"}
+        extra = "".join(f"{k}: {v}\r\n" for k, v in (headers or {}).items())
+        writer.write(
+            f"HTTP/1.1 {status} {reasons[status]}\r\nContent-Type: {content_type}\r\n"
+            f"Content-Length: {len(body)}\r\nCache-Control: no-store\r\n{extra}Connection: close\r\n\r\n".encode("latin-1") + body
+        )
+        try:
+            await writer.drain()
+        except ConnectionError:
+            pass
+        writer.close()
+
+    async def _serve_client(self, reader, writer):
+        client = _Client(writer, self.max_queue)
+        # Estado inicial: últimos eventos (sin consultar la BD) y estado de cámaras
+        client.push(encode_frame(OP_TEXT, json.dumps({
+            "type": "hello", "title": self.title, "events": list(self._history), "cameras": self._status
+        }, ensure_ascii=False).encode("utf-8")))
+        self._clients.add(client)
+        self.connections += 1
+        self.max_clients = max(self.max_clients, len(self._clients))
+
+        sender = self._loop.create_task(self._sender(client))
+        close_code = 1000
+        try:
+            while True:
+                opcode, payload = await read_message(reader, masked=True)
+                client.last_seen = time.monotonic()
+                if opcode == OP_CLOSE:
+                    break
+                if opcode == OP_PING:
+                    self._send_now(client, encode_frame(OP_PONG, payload))
+                # Texto/binario de los visores y pongs: no se usan
+        except ProtocolError as e:
+            close_code = e.code
+        except (asyncio.IncompleteReadError, ConnectionError):
+            close_code = None
+        finally:
+            self._clients.discard(client)
+            sender.cancel()
+            if close_code is not None:
+                self._send_now(client, encode_frame(OP_CLOSE, struct.pack("!H", close_code)))
+            writer.close()
+
+    async def _sender(self, client: _Client):
+        try:
+            while True:
+                frame = await client.queue.get()
+                client.writer.write(frame)
+                self.frames_sent += 1
+                self.bytes_sent += len(frame)
+                # drain() frena solo a este visor si su red es lenta; mientras
+                # tanto su cola descarta los mensajes más viejos
+                await client.writer.drain()
+        except (ConnectionError, asyncio.CancelledError):
+            pass
+
+    # --- Métricas ---
+
+    def get_stats(self) -> dict:
+        clients = list(self._clients)
+        return {
+            "clients": len(clients),
+            "max_clients": self.max_clients,
+            "connections": self.connections,
+            "messages": self.messages,
+            "frames_sent": self.frames_sent,
+            "bytes_sent": self.bytes_sent,
+            "dropped": sum(c.dropped for c in clients),
+            "max_queue_depth": max((c.queue.qsize() for c in clients), default=0),
+            "rejected": self.rejected,
+        }
+
+    def print_stats(self):
+        s = self.get_stats()
+        print(f"[WS] visores={s['clients']} (máx {s['max_clients']}) mensajes={s['messages']} "
+              f"tramas={s['frames_sent']} enviados={s['bytes_sent'] / 1024:.0f} KB "
+              f"descartados={s['dropped']} cola_máx={s['max_queue_depth']}")
+
+    # --- Tablero ---
 
     def generate_html(self):
-        html =  '''
-                <html>
-                    <head>
-                        <title>
-                    </head>
-                </html>
-                '''
\ No newline at end of file
+        title = html.escape(self.title)
+        html_doc = '''<!DOCTYPE html>
+<html>
+    <head>
+        <meta charset="UTF-8">
+        <meta name="viewport" content="width=device-width, initial-scale=1">
+        <title>__TITLE__</title>
+        <style>
+            body {font-family: Helvetica, Arial, sans-serif; margin: 0; background: #1e1e1e; color: #eee;}
+            header {padding: 12px 20px; background: #111; display: flex; justify-content: space-between;}
+            #conn {color: #aaa; font-size: 13px;}
+            main {display: grid; grid-template-columns: 280px 1fr; gap: 16px; padding: 16px 20px;}
+            h2 {font-size: 15px; margin: 0 0 8px;}
+            .cam {padding: 6px 8px; margin-bottom: 4px; background: #2a2a2a; border-left: 4px solid #777; font-size: 13px;}
+            .cam.conectada {border-color: #2e7d32;} .cam.degradada {border-color: #f9a825;}
+            .cam.offline {border-color: #c62828;}
+            .cam small {color: #aaa; display: block;}
+            #events {display: grid; grid-template-columns: repeat(auto-fill, minmax(240px, 1fr)); gap: 10px;}
+            .ev {background: #2a2a2a; padding: 6px; font-size: 13px;}
+            .ev img {width: 100%; display: block; margin-bottom: 4px;}
+            .ev.new {outline: 2px solid #f9a825;}
+        </style>
+    </head>
+    <body>
+        <header><strong>__TITLE__</strong><span id="conn">Conectando...</span></header>
+        <main>
+            <section><h2>Cámaras</h2><div id="cameras"></div></section>
+            <section><h2>Eventos</h2><div id="events"></div></section>
+        </main>
+        <script>
+            const MAX_EVENTS = 100;
+            let names = {}, delay = 1000;
+            const text = (tag, value, cls) => {
+                const el = document.createElement(tag);
+                el.textContent = value;
+                if (cls) el.className = cls;
+                return el;
+            };
+            function renderCameras(cameras) {
+                const box = document.getElementById("cameras");
+                box.replaceChildren();
+                for (const [id, cam] of Object.entries(cameras || {})) {
+                    names[id] = cam.name;
+                    const state = cam.state || "sin datos";
+                    const el = text("div", cam.name, "cam " + (state === "sin conexión" ? "offline" : state));
+                    el.appendChild(text("small", state + (cam.monitor_hz ? " | " + cam.monitor_hz.toFixed(2) + " inf/s" : "")));
+                    box.appendChild(el);
+                }
+            }
+            function addEvent(ev, isNew) {
+                const box = document.getElementById("events");
+                const el = document.createElement("div");
+                el.className = "ev" + (isNew ? " new" : "");
+                if (ev.thumbnail) {
+                    const img = document.createElement("img");
+                    img.src = ev.thumbnail;
+                    el.appendChild(img);
+                }
+                el.appendChild(text("div", ev.description));
+                el.appendChild(text("small", ev.timestamp + " | " + (names[ev.camera_id] || "Cámara " + ev.camera_id)));
+                if (isNew) box.prepend(el); else box.appendChild(el);
+                while (box.children.length > MAX_EVENTS) box.lastChild.remove();
+            }
+            function connect() {
+                const token = new URLSearchParams(location.search).get("token");
+                const url = (location.protocol === "https:" ? "wss://" : "ws://") + location.host + "/ws" +
+                            (token ? "?token=" + encodeURIComponent(token) : "");
+                const ws = new WebSocket(url);
+                const conn = document.getElementById("conn");
+                ws.onopen = () => { conn.textContent = "En vivo"; delay = 1000; };
+                ws.onmessage = (msg) => {
+                    const data = JSON.parse(msg.data);
+                    if (data.type === "hello") {
+                        renderCameras(data.cameras);
+                        document.getElementById("events").replaceChildren();
+                        data.events.forEach((ev) => addEvent(ev, false));
+                    } else if (data.type === "status") {
+                        renderCameras(data.cameras);
+                    } else if (data.type === "event") {
+                        addEvent(data.event, true);
+                    }
+                };
+                ws.onclose = () => {
+                    conn.textContent = "Desconectado, reintentando...";
+                    setTimeout(connect, delay);
+                    delay = Math.min(delay * 2, 30000);
+                };
+            }
+            connect();
+        </script>
+    </body>
+</html>
+'''
+        return html_doc.replace("__TITLE__", title)
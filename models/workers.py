@@ -0,0 +1,392 @@
+import itertools
+import multiprocessing as mp
+import os
+import queue
+import threading
+import time
+from collections import deque
+from multiprocessing import shared_memory
+import numpy as np
+from models.inference import InferenceRequest
+
+SLOT_IDLE = 120.0   # Segundos sin uso tras los que se libera el bloque de una cámara
+
+def _attach(name: str) -> shared_memory.SharedMemory:
+    """Abre un bloque creado por el proceso principal sin que el worker lo libere al salir."""
+    shm = shared_memory.SharedMemory(name=name)
+    if os.name != "nt":
+        try:
+            from multiprocessing import resource_tracker
+            resource_tracker.unregister(shm._name, "shared_memory")
+        except Exception:
+            pass
+    return shm
+
+def _worker_main(index: int, detector_args: dict, max_batch: int, tasks, results):
+    """
+    Proceso de inferencia: carga los modelos UNA vez y atiende las cámaras
+    asignadas. Los frames llegan por memoria compartida, no por pickle.
+    """
+    from models.detector import create_detector
+    try:
+        detector = create_detector(**detector_args)
+    except Exception as e:
+        results.put(("fatal", index, repr(e)))
+        return
+    results.put(("ready", index, None))
+
+    attached = {}
+
+    def forget(shm_name):
+        # El proceso principal liberó el bloque (cambio de tamaño o hilo terminado)
+        shm = attached.pop(shm_name, None)
+        if shm is not None:
+            shm.close()
+
+    while True:
+        task = tasks.get()
+        if task is None:
+            break
+        if task[0] == "release":
+            forget(task[1])
+            continue
+        batch = [task]
+        # Juntar lo que ya esté en cola para hacer una sola pasada
+        while len(batch) < max_batch:
+            try:
+                task = tasks.get_nowait()
+            except queue.Empty:
+                break
+            if task is None:
+                tasks.put(None)
+                break
+            if task[0] == "release":
+                forget(task[1])
+                continue
+            batch.append(task)
+
+        frames, ids = [], []
+        for request_id, shm_name, shape, dtype in batch:
+            try:
+                shm = attached.get(shm_name)
+                if shm is None:
+                    shm = attached[shm_name] = _attach(shm_name)
+                frames.append(np.ndarray(shape, dtype=dtype, buffer=shm.buf))
+                ids.append(request_id)
+            except Exception as e:
+                # Bloque inexistente o inválido: falla solo esta petición
+                results.put(("error", request_id, repr(e)))
+        if not frames:
+            continue
+
+        try:
+            detections = detector.detect_batch(frames)
+            for request_id, det in zip(ids, detections):
+                results.put(("ok", request_id, (det.boxes, det.classes, det.scores)))
+        except Exception as e:
+            for request_id in ids:
+                results.put(("error", request_id, repr(e)))
+        del frames
+
+    for shm in attached.values():
+        shm.close()
+
+class _FrameSlot:
+    """Bloque de memoria compartida reutilizable para los frames de una cámara o mosaico."""
+    def __init__(self, nbytes: int, shard: int):
+        self.shm = shared_memory.SharedMemory(create=True, size=nbytes)
+        self.nbytes = nbytes
+        self.shard = shard              # Worker que lo tiene abierto
+        self.busy = threading.Lock()    # Tomado desde que se copia el frame hasta el resultado
+        self.last_used = time.monotonic()
+
+    def release(self):
+        self.shm.close()
+        try:
+            self.shm.unlink()
+        except FileNotFoundError:
+            pass
+
+class ProcessInferencePool:
+    """
+    Backend opcional multiproceso (evita el GIL con 10+ cámaras). N procesos
+    cargan los modelos una vez; las cámaras se reparten entre ellos de forma
+    fija. Expone la misma interfaz que InferenceScheduler.
+    """
+    def __init__(self, detector_args: dict, workers: int = 2, max_batch: int = 8, stats_interval: float = 30):
+        from models.detector import Detections
+        self._Detections = Detections
+        self.detector_args = detector_args
+        self.workers = max(1, int(workers))
+        self.max_batch = max(1, int(max_batch))
+        self.stats_interval = stats_interval
+
+        ctx = mp.get_context("spawn")
+        self._ctx = ctx
+        self._tasks = [ctx.Queue() for _ in range(self.workers)]
+        self._results = ctx.Queue()
+        self._processes = []
+
+        self._ids = itertools.count(1)
+        self._pending = {}           # request_id -> (InferenceRequest, slot, worker)
+        self._pending_lock = threading.Lock()
+        self._shards = {}            # camera_id -> índice de worker
+        self._slots = {}             # camera_id (o (camera_id, mosaico)) -> _FrameSlot
+        self._slots_lock = threading.Lock()
+
+        self._stop = threading.Event()
+        self._collector = None
+        self._ready = threading.Event()     # Todos los workers respondieron al cargar
+        self._loaded = 0
+        self._load_errors = []
+        self._worker_ready = [False] * self.workers
+        self._dead = set()           # Workers que murieron al cargar: no se reinician
+        self.respawns = 0
+
+        # --- Métricas ---
+        self._stats_lock = threading.Lock()
+        self._history = deque(maxlen=200)  # (fin, latencia_s)
+        self.total_frames = 0
+        self._last_report = time.perf_counter()
+
+    def start(self):
+        if self._processes:
+            return
+        self._stop.clear()
+        # Exportar ONNX/OpenVINO aquí, una vez, antes de que los workers los carguen
+        from models.detector import prepare_models
+        prepare_models(**self.detector_args)
+        self._processes = [self._spawn(i) for i in range(self.workers)]
+        self._collector = threading.Thread(target=self._collect, name="InferenceCollector", daemon=True)
+        self._collector.start()
+        print(f"[INFERENCIA] {self.workers} procesos de detección iniciados")
+
+    def _spawn(self, index: int):
+        p = self._ctx.Process(
+            target=_worker_main,
+            args=(index, self.detector_args, self.max_batch, self._tasks[index], self._results),
+            name=f"InferenceWorker-{index}",
+            daemon=True
+        )
+        p.start()
+        return p
+
+    def stop(self, timeout: float = 5):
+        self._stop.set()
+        for q in self._tasks:
+            q.put(None)
+        for p in self._processes:
+            p.join(timeout=timeout)
+            if p.is_alive():
+                p.terminate()
+        self._processes = []
+        if self._collector:
+            self._collector.join(timeout=1)
+        with self._pending_lock:
+            pending = list(self._pending.values())
+            self._pending.clear()
+        for request, slot, _ in pending:
+            request.set_error(RuntimeError("Planificador detenido"))
+            slot.busy.release()
+        with self._slots_lock:
+            for slot in self._slots.values():
+                slot.release()
+            self._slots.clear()
+
+    def wait_ready(self, timeout: float = None):
+        """Espera a que todos los workers carguen sus modelos. Lanza error si alguno falló."""
+        if not self._ready.wait(timeout):
+            raise TimeoutError("Los procesos de inferencia no terminaron de cargar")
+        if self._load_errors:
+            raise RuntimeError(self._load_errors[0])
+
+    def _shard(self, camera_id) -> int:
+        if camera_id not in self._shards:
+            # Reparto fijo: cada cámara siempre va al mismo proceso
+            self._shards[camera_id] = len(self._shards) % self.workers
+        return self._shards[camera_id]
+
+    def _free_slot(self, slot: _FrameSlot):
+        """Libera un bloque que nadie está usando y avisa a su worker para que lo cierre."""
+        try:
+            self._tasks[slot.shard].put(("release", slot.shm.name))
+        except (OSError, ValueError):
+            pass
+        slot.release()
+
+    def _reap_slots(self):
+        """Libera los bloques sin uso hace SLOT_IDLE s (cámara borrada, zonas cambiadas) con _slots_lock tomado."""
+        now = time.monotonic()
+        for key, slot in list(self._slots.items()):
+            if now - slot.last_used > SLOT_IDLE and slot.busy.acquire(blocking=False):
+                del self._slots[key]
+                self._free_slot(slot)
+
+    def _acquire_slot(self, camera_id, nbytes: int, timeout: float = 30) -> _FrameSlot | None:
+        """
+        Bloque de la cámara (o mosaico), ya tomado (busy). Si la vista en vivo y
+        el monitor de una cámara envían a la vez, el segundo espera al primero.
+        Si el frame no cabe se reemplaza, pero solo después de tomarlo: así
+        ningún worker está leyendo el bloque viejo cuando se libera.
+        """
+        shard = self._shard(camera_id)
+        deadline = time.monotonic() + timeout
+        while True:
+            with self._slots_lock:
+                self._reap_slots()
+                slot = self._slots.get(camera_id)
+                if slot is None:
+                    slot = self._slots[camera_id] = _FrameSlot(nbytes, shard)
+            if not slot.busy.acquire(timeout=max(0.0, deadline - time.monotonic())):
+                return None
+            with self._slots_lock:
+                current = self._slots.get(camera_id) is slot
+            if current:
+                break
+            # Otro emisor lo reemplazó (o se liberó) mientras se esperaba
+            slot.busy.release()
+        if slot.nbytes < nbytes:
+            new_slot = _FrameSlot(nbytes, shard)
+            new_slot.busy.acquire()
+            with self._slots_lock:
+                self._slots[camera_id] = new_slot
+            self._free_slot(slot)
+            # Los que esperaban el bloque viejo lo ven reemplazado y toman el nuevo
+            slot.busy.release()
+            slot = new_slot
+        slot.last_used = time.monotonic()
+        return slot
+
+    def submit(self, camera_id, frame) -> InferenceRequest:
+        request = InferenceRequest(camera_id, frame)
+        if self._stop.is_set() or not self._processes:
+            request.set_error(RuntimeError("Planificador detenido"))
+            return request
+        if self._shard(camera_id) in self._dead:
+            request.set_error(RuntimeError(f"El worker de la cámara {camera_id} no pudo cargar los modelos"))
+            return request
+
+        frame = np.ascontiguousarray(frame)
+        # El slot queda ocupado hasta que vuelva el resultado
+        slot = self._acquire_slot(camera_id, frame.nbytes)
+        if slot is None:
+            request.set_error(TimeoutError(f"Worker sin respuesta para cámara {camera_id}"))
+            return request
+        np.ndarray(frame.shape, dtype=frame.dtype, buffer=slot.shm.buf)[...] = frame
+
+        request_id = next(self._ids)
+        # Registro y envío juntos: _check_workers cambia la cola de un worker caído
+        # con este mismo candado, así ninguna petición queda en una cola muerta
+        with self._pending_lock:
+            self._pending[request_id] = (request, slot, slot.shard)
+            self._tasks[slot.shard].put((request_id, slot.shm.name, frame.shape, frame.dtype.str))
+        return request
+
+    def detect(self, camera_id, frame, timeout: float = None):
+        return self.submit(camera_id, frame).wait(timeout)
+
+    def _collect(self):
+        """Recibe las detecciones de los workers y despierta a cada cámara."""
+        last_check = time.monotonic()
+        while not self._stop.is_set():
+            if time.monotonic() - last_check >= 1.0:
+                last_check = time.monotonic()
+                self._check_workers()
+            try:
+                kind, key, payload = self._results.get(timeout=0.5)
+            except queue.Empty:
+                continue
+            except (EOFError, OSError):
+                break
+
+            if kind in ("ready", "fatal"):
+                self._worker_loaded(key, payload if kind == "fatal" else None)
+                continue
+
+            with self._pending_lock:
+                entry = self._pending.pop(key, None)
+            if entry is None:
+                continue
+            request, slot, _ = entry
+            slot.busy.release()
+
+            if kind == "ok":
+                request.set_result(self._Detections(*payload))
+            else:
+                request.set_error(RuntimeError(payload))
+
+            end = time.perf_counter()
+            with self._stats_lock:
+                self._history.append((end, end - request.submitted_at))
+                self.total_frames += 1
+            if self.stats_interval and end - self._last_report >= self.stats_interval:
+                self._last_report = end
+                self._print_stats()
+
+    def _worker_loaded(self, index: int, error: str = None):
+        if index in self._dead:
+            return      # Ya contado ("fatal" y la salida del proceso llegan por separado)
+        if error is not None:
+            print(f"[INFERENCIA] El worker {index} no pudo cargar los modelos: {error}")
+            self._load_errors.append(error)
+            self._dead.add(index)
+        else:
+            self._worker_ready[index] = True
+        if not self._ready.is_set():
+            self._loaded += 1
+            if self._loaded >= self.workers:
+                self._ready.set()
+
+    def _check_workers(self):
+        """Detecta workers caídos: falla sus peticiones, libera sus bloques y los reinicia."""
+        for index, p in enumerate(list(self._processes)):
+            if p.exitcode is None or index in self._dead or self._stop.is_set():
+                continue
+            was_ready = self._worker_ready[index]
+            with self._pending_lock:
+                if self._processes[index] is not p:
+                    continue
+                failed = [(rid, entry) for rid, entry in self._pending.items() if entry[2] == index]
+                for rid, _ in failed:
+                    del self._pending[rid]
+                # Cola nueva: las tareas que quedaron en la vieja ya se fallaron aquí
+                self._tasks[index] = self._ctx.Queue()
+                self._worker_ready[index] = False
+                if was_ready:
+                    self._processes[index] = self._spawn(index)
+                    self.respawns += 1
+            for _, (request, slot, _) in failed:
+                request.set_error(RuntimeError(f"El worker {index} terminó (código {p.exitcode})"))
+                slot.busy.release()
+            if was_ready:
+                print(f"[INFERENCIA] El worker {index} terminó (código {p.exitcode}); "
+                      f"{len(failed)} peticiones fallidas, reiniciado")
+            else:
+                # Murió al cargar: no se reinicia en bucle; sus cámaras fallan rápido
+                self._worker_loaded(index, f"El worker {index} terminó al cargar (código {p.exitcode})")
+
+    def get_stats(self) -> dict:
+        with self._stats_lock:
+            history = list(self._history)
+            total = self.total_frames
+        stats = {
+            "workers": self.workers,
+            "respawns": self.respawns,
+            "frames": total,
+            "pending": len(self._pending),
+            "avg_latency_ms": 0.0,
+            "throughput_fps": 0.0,
+        }
+        if len(history) > 1:
+            span = history[-1][0] - history[0][0]
+            stats["avg_latency_ms"] = sum(lat for _, lat in history) / len(history) * 1000
+            stats["throughput_fps"] = (len(history) - 1) / span if span > 0 else 0.0
+        return stats
+
+    def _print_stats(self):
+        s = self.get_stats()
+        print(
+            f"[INFERENCIA] procesos={s['workers']} frames={s['frames']} "
+            f"latencia={s['avg_latency_ms']:.0f}ms rendimiento={s['throughput_fps']:.1f} fps "
+            f"pendientes={s['pending']}"
+        )
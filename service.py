@@ -0,0 +1,79 @@
+"""
+Servicio de detección sin interfaz: captura, inferencia, seguimiento y
+eventos de todas las cámaras, más una API HTTP para la ventana de cámaras en
+modo cliente (service_url en config.json) u otras herramientas.
+
+Uso (desde la raíz del proyecto):
+    python -m service --host 0.0.0.0 --port 8765
+"""
+import argparse
+import os
+import signal
+import sys
+import threading
+from multiprocessing import freeze_support
+from database.database import Database
+from functions.functions import get_storage_path
+from functions.config import get_config
+from models.api import ServiceApi
+from models.pipeline import DetectionPipeline
+
+def resource_path(relative_path):
+    try:
+        base_path = sys._MEIPASS
+    except Exception:
+        base_path = os.path.abspath(".")
+    return os.path.join(base_path, relative_path)
+
+def main():
+    config = get_config()
+    parser = argparse.ArgumentParser(description="Servicio de detección sin interfaz")
+    parser.add_argument("--host", default=config["service_host"])
+    parser.add_argument("--port", type=int, default=config["service_port"])
+    parser.add_argument("--ws-port", type=int, default=config["ws_port"], help="Tablero web en vivo (0 = desactivado)")
+    args = parser.parse_args()
+
+    storage_dir = get_storage_path()
+    print(f"[SISTEMA] Guardando datos en: {storage_dir}")
+    db = Database(os.path.join(storage_dir, "vigilancia_data.db"))
+    pipeline = DetectionPipeline(db, storage_dir, config, dict(
+        mode=config["detector_mode"],
+        person_model_path=config["person_model"],
+        forklift_model_path=resource_path(config["forklift_model"]),
+        fused_model_path=resource_path(config["fused_model"]),
+        runtime=config["inference_runtime"],
+        warmup_runs=config["warmup_runs"]
+    ))
+    pipeline.event_sink.add_listener(lambda ev: print(f"[EVENTO] {ev.timestamp} cámara {ev.camera_id}: {ev.description}"))
+    pipeline.start()
+    pipeline.sync(db.get_all_cameras())
+
+    api = ServiceApi(pipeline, db, host=args.host, port=args.port, token=config["service_token"])
+    api.start()
+    if args.ws_port:
+        pipeline.start_push_server("Sistema de Vigilancia", config["ws_host"], args.ws_port,
+                                   token=config["service_token"], history=config["ws_history"])
+
+    stop = threading.Event()
+    signal.signal(signal.SIGINT, lambda *_: stop.set())
+    signal.signal(signal.SIGTERM, lambda *_: stop.set())
+
+    try:
+        pipeline.load_models()
+    except Exception as e:
+        print(f"[MODELOS] Detección desactivada: {e}")
+
+    interval = config["stats_interval_s"]
+    while not stop.wait(interval or 1.0):
+        if interval:
+            pipeline.print_stats()
+
+    print("[SISTEMA] Deteniendo servicio...")
+    api.stop()
+    pipeline.shutdown()
+    db.close()
+
+# Protección necesaria para los procesos de inferencia (spawn en Windows / PyInstaller)
+if __name__ == "__main__":
+    freeze_support()
+    main()
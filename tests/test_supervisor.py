@@ -0,0 +1,56 @@
+"""
+Pruebas del planificador de monitores (models/supervisor).
+
+Uso (desde la raíz del proyecto):
+    python -m unittest tests.test_supervisor
+"""
+import time
+import types
+import unittest
+from models.supervisor import DetectionSupervisor
+
+class _Task:
+    def __init__(self, camera):
+        self.camera = camera
+        self.steps = 0
+        self.closed = False
+
+    def step(self) -> float:
+        self.steps += 1
+        time.sleep(0.02)
+        return 0.1
+
+    def close(self):
+        self.closed = True
+
+def _camera(name: str):
+    return types.SimpleNamespace(id=1, name=name, ip="10.0.0.1", port=554, username="u", password="p")
+
+class ResyncTest(unittest.TestCase):
+    def setUp(self):
+        self.supervisor = DetectionSupervisor(_Task, workers=4, start_spread=0.5)
+        self.supervisor.start()
+
+    def tearDown(self):
+        self.supervisor.stop()
+
+    def test_edited_camera_keeps_a_single_chain(self):
+        self.supervisor.sync([_camera("a")])
+        time.sleep(0.7)
+        old = self.supervisor._tasks[1][1]
+        for name in ("b", "c", "d"):
+            self.supervisor.sync([_camera(name)])
+        time.sleep(1.0)
+        new = self.supervisor._tasks[1][1]
+        with self.supervisor._cond:
+            entries = [entry for entry in self.supervisor._heap if entry[2] == 1]
+        self.assertLessEqual(len(entries), 1)
+        self.assertTrue(old.closed)
+        steps = old.steps
+        time.sleep(0.5)
+        # La tarea retirada ya no corre; la nueva sí
+        self.assertEqual(old.steps, steps)
+        self.assertGreater(new.steps, 0)
+
+if __name__ == "__main__":
+    unittest.main()
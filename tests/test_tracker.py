@@ -0,0 +1,49 @@
+"""
+Pruebas del seguimiento por cámara (models/tracker).
+
+Uso (desde la raíz del proyecto):
+    python -m unittest tests.test_tracker
+"""
+import unittest
+from functions.proximity import Violation, PERSON_FORKLIFT
+from models.detector import Detections, PERSON, FORKLIFT
+from models.tracker import Tracker
+
+PERSON_BOX = [100, 100, 140, 200]
+FORKLIFT_BOX = [150, 100, 250, 200]
+
+class NewIncidentsTest(unittest.TestCase):
+    def setUp(self):
+        self.tracker = Tracker(forklift_conf=0.5, max_age=60, incident_gap=5.0)
+
+    def _frame(self, now: float) -> tuple:
+        tracks = self.tracker.update(
+            Detections([PERSON_BOX, FORKLIFT_BOX], [PERSON, FORKLIFT], [0.9, 0.9]), now=now
+        )
+        persons = [t for t in tracks if t.cls == PERSON]
+        forklifts = [t for t in tracks if t.cls == FORKLIFT]
+        return persons, forklifts
+
+    def _near(self, now: float) -> list:
+        persons, forklifts = self._frame(now)
+        return self.tracker.new_incidents([Violation(PERSON_FORKLIFT, 0, 0, 0.01)], persons, forklifts, now=now)
+
+    def test_same_incident_reported_once(self):
+        self.assertEqual(len(self._near(0.0)), 1)
+        self.assertEqual(self._near(1.0), [])
+        self.assertEqual(self._near(2.0), [])
+
+    def test_separate_gap_reapproach_is_new_incident(self):
+        self.assertEqual(len(self._near(0.0)), 1)
+        # El par sigue visto pero lejos (sin violaciones) más que incident_gap
+        for now in (2.0, 4.0, 6.0, 8.0):
+            self._frame(now)
+        self.assertEqual(len(self._near(10.0)), 1)
+
+    def test_reapproach_without_intermediate_frames(self):
+        # Aunque no haya frames entre medio, el tiempo transcurrido decide
+        self.assertEqual(len(self._near(0.0)), 1)
+        self.assertEqual(len(self._near(5.5)), 1)
+
+if __name__ == "__main__":
+    unittest.main()
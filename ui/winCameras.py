@@ -2,19 +2,17 @@
 import tkinter as tk
 from tkinter import ttk, messagebox
 import threading
-import cv2
 from PIL import Image, ImageTk
-from ultralytics import YOLO
-import sys, os, uuid
-import glob
-import os
-from tkinter import filedialog
+import sys, os
 from models.camera import Camera
 from database.database import Database
 from models.event import Event
-import math
 import time
-from datetime import datetime
+from functions.functions import get_storage_path
+from functions.config import get_config
+from database.remote import RemoteDatabase
+# cv2, numpy y el pipeline (captura, render) se importan donde se usan: así
+# importar la ventana no paga el arranque de OpenCV (ver benchmarks/bench_import)
 
 def resource_path(relative_path):
     try:
@@ -23,20 +21,6 @@ def resource_path(relative_path):
         base_path = os.path.abspath(".")
     return os.path.join(base_path, relative_path)
 
-def get_storage_path():
-    '''
-    Retorna la ruta: C:/Users/Usuario/Documents/SistemaVigilancia
-    Crea la carpeta si no existe.
-    '''
-    # Obtiene la ruta a "Mis Documentos" de forma universal
-    user_docs = os.path.join(os.path.expanduser("~"), "Documents")
-    # Define el nombre de tu carpeta principal
-    app_folder = os.path.join(user_docs, "SistemaVigilancia")
-    # Crea la carpeta si no existe
-    if not os.path.exists(app_folder):
-        os.makedirs(app_folder)
-    return app_folder
-
 class WinCameras(ttk.Frame):
     def __init__(self, master):
         super().__init__(master)
@@ -44,21 +28,43 @@ class WinCameras(ttk.Frame):
         self.storage_dir = get_storage_path()
         print(f"[SISTEMA] Guardando datos en: {self.storage_dir}")
         self.current_stream_id = 0
-        db_path = os.path.join(self.storage_dir, "vigilancia_data.db")
-
-        self.db = Database(db_path)
         self.cameras_map = {}
         self.video_thread = None
         self.stop_thread = threading.Event()
-        self.yolo_model = None
         self._shown_event_ids = set()  # Guardar eventos ya mostrados
-
-        try:
-            self.yolo_model = YOLO(resource_path('models/best.pt'))
-            self.yolo_person = YOLO("yolov8n.pt")  # Detecta personas
-        except Exception as e:
-            messagebox.showerror("Error de Modelo", f"No se pudo cargar el modelo YOLO 'models/best.pt' o bien, 'yolov8n.pt'.\n{e}")
-            return
+        self._events_generation = 0     # Invalida sondeos de la cámara anterior
+        self._last_event_id = 0         # Id más alto mostrado en la lista de eventos
+
+        config = get_config()
+        # Con service_url la ventana es solo cliente del servicio sin interfaz
+        # (python -m service): cámaras y eventos por su API, vista en vivo
+        # como JPEG. Sin él, el pipeline de detección corre en este proceso.
+        self.service_url = config["service_url"]
+        self._remote_status = (None, None, 0)   # (camera_id, estado, reconexiones)
+        if self.service_url:
+            self.db = RemoteDatabase(self.service_url, os.path.join(self.storage_dir, "remote_cache"),
+                                     token=config["service_token"])
+            self.pipeline = None
+            self.preview_interval = 1 / max(0.1, config["remote_preview_fps"])
+        else:
+            from models.pipeline import DetectionPipeline
+            self.db = Database(os.path.join(self.storage_dir, "vigilancia_data.db"))
+            self.pipeline = DetectionPipeline(self.db, self.storage_dir, config, dict(
+                mode=config["detector_mode"],
+                person_model_path=config["person_model"],
+                forklift_model_path=resource_path(config["forklift_model"]),
+                fused_model_path=resource_path(config["fused_model"]),
+                runtime=config["inference_runtime"],
+                warmup_runs=config["warmup_runs"]
+            ))
+            # Escritura de eventos (imagen + BD) fuera de los hilos de detección
+            self.pipeline.event_sink.add_listener(self._on_event_written)
+
+        # Lista de eventos: carga inicial y sondeo opcional (0 = solo eventos empujados).
+        # En modo cliente no hay EventSink local: siempre se sondea el servicio.
+        self.events_initial_limit = config["events_initial_limit"]
+        poll_s = max(config["events_poll_s"], 2.0) if self.service_url else config["events_poll_s"]
+        self.events_poll_ms = int(poll_s * 1000)
 
         # === Layout principal ===
         main_frame = ttk.Frame(self)
@@ -74,6 +80,15 @@ class WinCameras(ttk.Frame):
         self.camera_name_label = ttk.Label(left_frame, text="", font=("Helvetica", 12, "bold"))
         self.camera_name_label.pack(fill=tk.X, pady=(0, 5))
 
+        # Estado de carga de los modelos
+        status = f"🌐 Cliente del servicio {self.service_url}" if self.service_url else "⏳ Cargando modelos..."
+        self.status_label = ttk.Label(left_frame, text=status, font=("Helvetica", 9), foreground="gray")
+        self.status_label.pack(fill=tk.X, pady=(0, 5))
+
+        # Frecuencia de análisis actual de la cámara seleccionada
+        self.rate_label = ttk.Label(left_frame, text="", font=("Helvetica", 9), foreground="gray")
+        self.rate_label.pack(fill=tk.X, pady=(0, 5))
+
         self.video_label = ttk.Label(
             left_frame,
             text="Seleccione una cámara",
@@ -83,6 +98,10 @@ class WinCameras(ttk.Frame):
             foreground="white"
         )
         self.video_label.pack(fill=tk.BOTH, expand=True)
+        # Tk pinta el último frame a display_fps; el hilo de video solo lo publica
+        from models.render import FrameRenderer
+        self.renderer = FrameRenderer(self.video_label, fps=config["display_fps"])
+        self.renderer.start()
 
         # Panel derecho (lista de cámaras + eventos)
         right_frame = ttk.Frame(main_frame)
@@ -114,10 +133,36 @@ class WinCameras(ttk.Frame):
         self.edit_button.pack(side=tk.LEFT, padx=5)
         self.delete_button = ttk.Button(button_frame, text="Eliminar", state="disabled", command=self._delete_camera)
         self.delete_button.pack(side=tk.LEFT, padx=5)
+        self.roi_button = ttk.Button(button_frame, text="Zonas", state="disabled", command=self._show_roi_editor)
+        self.roi_button.pack(side=tk.LEFT, padx=5)
 
         # Llenar lista inicial
+        if self.pipeline is not None:
+            # Los monitores arrancan ya; detectan cuando terminen de cargar los modelos
+            self.pipeline.start()
+            threading.Thread(target=self._load_models, name="ModelLoader", daemon=True).start()
+            self._log_capture_stats(config["stats_interval_s"])
         self._populate_camera_list()
-        self._start_background_detection()
+        if self.pipeline is not None and config["ws_port"]:
+            try:
+                self.pipeline.start_push_server("Sistema de Vigilancia", config["ws_host"], config["ws_port"],
+                                                token=config["service_token"], history=config["ws_history"])
+            except OSError as e:
+                print(f"[WS] No se pudo iniciar el tablero: {e}")
+        self._refresh_rate_label()
+
+    def _load_models(self):
+        """Carga los modelos (importa ultralytics/torch) fuera del hilo de la UI."""
+        try:
+            elapsed = self.pipeline.load_models()
+        except Exception as e:
+            self.after(0, self._on_models_failed, e)
+            return
+        self.after(0, lambda: self.status_label.config(text=f"✅ Modelos listos ({elapsed:.1f}s)"))
+
+    def _on_models_failed(self, error):
+        self.status_label.config(text="❌ Detección desactivada: no se pudieron cargar los modelos")
+        messagebox.showerror("Error de Modelo", f"No se pudo cargar el modelo YOLO 'models/best.pt' o bien, 'yolov8n.pt'.\n{error}")
 
     # --- winCameras.py ---
     def _on_exit(self):
@@ -145,11 +190,20 @@ class WinCameras(ttk.Frame):
         self._stop_video_thread()
         self.camera_listbox.delete(0, tk.END)
         self.cameras_map.clear()
-        cameras = self.db.get_all_cameras()
+        try:
+            cameras = self.db.get_all_cameras()
+        except Exception as e:
+            # Modo cliente con el servicio caído: la lista queda vacía
+            print(f"[REMOTO] No se pudieron leer las cámaras: {e}")
+            cameras = []
         for cam in cameras:
             self.camera_listbox.insert(tk.END, cam.name)
             self.cameras_map[cam.name] = cam
         self._on_camera_select(None)
+        # Alta, baja o cambio de cámaras: ajustar los monitores sin reiniciar
+        # (en modo cliente lo hace el servicio al recibir el cambio)
+        if self.pipeline is not None:
+            self.pipeline.sync(cameras)
 
     def _on_camera_select(self, event):
         selected = self.camera_listbox.curselection()
@@ -158,6 +212,7 @@ class WinCameras(ttk.Frame):
         if selected:
             self.edit_button.config(state="normal")
             self.delete_button.config(state="normal")
+            self.roi_button.config(state="normal")
             name = self.camera_listbox.get(selected[0])
             cam = self.cameras_map[name]
 
@@ -173,6 +228,7 @@ class WinCameras(ttk.Frame):
             self.current_camera = None
             self.edit_button.config(state="disabled")
             self.delete_button.config(state="disabled")
+            self.roi_button.config(state="disabled")
             self.camera_name_label.config(text="")
             self.events_tree.delete(*self.events_tree.get_children())
 
@@ -186,21 +242,18 @@ class WinCameras(ttk.Frame):
         self.current_camera = camera
         self.current_stream_id += 1
         stream_id = self.current_stream_id
+        render_token = self.renderer.reset(f"Conectando {camera.name}...")
 
-        if camera.ip.strip() == "0":
-                source = 0
-        else:
-            source = camera.get_rtsp_url()
-
-        print(f"[INFO] Conectando a cámara: {camera.name} ({source})")
+        from models.capture import get_source
+        print(f"[INFO] Conectando a cámara: {camera.name} ({get_source(camera)})")
 
         # Destruir controles viejos si existen (limpieza)
         if hasattr(self, "video_controls_frame") and self.video_controls_frame.winfo_exists():
             self.video_controls_frame.destroy()
 
         self.video_thread = threading.Thread(
-            target=self._video_loop, 
-            args=(camera, stream_id), 
+            target=self._remote_video_loop if self.pipeline is None else self._video_loop,
+            args=(camera, stream_id, render_token), 
             daemon=True
         )
         self.video_thread.start()
@@ -213,217 +266,118 @@ class WinCameras(ttk.Frame):
         self.video_thread = None
         self.current_video = None
         
-        # Limpiar la etiqueta de video de forma segura
-        if hasattr(self, "video_label") and self.video_label.winfo_exists():
+        # Limpiar la etiqueta de video de forma segura (descarta frames pendientes)
+        if hasattr(self, "renderer") and self.video_label.winfo_exists():
             try:
-                self.video_label.config(image='', text="Seleccione una cámara")
-                self.video_label.image = None
+                self.renderer.reset("Seleccione una cámara")
             except Exception as e:
                 print(f"Advertencia al limpiar video: {e}")
 
         if hasattr(self, "video_controls_frame") and self.video_controls_frame.winfo_exists():
             self.video_controls_frame.destroy()
 
-        # Limpiar la etiqueta de video
-        if hasattr(self, "video_label") and self.video_label.winfo_exists():
-            self.video_label.config(image=None, text="Seleccione una cámara")
-            self.video_label.image = None
-
-        if hasattr(self, "video_controls_frame") and self.video_controls_frame.winfo_exists():
-            self.video_controls_frame.destroy()
-
-    def _video_loop(self, camera, stream_id):
-        cap = None
+    def _video_loop(self, camera, stream_id, render_token):
+        from models.pipeline import draw_tracks
+        pipeline = self.pipeline
+        subscription = None
         try:
             if stream_id != self.current_stream_id: return
-            src = 0 if camera.ip.strip() == "0" else camera.get_rtsp_url()
-            
-            if stream_id == self.current_stream_id:
-                self.video_label.after(0, lambda: self.video_label.config(text=f"Conectando {camera.name}..."))
             
-            cap = cv2.VideoCapture(src)
-            if not cap.isOpened():
-                if stream_id == self.current_stream_id:
-                    self.video_label.after(0, lambda: self.video_label.config(text="Error Conexión"))
-                return
+            # Se reutiliza el decodificador de la cámara (el monitor ya puede tenerlo abierto)
+            subscription = pipeline.capture_hub.subscribe(camera, "vista")
 
             # === VARIABLES PARA OPTIMIZACIÓN ===
-            frame_count = 0
-            SKIP_FRAMES = 10  # Detectar cada 10 frames (3 detect/seg aprox en 30fps)
+            # La frecuencia de detección la decide el controlador adaptativo
+            # (sube con actividad, baja con la escena quieta) en vez de 1 de cada 10 frames
+            rate_key = ("vista", camera.id)
+            pipeline.rate_controller.register(rate_key, floor=pipeline.live_rate[0], ceiling=pipeline.live_rate[1])
             
-            # Guardamos las detecciones para pintarlas en los frames que saltamos
-            cached_persons = [] 
-            cached_forklifts = []
+            roi = None
+            # Los tracks se dibujan en todos los frames, extrapolados entre inferencias
+            tracker = pipeline.tracker_for(camera)
             # ===================================
 
             while not self.stop_thread.is_set():
                 if stream_id != self.current_stream_id: break
-                ret, frame = cap.read()
-                if not ret: break
-
-                frame_count += 1
-
-                # --- DETECCIÓN (Solo 1 de cada 10 frames) ---
-                if frame_count % SKIP_FRAMES == 0:
-                    
-                    # 1. Reducir tamaño solo para la IA (Más rápido)
-                    frame_small = cv2.resize(frame, (640, int(frame.shape[0]*(640/frame.shape[1]))))
+                packet = subscription.read(timeout=10)
+                if packet is None:
+                    if stream_id == self.current_stream_id and not self.stop_thread.is_set():
+                        self.renderer.publish_text("Error Conexión", render_token)
+                    continue
+                # El frame es compartido con otros consumidores: copiar antes de dibujar
+                frame = packet.frame.copy()
+
+                # --- DETECCIÓN (Solo cuando le toca según su frecuencia) ---
+                if pipeline.models_ready.is_set() and pipeline.rate_controller.try_acquire(rate_key):
                     
-                    # 2. Inferir
-                    res_p = self.yolo_person(frame_small, verbose=False)
-                    res_f = self.yolo_model(frame_small, verbose=False, conf=0.5)
-                    
-                    # 3. Calcular escala para adaptar cajas al tamaño real
-                    scale_x = frame.shape[1] / 640
-                    scale_y = frame.shape[0] / frame_small.shape[0]
-
-                    # 4. Limpiar y actualizar caché de detecciones
-                    cached_persons = []
-                    for box in res_p[0].boxes:
-                        if int(box.cls[0]) == 0:
-                            x1, y1, x2, y2 = box.xyxy[0].cpu().numpy()
-                            # Guardamos coords reales
-                            cached_persons.append([x1*scale_x, y1*scale_y, x2*scale_x, y2*scale_y])
-
-                    cached_forklifts = []
-                    for box in res_f[0].boxes:
-                        x1, y1, x2, y2 = box.xyxy[0].cpu().numpy()
-                        # Guardamos coords reales
-                        cached_forklifts.append([x1*scale_x, y1*scale_y, x2*scale_x, y2*scale_y])
+                    # 1-3. Inferir solo sobre las zonas de interés (recorte reducido a 640 px
+                    # como máximo, mismo planificador que los monitores). Las cajas ya
+                    # vuelven en coordenadas del frame real.
+                    roi = pipeline.roi_for(camera, frame, roi)
+                    detections = roi.detect(pipeline.inference, camera.id, frame, timeout=30)
+
+                    # 4. Asociar a los tracks de la cámara (el tracker aplica los umbrales
+                    # de confianza: las detecciones débiles solo continúan tracks)
+                    tracks = pipeline.track(tracker, detections, frame)
+                    pipeline.rate_controller.report(rate_key, len(tracks))
 
                     # 5. Lógica de Alerta (Solo se calcula cuando detectamos)
-                    alert = False
-                    def get_center(b): return ((b[0]+b[2])/2, (b[1]+b[3])/2)
-                    
-                    for p in cached_persons:
-                        cp = get_center(p)
-                        for f in cached_forklifts:
-                            cf = get_center(f)
-                            if math.dist(cp, cf) < 120: alert = True
-                    
-                    if (len(cached_forklifts) > 1 and self._check_forklift_dist(cached_forklifts)) or alert:
-                        msg = "⚠️ Choque Montacargas" if len(cached_forklifts)>1 else "⚠️ Persona en Riesgo"
-                        # Guardamos el frame ORIGINAL actual
-                        self._save_event_frame(camera, frame, msg)
-
-                # --- DIBUJADO (En TODOS los frames usando caché) ---
-                # Usamos las listas 'cached_' que contienen la info del último frame detectado
-                for f in cached_forklifts:
-                    cv2.rectangle(frame, (int(f[0]), int(f[1])), (int(f[2]), int(f[3])), (255,0,0), 2)
-                for p in cached_persons:
-                    cv2.rectangle(frame, (int(p[0]), int(p[1])), (int(p[2]), int(p[3])), (0,255,0), 2)
-
-                # --- UI UPDATE (En TODOS los frames para video fluido) ---
+                    # Todos los pares a la vez; umbral normalizado al ancho del frame
+                    msg = pipeline.check_incidents(tracker, tracks, pipeline.proximity_live,
+                                                   "⚠️ Choque Montacargas", "⚠️ Persona en Riesgo")
+                    if msg:
+                        # Guardamos el frame ORIGINAL actual (copia: abajo se dibujan las cajas
+                        # y la imagen se escribe después en el EventSink)
+                        pipeline.save_event_frame(camera, frame.copy(), msg, cooldown=pipeline.event_min_interval)
+
+                # --- DIBUJADO (En TODOS los frames) ---
+                # Cajas de los tracks extrapoladas al momento de este frame
+                if roi is not None:
+                    roi.draw(frame)
+                draw_tracks(frame, tracker)
+
+                # --- UI UPDATE: se publica el frame; Tk pinta el más reciente a display_fps ---
                 if stream_id != self.current_stream_id: break
-                if self.video_label.winfo_exists():
-                    lw, lh = self.video_label.winfo_width(), self.video_label.winfo_height()
-                    if lw > 1 and lh > 1:
-                        scale = min(lw/frame.shape[1], lh/frame.shape[0])
-                        nw, nh = int(frame.shape[1]*scale), int(frame.shape[0]*scale)
-                        if nw>0 and nh>0:
-                            resized = cv2.resize(frame, (nw, nh))
-                            rgb = cv2.cvtColor(resized, cv2.COLOR_BGR2RGB)
-                            
-                            pil_img = Image.fromarray(rgb)
-                            self.video_label.after(0, self._update_video_label, pil_img, stream_id)
+                self.renderer.publish(frame, render_token)
 
         except Exception as e: print(f"Video Error: {e}")
         finally: 
-            if cap: cap.release()
-
-    def _update_video_label(self, pil_image, stream_id):
-        # Protección contra condición de carrera
-        if stream_id != self.current_stream_id:
-            return
-
-        if not self.stop_thread.is_set():
+            if subscription: subscription.close()
+            pipeline.rate_controller.unregister(("vista", camera.id))
+
+    def _remote_video_loop(self, camera, stream_id, render_token):
+        """Modo cliente: pide al servicio el último frame (con zonas y tracks) a remote_preview_fps."""
+        import cv2
+        import numpy as np
+        while not self.stop_thread.is_set() and stream_id == self.current_stream_id:
+            started = time.monotonic()
             try:
-                tk_image = ImageTk.PhotoImage(pil_image)
-                
-                self.video_label.config(image=tk_image, text="")
-                self.video_label.image = tk_image # Referencia para evitar Garbage Collection
-            except Exception as e:
-                print(f"Error actualizando frame: {e}")
-
-    def _check_forklift_distance(self, boxes, min_distance_px=100):
-        """
-        Verifica si hay dos montacargas demasiado cerca según sus cajas detectadas.
-        boxes: lista de coordenadas [x1, y1, x2, y2]
-        Retorna True si hay al menos un par demasiado cerca.
-        """
-        centers = []
-        for b in boxes:
-            x1, y1, x2, y2 = b
-            cx = (x1 + x2) / 2
-            cy = (y1 + y2) / 2
-            centers.append((cx, cy))
-
-        # Comparar distancias entre todos los pares
-        for i in range(len(centers)):
-            for j in range(i + 1, len(centers)):
-                x1, y1 = centers[i]
-                x2, y2 = centers[j]
-                distance = math.sqrt((x2 - x1) ** 2 + (y2 - y1) ** 2)
-                if distance < min_distance_px:
-                    return True  # dos montacargas demasiado cerca
-        return False
-
-    def _save_event_frame(self, camera, frame, description):
-        """Guarda un evento en disco Y en la base de datos con cooldown."""
-        now = time.time()
-
-        # Asegurar que existe el diccionario de tiempos por cámara
-        if not hasattr(self, "last_event_times"):
-            self.last_event_times = {}
-
-        # Obtener clave única para el cooldown
-        cam_key = getattr(camera, "name", str(camera))
-
-        # Cooldown de 10 segundos
-        last_time = self.last_event_times.get(cam_key, 0)
-        if now - last_time < 10:
-            return
-        self.last_event_times[cam_key] = now
-
-        timestamp_str = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
-        filename_ts = datetime.now().strftime("%Y%m%d_%H%M%S")
-
-        safe_cam_name = "".join(c for c in cam_key if c.isalnum() or c in (' ', '_', '-')).strip().replace(" ", "_")
-        filename = f"{safe_cam_name}_{filename_ts}.jpg"
-
-        # 1. Guardar archivo en Documentos
-        frames_folder = os.path.join(self.storage_dir, "event_frames")
-        os.makedirs(frames_folder, exist_ok=True)
-        path = os.path.join(frames_folder, filename)
-
-        cv2.imwrite(path, frame)
-        print(f"[EVENTO] Imagen guardada en: {path}")
-
-        # 2. Guardar en Base de Datos y Actualizar UI
-        if hasattr(camera, 'id') and camera.id is not None:
-            try:
-                # Crear objeto evento
-                new_event = Event(
-                    camera_id=camera.id,
-                    timestamp=timestamp_str,
-                    description=description,
-                    image_path=path
-                )
-
-                # Guardar en DB (Esto sí se puede hacer en el hilo)
-                event_id = self.db.add_event(new_event)
-
-                # 3. Actualizar la Interfaz DE FORMA SEGURA
-                # Usamos self.after para que la inserción ocurra en el hilo principal
-                if self.current_camera and self.current_camera.id == camera.id:
-                    self.after(0, lambda: self._safe_tree_insert(event_id, timestamp_str, description))
-
+                jpeg, state, reconnects = self.db.get_preview(camera.id)
+                self._remote_status = (camera.id, state, reconnects)
+                if jpeg is None:
+                    self.renderer.publish_text(f"Conectando {camera.name}...", render_token)
+                else:
+                    frame = cv2.imdecode(np.frombuffer(jpeg, np.uint8), cv2.IMREAD_COLOR)
+                    if frame is not None:
+                        self.renderer.publish(frame, render_token)
             except Exception as e:
-                print(f"[ERROR DB] No se pudo guardar evento: {e}")
+                self._remote_status = (camera.id, None, 0)
+                self.renderer.publish_text("Servicio no disponible", render_token)
+                print(f"[REMOTO] Vista previa: {e}")
+                self.stop_thread.wait(2)
+            self.stop_thread.wait(max(0.0, self.preview_interval - (time.monotonic() - started)))
+
+    def _on_event_written(self, event: Event):
+        """Llamado por el EventSink del pipeline (hilo escritor) cuando un evento ya está en disco y en la BD."""
+        print(f"[EVENTO] Imagen guardada en: {event.image_path}")
+        # Usamos self.after para que la inserción ocurra en el hilo principal
+        if self.current_camera and self.current_camera.id == event.camera_id:
+            self.after(0, lambda: self._safe_tree_insert(event.id, event.timestamp, event.description))
 
     def _safe_tree_insert(self, event_id, timestamp, description):
         """Función auxiliar para insertar en el Treeview desde el hilo principal."""
         try:
+            self._last_event_id = max(self._last_event_id, event_id)
             if not self.events_tree.exists(event_id):
                 self.events_tree.insert("", 0, iid=event_id, values=(timestamp, description))
         except Exception as e:
@@ -459,7 +413,7 @@ class WinCameras(ttk.Frame):
         form_frame = ttk.Frame(win, padding=20)
         form_frame.pack(expand=True, fill=tk.BOTH)
 
-        fields = ["Nombre", "IP", "Usuario", "Contraseña", "Puerto"]
+        fields = ["Nombre", "IP", "Usuario", "Contraseña", "Puerto", "Ruta stream", "Ruta análisis"]
         entries = {}
 
         for i, field in enumerate(fields):
@@ -474,6 +428,8 @@ class WinCameras(ttk.Frame):
             entries["Usuario"].insert(0, selected_cam.username)
             entries["Contraseña"].insert(0, selected_cam.password)
             entries["Puerto"].insert(0, str(selected_cam.port))
+            entries["Ruta stream"].insert(0, selected_cam.stream_path or "")
+            entries["Ruta análisis"].insert(0, selected_cam.analysis_path)
 
         def on_save():
             try:
@@ -489,7 +445,10 @@ class WinCameras(ttk.Frame):
 
                 new_cam = Camera(
                     id=selected_cam.id if edit_mode else None,
-                    name=name, ip=ip, username=user, password=pwd, port=port
+                    name=name, ip=ip, username=user, password=pwd, port=port,
+                    stream_path=entries["Ruta stream"].get().strip(),
+                    analysis_path=entries["Ruta análisis"].get().strip(),
+                    roi=selected_cam.roi if edit_mode else None
                 )
 
                 if edit_mode:
@@ -508,6 +467,38 @@ class WinCameras(ttk.Frame):
         save_button = ttk.Button(form_frame, text="Guardar", command=on_save)
         save_button.grid(row=len(fields), columnspan=2, pady=10)
 
+    def _show_roi_editor(self):
+        if not self.current_camera:
+            return
+        import cv2
+        import numpy as np
+        from ui.winRoiEditor import WinRoiEditor
+        camera = self.current_camera
+        frame = None
+        if self.pipeline is not None:
+            packet = self.pipeline.capture_hub.latest(camera.id)
+            frame = packet.frame if packet else None
+        else:
+            try:
+                jpeg, _, _ = self.db.get_preview(camera.id, width=1280, raw=True)
+                if jpeg is not None:
+                    frame = cv2.imdecode(np.frombuffer(jpeg, np.uint8), cv2.IMREAD_COLOR)
+            except Exception as e:
+                print(f"[REMOTO] Vista previa para zonas: {e}")
+        WinRoiEditor(self, camera, frame,
+                     on_save=lambda polygons: self._save_roi(camera, polygons))
+
+    def _save_roi(self, camera, polygons):
+        previous, camera.roi = camera.roi, polygons
+        try:
+            self.db.update_camera(camera)
+        except Exception as e:
+            camera.roi = previous
+            messagebox.showerror("Error", f"No se pudieron guardar las zonas.\n{e}")
+            return
+        if self.pipeline is not None:
+            self.pipeline.set_roi(camera, polygons)
+
     def _adjust_event_columns(self, event):
         if self.events_tree.winfo_width() > 0:
             self.events_tree.column("timestamp", width=int(self.events_tree.winfo_width() * 0.4))
@@ -567,136 +558,91 @@ class WinCameras(ttk.Frame):
             ttk.Label(win, text="❌ Archivo de imagen no encontrado en disco", foreground="red").pack(pady=20)
 
     def _refresh_events_loop(self, camera: Camera):
-        """Carga eventos históricos y busca nuevos periódicamente."""
-        def refresh():
-            # 1. Verificar si el usuario sigue viendo ESTA cámara
-            if self.current_camera is None or self.current_camera.id != camera.id:
-                return # Si cambió de cámara, matamos este bucle
+        """
+        Carga los eventos recientes de la cámara y después solo agrega los nuevos.
+        Los eventos de este proceso llegan empujados por el EventSink
+        (_on_event_written); el sondeo incremental (id > último mostrado) solo
+        se activa con events_poll_s > 0, p. ej. si otro proceso escribe eventos.
+        """
+        self._events_generation += 1
+        generation = self._events_generation
+        self._last_event_id = 0
+
+        try:
+            # 1. Historial reciente (Viene ordenado: Nuevo -> Viejo)
+            events = self.db.get_events_by_camera(camera.id, limit=self.events_initial_limit)
+            for ev in events:
+                if not self.events_tree.exists(ev.id):
+                    self.events_tree.insert("", tk.END, iid=ev.id, values=(ev.timestamp, ev.description))
+                self._last_event_id = max(self._last_event_id, ev.id)
+        except Exception as e:
+            print(f"Error refresh: {e}")
+
+        if not self.events_poll_ms:
+            return
 
+        def poll():
+            # 2. Verificar si el usuario sigue viendo ESTA cámara
+            if generation != self._events_generation or self.current_camera is None or self.current_camera.id != camera.id:
+                return # Si cambió de cámara, matamos este bucle
             try:
-                # 2. Obtener eventos (Vienen ordenados: Nuevo -> Viejo)
-                events = self.db.get_events_by_camera(camera.id)
-                
-                for ev in events:
-                    # 3. Solo insertar si no existe en la lista
-                    if not self.events_tree.exists(ev.id):
-                        self.events_tree.insert("", tk.END, iid=ev.id, values=(ev.timestamp, ev.description))
-            
+                # 3. Solo las filas más nuevas que la última mostrada (Viejo -> Nuevo)
+                for ev in self.db.get_events_since(camera.id, self._last_event_id, limit=500):
+                    self._safe_tree_insert(ev.id, ev.timestamp, ev.description)
             except Exception as e:
                 print(f"Error refresh: {e}")
             finally:
-                # 4. Repetir cada 3 segundos si seguimos en la misma cámara
-                if self.current_camera and self.current_camera.id == camera.id:
-                    self.after(3000, refresh)
+                self.after(self.events_poll_ms, poll)
 
-        refresh() # Llamada inmediata inicial
+        self.after(self.events_poll_ms, poll)
 
-    def _start_background_detection(self):
-        """Inicia detección en segundo plano optimizada para ALTA CARGA (10+ cámaras)."""
-        import random # Necesario para evitar picos de CPU
+    def _log_capture_stats(self, interval_s):
+        """Imprime periódicamente la edad de los frames, descartes y frecuencia por cámara."""
+        if not interval_s:
+            return
+        try:
+            self.pipeline.print_stats()
+            render = self.renderer.get_stats()
+            print(f"[RENDER] {render['fps']:.1f} fps publicados={render['published']} "
+                  f"mostrados={render['displayed']} descartados={render['dropped']}")
+        except Exception as e:
+            print(f"Error métricas de captura: {e}")
+        self.after(int(interval_s * 1000), self._log_capture_stats, interval_s)
 
-        def detect_forever(camera: Camera):
-            # Retraso inicial aleatorio para que no arranquen las 10 hilos a la vez
-            time.sleep(random.uniform(0.5, 5.0))
-            
-            cap = None
-            rtsp_url = camera.get_rtsp_url()
-            
-            # Intentar conectar
-            try:
-                cap = cv2.VideoCapture(rtsp_url)
-            except:
-                pass # Se manejará en el bucle
-
-            print(f"[HILO] Iniciado monitor para: {camera.name}")
-
-            while True:
-                # 1. PAUSA: Análisis cada 1.5 segundos para 10 cámaras (Ajustable)
-                # Si tu PC es muy potente, puedes bajarlo a 1.0 o 0.5
-                time.sleep(1.5) 
-
-                try:
-                    # 2. RECONEXIÓN ROBUSTA
-                    if cap is None or not cap.isOpened():
-                        cap = cv2.VideoCapture(rtsp_url)
-                        if not cap.isOpened():
-                            time.sleep(2) # Esperar antes de reintentar
-                            continue
-                    
-                    # 3. LIMPIEZA DE BUFFER (Truco RTSP)
-                    # Leemos y descartamos frames viejos acumulados durante el sleep
-                    for _ in range(4):
-                        cap.grab() 
-                    
-                    # Leemos el frame real
-                    ret, frame = cap.read()
-                    if not ret:
-                        print(f"[{camera.name}] Señal perdida. Reconectando...")
-                        cap.release()
-                        cap = None
-                        continue
-
-                    # 4. OPTIMIZACIÓN CRÍTICA: Redimensionar
-                    # Procesar 1080p x 10 cámaras mata la CPU. Usamos 640px.
-                    # YOLO funciona excelente con 640x640 o similar.
-                    h, w = frame.shape[:2]
-                    scale = 640 / w
-                    new_h = int(h * scale)
-                    frame_small = cv2.resize(frame, (640, new_h))
-
-                    # --- Detección sobre frame_small (Más rápido) ---
-                    results_person = self.yolo_person(frame_small, verbose=False)
-                    # Usamos conf=0.55 para ser más estrictos en background
-                    results_forklift = self.yolo_model(frame_small, verbose=False, conf=0.55)
-
-                    persons = [b.xyxy.cpu().numpy() for b in results_person[0].boxes if int(b.cls[0]) == 0]
-                    forklifts = [b.xyxy.cpu().numpy() for b in results_forklift[0].boxes]
-
-                    # Función center ajustada al frame pequeño
-                    def center(box):
-                        x1, y1, x2, y2 = box[:4]
-                        return ((x1 + x2) / 2, (y1 + y2) / 2)
-
-                    # Verificar cercanía
-                    # Nota: Como redimensionamos la imagen, la distancia en píxeles cambia.
-                    # 120px en 1080p es aprox 40px en 640p. Ajustamos el umbral a 45.
-                    umbral_distancia = 45 
-                    
-                    alert_person_near_forklift = False
-                    for p in persons:
-                        cx_p, cy_p = center(p[0])
-                        for f in forklifts:
-                            cx_f, cy_f = center(f[0])
-                            dist = ((cx_p - cx_f) ** 2 + (cy_p - cy_f) ** 2) ** 0.5
-                            if dist < umbral_distancia:
-                                alert_person_near_forklift = True
-
-                    # --- Guardar evento ---
-                    if (len(forklifts) > 1 and self._check_forklift_distance([b[0][:4] for b in forklifts], umbral_distancia)) or alert_person_near_forklift:
-                        description = "⚠️ Dos montacargas cerca" if len(forklifts) > 1 else "⚠️ Persona cerca de maquina"
-                        # Importante: Guardamos el frame ORIGINAL (alta calidad), no el pequeño
-                        self._save_event_frame(camera, frame, description)
-
-                except Exception as e:
-                    # Evitar que un error en una cámara detenga el hilo
-                    print(f"Error en hilo {camera.name}: {e}")
-                    time.sleep(1)
-
-        # --- Lanzar hilos ---
-        cameras = self.db.get_all_cameras()
-        
-        def is_local_camera(cam: Camera) -> bool:
-            if not cam.ip: return True
-            if cam.ip.strip() in ["0", "1", "2", "localhost"] or "webcam" in cam.name.lower():
-                return True
-            return False
-        
-        count = 0
-        for cam in cameras:
-            if is_local_camera(cam):
-                continue
-            # Daemon=True asegura que los hilos mueran al cerrar la app
-            threading.Thread(target=detect_forever, args=(cam,), daemon=True).start()
-            count += 1
-        
-        print(f"[SISTEMA] Vigilancia activa en {count} cámaras (Modo Ahorro CPU activado)")
\ No newline at end of file
+    def _refresh_rate_label(self):
+        """Muestra la frecuencia de análisis actual de la cámara seleccionada."""
+        if not self.rate_label.winfo_exists():
+            return
+        camera = getattr(self, "current_camera", None)
+        if camera is None:
+            self.rate_label.config(text="")
+        else:
+            if self.pipeline is not None:
+                status = self.pipeline.camera_status(camera.id)
+                parts = []
+                if status["monitor_hz"] is not None:
+                    parts.append(f"monitor {status['monitor_hz']:.2f} inf/s")
+                if status["live_hz"] is not None:
+                    parts.append(f"vista {status['live_hz']:.2f} inf/s")
+                text = "Análisis: " + (" | ".join(parts) if parts else "-")
+                state, reconnects = status["state"], status["reconnects"]
+            else:
+                # Modo cliente: el estado llega en cada vista previa
+                camera_id, state, reconnects = self._remote_status
+                text = "Análisis: en el servicio"
+                if camera_id != camera.id:
+                    state = None
+            if state:
+                text = f"Estado: {state} (reconexiones {reconnects})   " + text
+            render = self.renderer.get_stats()
+            if render["displayed"]:
+                text += f"   Vista: {render['fps']:.1f} fps (descartados {render['dropped']})"
+            self.rate_label.config(text=text)
+        self.after(1000, self._refresh_rate_label)
+
+    def shutdown(self):
+        """Detiene y espera a todos los hilos (video, detección, inferencia, captura, eventos)."""
+        self._stop_video_thread()
+        if self.pipeline is not None:
+            self.pipeline.shutdown()
+        self.renderer.stop()
\ No newline at end of file
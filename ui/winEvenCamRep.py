@@ -3,14 +3,11 @@ from tkinter import ttk
 from models.toplevel import TopWindow
 from models.datagrid import DataGrid
 from database.database import Database
-import tempfile
-import webbrowser
-from reportlab.pdfbase import pdfmetrics
-from reportlab.pdfbase.ttfonts import TTFont
-import openpyxl
-from openpyxl.utils import get_column_letter
-import os
-from docx import Document
+from functions.reports import open_report
+from models.report_job import ReportJob, ReportProgress
+
+HEADERS = ["ID", "Cámara ID", "Fecha/Hora", "Descripción"]
+TITLE = "Reporte de Eventos por Cámara"
 
 
 class WinEventCamRep(TopWindow):
@@ -37,6 +34,9 @@ class WinEventCamRep(TopWindow):
         btn_excel.pack(side="left", expand=True, padx=5)
         btn_exit.pack(side="left", expand=True, padx=5)
 
+        # Avance del reporte en curso (se muestra solo mientras se genera)
+        self.progress = ReportProgress(self, on_done=open_report)
+
         # Contenedor principal
         main_frame = ttk.Frame(self)
         main_frame.pack(fill="both", expand=True, padx=10, pady=10)
@@ -83,166 +83,48 @@ class WinEventCamRep(TopWindow):
         return self.camera_map.get(selected)
 
     def load_events(self, camera_id=None):
-        """Carga los eventos al DataGrid (filtrando si hay cámara seleccionada)"""
-        self.datagrid.clear()
-        if camera_id:
-            events = self.db.get_events_by_camera(camera_id)
-        else:
-            events = self.db.get_events()
-
-        for ev in events:
-            self.datagrid.insert_row([
-                str(ev.id),
-                str(ev.camera_id),
-                ev.timestamp,
-                ev.description
-            ])
+        """Carga los eventos al DataGrid por páginas (filtrando si hay cámara seleccionada)"""
+        def fetch(record, direction, limit):
+            cursor = (record.timestamp, record.id) if record else None
+            if direction == "prev":
+                return self.db.get_events_page(camera_id, after=cursor, limit=limit)
+            return self.db.get_events_page(camera_id, before=cursor, limit=limit)
+
+        self.datagrid.set_virtual_source(
+            fetch,
+            lambda ev: [str(ev.id), str(ev.camera_id), ev.timestamp, ev.description]
+        )
 
     # ---------------------------- REPORTES ----------------------------
+    # Las filas se leen del cursor por bloques y cada exportador escribe el
+    # archivo por partes (ver functions/reports.py), en un proceso aparte.
+
+    def _export(self, fmt):
+        """Genera el reporte en segundo plano; el avance se muestra abajo y al final se abre"""
+        if self.progress.busy:
+            return
+        camera_id = self.get_selected_camera_id()
+        # El total lo cuenta el proceso del reporte: el COUNT no corre en el hilo de Tk
+        job = ReportJob(self.db.db_path, ("events", camera_id), fmt, TITLE, HEADERS)
+        self.progress.run(job)
+
+    def destroy(self):
+        # Si se cierra la ventana se cancela el reporte en curso
+        self.progress.cancel()
+        super().destroy()
 
     def on_generate(self):
         """Genera un reporte HTML filtrado por cámara"""
-        camera_id = self.get_selected_camera_id()
-        if camera_id:
-            events = self.db.get_events_by_camera(camera_id)
-        else:
-            events = self.db.get_events()
-
-        html_content = self._generate_html_table(events)
-        with tempfile.NamedTemporaryFile("w", delete=False, suffix=".html", encoding="utf-8") as f:
-            f.write(html_content)
-            webbrowser.open(f.name)
-
-    def _generate_html_table(self, events):
-        """Crea el contenido HTML de la tabla de eventos"""
-        html = """
-        <html>
-        <head>
-            <meta charset="UTF-8">
-            <title>Reporte de Eventos</title>
-            <style>
-                table {border-collapse: collapse; width: 90%; margin: 20px auto;}
-                th, td {border: 1px solid #000; padding: 8px; text-align: center;}
-                th {background-color: #f2f2f2;}
-            </style>
-        </head>
-        <body>
-        <h2 style="text-align:center;">Reporte de Eventos por Cámara</h2>
-        <table>
-            <tr>
-                <th>ID</th><th>Cámara ID</th><th>Fecha/Hora</th><th>Descripción</th>
-            </tr>
-        """
-        for ev in events:
-            html += f"<tr><td>{ev.id}</td><td>{ev.camera_id}</td><td>{ev.timestamp}</td><td>{ev.description}</td></tr>"
-        html += "</table></body></html>"
-        return html
+        self._export("html")
 
     def on_generate_pdf(self):
         """Genera un PDF con los eventos"""
-        camera_id = self.get_selected_camera_id()
-        if camera_id:
-            events = self.db.get_events_by_camera(camera_id)
-        else:
-            events = self.db.get_events()
-        # Crear archivo temporal
-        temp_file = tempfile.NamedTemporaryFile(delete=False, suffix=".pdf")
-        temp_file.close()
-        # Registrar fuente Unicode (usa una que exista en Windows)
-        try:
-            pdfmetrics.registerFont(TTFont("DejaVu", "C:\\Windows\\Fonts\\DejaVuSans.ttf"))
-            font_name = "DejaVu"
-        except:
-            # Si no existe esa fuente, usa Arial (segura en Windows)
-            pdfmetrics.registerFont(TTFont("Arial", "C:\\Windows\\Fonts\\arial.ttf"))
-            font_name = "Arial"
-        from reportlab.lib.pagesizes import letter
-        from reportlab.pdfgen import canvas
-        c = canvas.Canvas(temp_file.name, pagesize=letter)
-        width, height = letter
-        c.setFont(font_name, 14)
-        c.drawCentredString(width / 2, height - 50, "Reporte de Eventos por Cámara")
-        c.setFont(font_name, 11)
-        y = height - 80
-        c.drawString(40, y, "ID")
-        c.drawString(80, y, "Cámara")
-        c.drawString(160, y, "Fecha/Hora")
-        c.drawString(320, y, "Descripción")
-        c.line(40, y - 2, 560, y - 2)
-        y -= 20
-        c.setFont(font_name, 10)
-        for ev in events:
-            c.drawString(40, y, str(ev.id))
-            c.drawString(80, y, str(ev.camera_id))
-            c.drawString(160, y, str(ev.timestamp))
-            c.drawString(320, y, ev.description[:60])
-            y -= 15
-            if y < 50:
-                c.showPage()
-                c.setFont(font_name, 10)
-                y = height - 50
-        c.save()
-        # Abrir el PDF con el visor predeterminado del sistema
-        try:
-            os.startfile(temp_file.name)
-        except Exception:
-            # En caso de que os.startfile falle (Linux/mac), usar webbrowser
-            webbrowser.open(f"file://{temp_file.name}")
+        self._export("pdf")
 
     def on_generate_excel(self):
         """Genera un archivo Excel con los eventos"""
-        camera_id = self.get_selected_camera_id()
-        if camera_id:
-            events = self.db.get_events_by_camera(camera_id)
-        else:
-            events = self.db.get_events()
-
-        wb = openpyxl.Workbook()
-        ws = wb.active
-        ws.title = "Reporte de Eventos"
-
-        headers = ["ID", "Cámara ID", "Fecha/Hora", "Descripción"]
-        ws.append(headers)
-
-        for ev in events:
-            ws.append([ev.id, ev.camera_id, ev.timestamp, ev.description])
-
-        for i, col in enumerate(ws.columns, start=1):
-            max_length = max(len(str(cell.value)) if cell.value else 0 for cell in col)
-            ws.column_dimensions[get_column_letter(i)].width = max_length + 2
-
-        temp_file = tempfile.NamedTemporaryFile(delete=False, suffix=".xlsx")
-        wb.save(temp_file.name)
-        temp_file.close()
-        os.startfile(temp_file.name)
+        self._export("excel")
 
     def on_generate_word(self):
         """Genera un documento Word con los eventos"""
-        camera_id = self.get_selected_camera_id()
-        if camera_id:
-            events = self.db.get_events_by_camera(camera_id)
-        else:
-            events = self.db.get_events()
-
-        doc = Document()
-        doc.add_heading("Reporte de Eventos por Cámara", level=1)
-
-        table = doc.add_table(rows=1, cols=4)
-        table.style = 'Table Grid'
-
-        hdr_cells = table.rows[0].cells
-        headers = ["ID", "Cámara ID", "Fecha/Hora", "Descripción"]
-        for i, h in enumerate(headers):
-            hdr_cells[i].text = h
-
-        for ev in events:
-            row_cells = table.add_row().cells
-            row_cells[0].text = str(ev.id)
-            row_cells[1].text = str(ev.camera_id)
-            row_cells[2].text = str(ev.timestamp)
-            row_cells[3].text = ev.description
-
-        temp_file = tempfile.NamedTemporaryFile(delete=False, suffix=".docx")
-        doc.save(temp_file.name)
-        temp_file.close()
-        os.startfile(temp_file.name)
+        self._export("word")
@@ -5,11 +5,8 @@ import sys
 import os
 # --- Archive
 from ui.winHelp import WinHelp
-# --- Catálogos
-from ui.winCameras import WinCameras
-# --- Reportes
-from ui.winCamerasReport import WinCamerasRep
-from ui.winEvenCamRep import WinEventCamRep
+# --- Catálogos y reportes: se importan al usarse (ver _show_cameras_view y
+# _open_report) para que la ventana aparezca sin esperar a cv2/ultralytics.
 # --- Preferencias
 from ui.winAbout import WinAbout
 
@@ -37,8 +34,8 @@ class WinMain(Window):
         self.archive.add_command(label="Ayuda",command=lambda: WinHelp(self))
         self.archive.add_command(label="Salir", command=self.destroy)
 
-        self.reports.add_command(label="Reporte de Cámaras", command=lambda: WinCamerasRep(self))
-        self.reports.add_command(label="Reporte de Evento por Cámara", command=lambda: WinEventCamRep(self))
+        self.reports.add_command(label="Reporte de Cámaras", command=lambda: self._open_report("cameras"))
+        self.reports.add_command(label="Reporte de Evento por Cámara", command=lambda: self._open_report("events"))
 
         #self.preferences.add_command(label="Términos y Condiciones")
         #self.preferences.add_command(label="Políticas de Privacidad")
@@ -49,20 +46,35 @@ class WinMain(Window):
         self.protocol("WM_DELETE_WINDOW", self._on_window_close)
 
         # === Aquí reemplazamos la imagen por el diseño de WinCameras ===
-        self.cameras_view = WinCameras(self)
-        self.cameras_view.pack(fill=BOTH, expand=True)
+        # Se construye en cuanto la ventana ya está visible
+        self.cameras_view = None
+        self.after(0, self._show_cameras_view)
 
         self.focus_force()
         self.mainloop()
 
+    def _show_cameras_view(self):
+        from ui.winCameras import WinCameras
+        self.cameras_view = WinCameras(self)
+        self.cameras_view.pack(fill=BOTH, expand=True)
+
+    def _open_report(self, kind):
+        if kind == "cameras":
+            from ui.winCamerasReport import WinCamerasRep
+            WinCamerasRep(self)
+        else:
+            from ui.winEvenCamRep import WinEventCamRep
+            WinEventCamRep(self)
+
     def _on_window_close(self):
-            print("[WinMain] Interceptando cierre. Deteniendo hilo de video...")
+            print("[WinMain] Interceptando cierre. Deteniendo hilos de video y detección...")
             try:
-                # Llama al método en WinCameras que detiene el hilo
-                # de la cámara que se está visualizando.
-                self.cameras_view._stop_video_thread()
+                # Detiene la vista en vivo, los monitores de cámaras y espera
+                # a que terminen los hilos antes de cerrar.
+                if self.cameras_view is not None:
+                    self.cameras_view.shutdown()
             except Exception as e:
-                print(f"Error al detener hilos de video: {e}")
+                print(f"Error al detener hilos: {e}")
 
             # Ahora sí, destruye la ventana principal
             self.destroy()
@@ -0,0 +1,97 @@
+from tkinter import *
+from tkinter import ttk
+import cv2
+from PIL import Image, ImageTk
+from models.toplevel import TopWindow
+
+class WinRoiEditor(TopWindow):
+    """
+    Editor de zonas de interés de una cámara. Clic izquierdo agrega un punto,
+    clic derecho (o "Cerrar zona") cierra el polígono actual. Los puntos se
+    guardan normalizados (0-1) para no depender de la resolución del stream.
+    """
+    CANVAS_W, CANVAS_H = 800, 450
+
+    def __init__(self, master, camera, frame, on_save):
+        super().__init__(master, title=f"Zonas de interés - {camera.name}", width=840, height=560)
+        self.on_save = on_save
+        self.polygons = [list(p) for p in camera.roi]
+        self.current = []
+
+        self.canvas = Canvas(self, width=self.CANVAS_W, height=self.CANVAS_H, bg="black", highlightthickness=0)
+        self.canvas.pack(padx=20, pady=(15, 5))
+        self.canvas.bind("<Button-1>", self._add_point)
+        self.canvas.bind("<Button-3>", lambda e: self._close_polygon())
+
+        # Último frame de la cámara como fondo (si ya hay uno decodificado)
+        self.view = (0, 0, self.CANVAS_W, self.CANVAS_H)
+        self.image = None
+        if frame is not None:
+            h, w = frame.shape[:2]
+            scale = min(self.CANVAS_W / w, self.CANVAS_H / h)
+            nw, nh = int(w * scale), int(h * scale)
+            rgb = cv2.cvtColor(cv2.resize(frame, (nw, nh)), cv2.COLOR_BGR2RGB)
+            self.image = ImageTk.PhotoImage(Image.fromarray(rgb))
+            self.view = ((self.CANVAS_W - nw) // 2, (self.CANVAS_H - nh) // 2, nw, nh)
+        else:
+            ttk.Label(self, text="Sin imagen de la cámara: las zonas se dibujan sobre el área completa.",
+                      foreground="gray").pack()
+
+        ttk.Label(self, text="Clic izquierdo: agregar punto | Clic derecho: cerrar zona").pack()
+
+        buttons = ttk.Frame(self)
+        buttons.pack(pady=10)
+        ttk.Button(buttons, text="Cerrar zona", command=self._close_polygon).pack(side=LEFT, padx=5)
+        ttk.Button(buttons, text="Deshacer", command=self._undo).pack(side=LEFT, padx=5)
+        ttk.Button(buttons, text="Limpiar", command=self._clear).pack(side=LEFT, padx=5)
+        ttk.Button(buttons, text="Guardar", command=self._save).pack(side=LEFT, padx=5)
+
+        self._redraw()
+
+    def _to_canvas(self, point):
+        x0, y0, w, h = self.view
+        return x0 + point[0] * w, y0 + point[1] * h
+
+    def _add_point(self, event):
+        x0, y0, w, h = self.view
+        x = min(max((event.x - x0) / w, 0.0), 1.0)
+        y = min(max((event.y - y0) / h, 0.0), 1.0)
+        self.current.append([round(x, 4), round(y, 4)])
+        self._redraw()
+
+    def _close_polygon(self):
+        if len(self.current) >= 3:
+            self.polygons.append(self.current)
+        self.current = []
+        self._redraw()
+
+    def _undo(self):
+        if self.current:
+            self.current.pop()
+        elif self.polygons:
+            self.current = self.polygons.pop()
+        self._redraw()
+
+    def _clear(self):
+        self.polygons, self.current = [], []
+        self._redraw()
+
+    def _redraw(self):
+        self.canvas.delete("all")
+        if self.image is not None:
+            self.canvas.create_image(self.view[0], self.view[1], image=self.image, anchor="nw")
+        for polygon in self.polygons:
+            coords = [c for p in polygon for c in self._to_canvas(p)]
+            self.canvas.create_polygon(coords, outline="yellow", fill="", width=2)
+        if self.current:
+            coords = [c for p in self.current for c in self._to_canvas(p)]
+            if len(self.current) > 1:
+                self.canvas.create_line(coords, fill="orange", width=2)
+            for p in self.current:
+                x, y = self._to_canvas(p)
+                self.canvas.create_oval(x - 3, y - 3, x + 3, y + 3, fill="orange", outline="")
+
+    def _save(self):
+        self._close_polygon()
+        self.on_save(self.polygons)
+        self.destroy()